@@ -0,0 +1,130 @@
+"""
+Conversion Path Analytics
+UnMoGrowP Attribution Platform - Attribution ML Service
+
+Streaming distributions of path length and time from first touch to
+conversion, sliced by channel and conversion type. Fed by attribution
+traffic and used to choose lookback windows from measured data.
+"""
+
+from typing import List, Dict, Any, Tuple, Optional
+from schemas.attribution import AttributionRequest
+from utils.histograms import LogHistogram
+
+ALL = "all"
+
+# Path length in touchpoints, time to convert in seconds (1s .. ~3 years)
+PATH_LENGTH_LAYOUT = {"min_value": 1.0, "max_value": 1e4, "buckets_per_decade": 20}
+TIME_TO_CONVERT_LAYOUT = {"min_value": 1.0, "max_value": 1e8, "buckets_per_decade": 10}
+
+
+class PathDistributions:
+    """Path-length and time-to-convert histograms for one slice"""
+
+    def __init__(self):
+        self.path_length = LogHistogram(**PATH_LENGTH_LAYOUT)
+        self.time_to_convert = LogHistogram(**TIME_TO_CONVERT_LAYOUT)
+
+    def merge(self, other: "PathDistributions"):
+        self.path_length.merge(other.path_length)
+        self.time_to_convert.merge(other.time_to_convert)
+
+    def summary(self, include_buckets: bool = False) -> Dict[str, Any]:
+        time_summary = self.time_to_convert.summary(include_buckets=include_buckets)
+        time_summary["quantiles_days"] = {
+            name: round(value / 86400, 3) if value is not None else None
+            for name, value in time_summary["quantiles"].items()
+        }
+
+        return {
+            "conversions": self.path_length.count,
+            "path_length": self.path_length.summary(include_buckets=include_buckets),
+            "time_to_convert_seconds": time_summary
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path_length": self.path_length.to_dict(),
+            "time_to_convert": self.time_to_convert.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PathDistributions":
+        distributions = cls()
+        distributions.path_length = LogHistogram.from_dict(data["path_length"])
+        distributions.time_to_convert = LogHistogram.from_dict(data["time_to_convert"])
+        return distributions
+
+
+class ConversionPathAnalytics:
+    """Streaming path-length and time-to-convert distributions"""
+
+    def __init__(self):
+        # Slices include "all" rollups so any (channel, conversion_type)
+        # combination is answered from a single histogram pair.
+        self._slices: Dict[Tuple[str, str], PathDistributions] = {}
+
+    def record(self, request: AttributionRequest):
+        """Record the conversion path of an attribution request"""
+        touchpoints = [
+            tp for tp in request.touchpoints
+            if tp.timestamp <= request.conversion_timestamp
+        ]
+        if not touchpoints:
+            return
+
+        path_length = len(touchpoints)
+        first_touch = min(tp.timestamp for tp in touchpoints)
+        time_to_convert = (request.conversion_timestamp - first_touch).total_seconds()
+
+        channels = {tp.channel for tp in touchpoints}
+        channels.add(ALL)
+
+        for channel in channels:
+            for conversion_type in {request.conversion_type, ALL}:
+                distributions = self._slice(channel, conversion_type)
+                distributions.path_length.record(path_length)
+                distributions.time_to_convert.record(time_to_convert)
+
+    def get(self, channel: str = ALL, conversion_type: str = ALL) -> Optional[PathDistributions]:
+        """Distributions for a slice, or None if nothing was recorded"""
+        return self._slices.get((channel, conversion_type))
+
+    def slices(self) -> List[Dict[str, Any]]:
+        """Recorded slices with their conversion counts"""
+        return [
+            {"channel": channel, "conversion_type": conversion_type,
+             "conversions": distributions.path_length.count}
+            for (channel, conversion_type), distributions in sorted(self._slices.items())
+        ]
+
+    def merge(self, other: "ConversionPathAnalytics"):
+        """Merge the state of another worker"""
+        for key, distributions in other._slices.items():
+            self._slice(*key).merge(distributions)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize all slices for cross-worker merging"""
+        return {
+            "slices": [
+                {"channel": channel, "conversion_type": conversion_type,
+                 **distributions.to_dict()}
+                for (channel, conversion_type), distributions in self._slices.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversionPathAnalytics":
+        analytics = cls()
+        for item in data.get("slices", []):
+            key = (item["channel"], item["conversion_type"])
+            analytics._slices[key] = PathDistributions.from_dict(item)
+        return analytics
+
+    def _slice(self, channel: str, conversion_type: str) -> PathDistributions:
+        key = (channel, conversion_type)
+        distributions = self._slices.get(key)
+        if distributions is None:
+            distributions = PathDistributions()
+            self._slices[key] = distributions
+        return distributions
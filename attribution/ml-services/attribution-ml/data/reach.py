@@ -0,0 +1,129 @@
+"""
+Distinct Reach Tracking
+UnMoGrowP Attribution Platform - Attribution ML Service
+
+Approximate distinct users touched and distinct converters per channel and
+campaign, maintained with HyperLogLog sketches from attribution traffic.
+"""
+
+from typing import List, Dict, Any, Tuple, Optional
+from schemas.attribution import AttributionRequest
+from utils.hyperloglog import HyperLogLog
+from data.conversion_paths import ALL
+
+NO_CAMPAIGN = "none"
+
+
+class ReachStats:
+    """Reach sketches and exact touch counters for one channel/campaign"""
+
+    def __init__(self, precision: int = 12):
+        self.users = HyperLogLog(precision)
+        self.converters = HyperLogLog(precision)
+        self.touches = 0
+        self.conversions = 0
+
+    def merge(self, other: "ReachStats"):
+        self.users.merge(other.users)
+        self.converters.merge(other.converters)
+        self.touches += other.touches
+        self.conversions += other.conversions
+
+    def summary(self) -> Dict[str, Any]:
+        distinct_users = self.users.count()
+        distinct_converters = min(self.converters.count(), distinct_users)
+
+        return {
+            "distinct_users": distinct_users,
+            "distinct_converters": distinct_converters,
+            "touches": self.touches,
+            "conversions": self.conversions,
+            "avg_frequency": round(self.touches / distinct_users, 3) if distinct_users else 0.0,
+            "converter_rate": round(distinct_converters / distinct_users, 4) if distinct_users else 0.0
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "users": self.users.to_dict(),
+            "converters": self.converters.to_dict(),
+            "touches": self.touches,
+            "conversions": self.conversions
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReachStats":
+        stats = cls()
+        stats.users = HyperLogLog.from_dict(data["users"])
+        stats.converters = HyperLogLog.from_dict(data["converters"])
+        stats.touches = int(data["touches"])
+        stats.conversions = int(data["conversions"])
+        return stats
+
+
+class ReachTracker:
+    """Distinct reach per (channel, campaign_id), with per-channel rollups"""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self._stats: Dict[Tuple[str, str], ReachStats] = {}
+
+    def record(self, request: AttributionRequest):
+        """Record the touchpoints up to the conversion and the converter of an attribution request"""
+        converted_keys = set()
+
+        for touchpoint in request.touchpoints:
+            if touchpoint.timestamp > request.conversion_timestamp:
+                continue
+            campaign_id = touchpoint.campaign_id or NO_CAMPAIGN
+            for key in ((touchpoint.channel, campaign_id), (touchpoint.channel, ALL)):
+                stats = self._entry(key)
+                stats.users.add(touchpoint.user_id)
+                stats.touches += 1
+                converted_keys.add(key)
+
+        for key in converted_keys:
+            stats = self._stats[key]
+            stats.converters.add(request.user_id)
+            stats.conversions += 1
+
+    def query(self, channel: Optional[str] = None,
+              campaign_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Reach rows matching an optional channel and campaign filter"""
+        rows = []
+        for (key_channel, key_campaign), stats in sorted(self._stats.items()):
+            if channel is not None and key_channel != channel:
+                continue
+            if campaign_id is not None and key_campaign != campaign_id:
+                continue
+            rows.append({"channel": key_channel, "campaign_id": key_campaign, **stats.summary()})
+        return rows
+
+    def merge(self, other: "ReachTracker"):
+        """Merge the state of another worker"""
+        for key, stats in other._stats.items():
+            self._entry(key).merge(stats)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize all sketches for cross-worker merging"""
+        return {
+            "entries": [
+                {"channel": channel, "campaign_id": campaign_id, **stats.to_dict()}
+                for (channel, campaign_id), stats in self._stats.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReachTracker":
+        tracker = cls()
+        for item in data.get("entries", []):
+            stats = ReachStats.from_dict(item)
+            tracker.precision = stats.users.precision
+            tracker._stats[(item["channel"], item["campaign_id"])] = stats
+        return tracker
+
+    def _entry(self, key: Tuple[str, str]) -> ReachStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = ReachStats(self.precision)
+            self._stats[key] = stats
+        return stats
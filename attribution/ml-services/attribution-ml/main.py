@@ -15,7 +15,7 @@ Date: 2025-10-23
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 import asyncio
 import logging
@@ -39,6 +39,11 @@ from schemas import (
     AttributionModelComparison
 )
 
+# Import traffic analytics
+from data.conversion_paths import ConversionPathAnalytics, ALL
+from data.reach import ReachTracker
+from utils.recent_ids import RecentIdSet
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -73,6 +78,21 @@ linear_attributor = LinearAttributor()
 time_decay_attributor = TimeDecayAttributor()
 position_based_attributor = PositionBasedAttributor()
 
+# Streaming analytics fed by attribution traffic
+conversion_path_analytics = ConversionPathAnalytics()
+reach_tracker = ReachTracker()
+# Conversions already fed to the analytics, so /compare followed by a
+# per-model call for the same conversion_id is counted once
+recorded_conversions = RecentIdSet(capacity=100_000)
+
+
+def record_attribution_traffic(request: AttributionRequest):
+    """Feed an attribution request into the streaming analytics, once per conversion_id"""
+    if not recorded_conversions.add(request.conversion_id):
+        return
+    conversion_path_analytics.record(request)
+    reach_tracker.record(request)
+
 # ============================================================================
 # Health & Status Endpoints
 # ============================================================================
@@ -112,6 +132,7 @@ async def calculate_first_touch_attribution(request: AttributionRequest):
         result = await first_touch_attributor.calculate(request)
 
     attribution_calculations.labels(model='first_touch').inc()
+    record_attribution_traffic(request)
     return result
 
 @app.post("/api/attribution/last-touch", response_model=AttributionResponse)
@@ -123,6 +144,7 @@ async def calculate_last_touch_attribution(request: AttributionRequest):
         result = await last_touch_attributor.calculate(request)
 
     attribution_calculations.labels(model='last_touch').inc()
+    record_attribution_traffic(request)
     return result
 
 @app.post("/api/attribution/linear", response_model=AttributionResponse)
@@ -134,6 +156,7 @@ async def calculate_linear_attribution(request: AttributionRequest):
         result = await linear_attributor.calculate(request)
 
     attribution_calculations.labels(model='linear').inc()
+    record_attribution_traffic(request)
     return result
 
 @app.post("/api/attribution/time-decay", response_model=AttributionResponse)
@@ -145,6 +168,7 @@ async def calculate_time_decay_attribution(request: AttributionRequest):
         result = await time_decay_attributor.calculate(request)
 
     attribution_calculations.labels(model='time_decay').inc()
+    record_attribution_traffic(request)
     return result
 
 @app.post("/api/attribution/position-based", response_model=AttributionResponse)
@@ -156,6 +180,7 @@ async def calculate_position_based_attribution(request: AttributionRequest):
         result = await position_based_attributor.calculate(request)
 
     attribution_calculations.labels(model='position_based').inc()
+    record_attribution_traffic(request)
     return result
 
 @app.post("/api/attribution/compare", response_model=AttributionModelComparison)
@@ -173,6 +198,7 @@ async def compare_attribution_models(request: AttributionRequest):
         results['position_based'] = await position_based_attributor.calculate(request)
 
     attribution_calculations.labels(model='comparison').inc()
+    record_attribution_traffic(request)
 
     return AttributionModelComparison(
         conversion_id=request.conversion_id,
@@ -181,6 +207,61 @@ async def compare_attribution_models(request: AttributionRequest):
         comparison_timestamp=datetime.utcnow()
     )
 
+# ============================================================================
+# Traffic Analytics Endpoints
+# ============================================================================
+
+@app.get("/api/attribution/analytics/conversion-paths")
+async def get_conversion_path_distributions(channel: str = ALL, conversion_type: str = ALL,
+                                            include_buckets: bool = False):
+    """Path-length and time-to-convert distributions for a channel/conversion type"""
+    api_requests.labels(endpoint='/attribution/analytics/conversion-paths', method='GET').inc()
+
+    distributions = conversion_path_analytics.get(channel, conversion_type)
+    if distributions is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No conversions recorded for channel={channel}, conversion_type={conversion_type}"
+        )
+
+    return {
+        "channel": channel,
+        "conversion_type": conversion_type,
+        **distributions.summary(include_buckets=include_buckets)
+    }
+
+@app.get("/api/attribution/analytics/conversion-paths/slices")
+async def list_conversion_path_slices():
+    """List recorded channel/conversion type slices"""
+    api_requests.labels(endpoint='/attribution/analytics/conversion-paths/slices', method='GET').inc()
+
+    return {"slices": conversion_path_analytics.slices()}
+
+@app.get("/api/attribution/analytics/conversion-paths/snapshot")
+async def get_conversion_path_snapshot():
+    """Raw histogram state for merging across workers"""
+    api_requests.labels(endpoint='/attribution/analytics/conversion-paths/snapshot', method='GET').inc()
+
+    return conversion_path_analytics.to_dict()
+
+@app.get("/api/attribution/analytics/reach")
+async def get_distinct_reach(channel: Optional[str] = None, campaign_id: Optional[str] = None):
+    """Approximate distinct users touched and converters per channel/campaign"""
+    api_requests.labels(endpoint='/attribution/analytics/reach', method='GET').inc()
+
+    return {
+        "channel": channel,
+        "campaign_id": campaign_id,
+        "reach": reach_tracker.query(channel, campaign_id)
+    }
+
+@app.get("/api/attribution/analytics/reach/snapshot")
+async def get_distinct_reach_snapshot():
+    """Raw HyperLogLog registers for merging across workers"""
+    api_requests.labels(endpoint='/attribution/analytics/reach/snapshot', method='GET').inc()
+
+    return reach_tracker.to_dict()
+
 # ============================================================================
 # Startup & Shutdown Events
 # ============================================================================
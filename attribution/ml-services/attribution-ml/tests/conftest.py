@@ -0,0 +1,53 @@
+"""
+Test configuration and fixtures for Attribution ML Service
+UnMoGrowP Attribution Platform
+
+Provides shared test fixtures and mock attribution requests.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+# Make service modules importable
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from schemas.attribution import AttributionRequest, TouchpointData
+
+
+# =============================================================================
+# Mock Data Fixtures
+# =============================================================================
+
+@pytest.fixture
+def make_attribution_request():
+    """Factory for attribution requests with touchpoints N hours before conversion"""
+    def _make(hours_before, channels=None, user_id="user_12345",
+              conversion_type="purchase", campaign_id="campaign_1"):
+        conversion_timestamp = datetime(2025, 10, 23, 12, 0, 0)
+        channels = channels or ["paid_search"] * len(hours_before)
+        touchpoints = [
+            TouchpointData(
+                touchpoint_id=f"tp_{i}",
+                timestamp=conversion_timestamp - timedelta(hours=hours),
+                channel=channel,
+                campaign_id=campaign_id,
+                source="google",
+                medium="cpc",
+                user_id=user_id,
+                session_id=f"session_{i}",
+                interaction_type="click"
+            )
+            for i, (hours, channel) in enumerate(zip(hours_before, channels))
+        ]
+        return AttributionRequest(
+            conversion_id=f"conv_{user_id}",
+            user_id=user_id,
+            touchpoints=touchpoints,
+            conversion_timestamp=conversion_timestamp,
+            conversion_value=100.0,
+            conversion_type=conversion_type
+        )
+
+    return _make
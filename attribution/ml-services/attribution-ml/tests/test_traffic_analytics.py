@@ -0,0 +1,229 @@
+"""
+Unit tests for streaming traffic analytics
+UnMoGrowP Attribution Platform - Attribution ML Service
+
+Tests for:
+- LogHistogram
+- ConversionPathAnalytics
+- HyperLogLog
+- ReachTracker
+- RecentIdSet / endpoint recording
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils.histograms import LogHistogram
+from utils.hyperloglog import HyperLogLog
+from data.conversion_paths import ConversionPathAnalytics
+from data.reach import ReachTracker
+from utils.recent_ids import RecentIdSet
+
+
+# =============================================================================
+# LogHistogram Tests
+# =============================================================================
+
+class TestLogHistogram:
+    """Test suite for LogHistogram"""
+
+    def test_quantiles_within_bucket_resolution(self):
+        """Quantile estimates stay within one log bucket of the true value"""
+        histogram = LogHistogram(min_value=1.0, max_value=1e6, buckets_per_decade=10)
+        for value in range(1, 10001):
+            histogram.record(value)
+
+        assert histogram.count == 10000
+        assert histogram.mean() == pytest.approx(5000.5)
+        assert histogram.quantile(0.5) == pytest.approx(5000, rel=0.3)
+        assert histogram.quantile(0.0) == 1
+        assert histogram.quantile(1.0) == 10000
+
+    def test_underflow_and_overflow(self):
+        """Values outside the layout land in the edge buckets"""
+        histogram = LogHistogram(min_value=1.0, max_value=100.0)
+        histogram.record(0)
+        histogram.record(1000)
+
+        assert histogram.counts[0] == 1
+        assert histogram.counts[-1] == 1
+
+    def test_merge_matches_single_histogram(self):
+        """Merging per-worker histograms equals recording everything in one"""
+        combined = LogHistogram()
+        worker_a = LogHistogram()
+        worker_b = LogHistogram()
+        for value in range(1, 500):
+            combined.record(value)
+            (worker_a if value % 2 else worker_b).record(value)
+
+        merged = LogHistogram.from_dict(worker_a.to_dict())
+        merged.merge(LogHistogram.from_dict(worker_b.to_dict()))
+
+        assert merged.counts == combined.counts
+        assert merged.count == combined.count
+        assert merged.quantile(0.9) == combined.quantile(0.9)
+
+    def test_merge_rejects_different_layout(self):
+        """Histograms with different buckets cannot be merged"""
+        with pytest.raises(ValueError):
+            LogHistogram(buckets_per_decade=10).merge(LogHistogram(buckets_per_decade=5))
+
+
+# =============================================================================
+# ConversionPathAnalytics Tests
+# =============================================================================
+
+class TestConversionPathAnalytics:
+    """Test suite for ConversionPathAnalytics"""
+
+    def test_records_channel_and_rollup_slices(self, make_attribution_request):
+        """Conversions are counted per channel, per conversion type and overall"""
+        analytics = ConversionPathAnalytics()
+        analytics.record(make_attribution_request([48, 24, 1], ["email", "paid_search", "email"]))
+        analytics.record(make_attribution_request([2], ["email"], conversion_type="signup"))
+
+        assert analytics.get("email", "purchase").path_length.count == 1
+        assert analytics.get("email", "all").path_length.count == 2
+        assert analytics.get("all", "signup").path_length.count == 1
+        assert analytics.get("all", "all").path_length.count == 2
+        assert analytics.get("paid_search", "signup") is None
+
+    def test_path_length_and_time_to_convert(self, make_attribution_request):
+        """Path length counts touchpoints, time is measured from first touch"""
+        analytics = ConversionPathAnalytics()
+        analytics.record(make_attribution_request([48, 24, 1]))
+
+        distributions = analytics.get()
+        assert distributions.path_length.max_seen == 3
+        assert distributions.time_to_convert.max_seen == 48 * 3600
+
+    def test_snapshot_round_trip(self, make_attribution_request):
+        """Serialized state merges back into an equivalent analytics object"""
+        analytics = ConversionPathAnalytics()
+        analytics.record(make_attribution_request([5, 3]))
+
+        merged = ConversionPathAnalytics()
+        merged.merge(ConversionPathAnalytics.from_dict(analytics.to_dict()))
+        merged.merge(ConversionPathAnalytics.from_dict(analytics.to_dict()))
+
+        assert merged.get().path_length.count == 2
+        assert merged.slices() == [
+            {"channel": channel, "conversion_type": conversion_type, "conversions": 2}
+            for channel, conversion_type in sorted(
+                [("all", "all"), ("all", "purchase"),
+                 ("paid_search", "all"), ("paid_search", "purchase")]
+            )
+        ]
+
+
+# =============================================================================
+# HyperLogLog & ReachTracker Tests
+# =============================================================================
+
+class TestHyperLogLog:
+    """Test suite for HyperLogLog"""
+
+    def test_estimate_within_error_bound(self):
+        """Estimates stay within a few standard errors of the true count"""
+        sketch = HyperLogLog(precision=12)
+        for i in range(50000):
+            sketch.add(f"user_{i}")
+            sketch.add(f"user_{i}")  # duplicates must not inflate the count
+
+        assert sketch.count() == pytest.approx(50000, rel=0.05)
+
+    def test_small_cardinality_is_exact_enough(self):
+        """Linear counting keeps small counts accurate"""
+        sketch = HyperLogLog()
+        for i in range(10):
+            sketch.add(f"user_{i}")
+
+        assert sketch.count() == 10
+
+    def test_merge_is_union(self):
+        """Merging sketches estimates the size of the union"""
+        sketch_a = HyperLogLog()
+        sketch_b = HyperLogLog()
+        for i in range(3000):
+            sketch_a.add(f"user_{i}")
+        for i in range(2000, 5000):
+            sketch_b.add(f"user_{i}")
+
+        merged = HyperLogLog.from_dict(sketch_a.to_dict())
+        merged.merge(sketch_b)
+
+        assert merged.count() == pytest.approx(5000, rel=0.05)
+
+
+class TestReachTracker:
+    """Test suite for ReachTracker"""
+
+    def test_reach_per_campaign_and_channel_rollup(self, make_attribution_request):
+        """Distinct users, converters and frequency per channel and campaign"""
+        tracker = ReachTracker()
+        tracker.record(make_attribution_request([3, 2, 1], ["email"] * 3, user_id="u1"))
+        tracker.record(make_attribution_request([1], ["email"], user_id="u2", campaign_id="campaign_2"))
+
+        rows = {(row["channel"], row["campaign_id"]): row for row in tracker.query(channel="email")}
+
+        assert rows[("email", "campaign_1")]["distinct_users"] == 1
+        assert rows[("email", "campaign_1")]["avg_frequency"] == 3.0
+        assert rows[("email", "all")]["distinct_users"] == 2
+        assert rows[("email", "all")]["distinct_converters"] == 2
+        assert rows[("email", "all")]["touches"] == 4
+
+    def test_snapshot_merge(self, make_attribution_request):
+        """Worker snapshots merge into combined reach"""
+        worker_a = ReachTracker()
+        worker_b = ReachTracker()
+        worker_a.record(make_attribution_request([1], user_id="u1"))
+        worker_b.record(make_attribution_request([1], user_id="u2"))
+
+        merged = ReachTracker.from_dict(worker_a.to_dict())
+        merged.merge(ReachTracker.from_dict(worker_b.to_dict()))
+
+        assert merged.query("paid_search", "all")[0]["distinct_users"] == 2
+
+    def test_touches_after_conversion_are_ignored(self, make_attribution_request):
+        """Only touchpoints up to the conversion count, as in ConversionPathAnalytics"""
+        tracker = ReachTracker()
+        tracker.record(make_attribution_request([2, 1, -1], ["email", "email", "display"]))
+
+        assert tracker.query("email", "all")[0]["touches"] == 2
+        assert tracker.query("display") == []
+
+
+# =============================================================================
+# Endpoint Recording Tests
+# =============================================================================
+
+class TestTrafficRecording:
+    """Test suite for analytics fed from the attribution endpoints"""
+
+    def test_conversion_sent_to_several_endpoints_is_counted_once(self, make_attribution_request):
+        """/compare followed by a per-model call records the conversion once"""
+        main.conversion_path_analytics = ConversionPathAnalytics()
+        main.reach_tracker = ReachTracker()
+        main.recorded_conversions = RecentIdSet(capacity=10)
+        client = TestClient(main.app)
+        body = make_attribution_request([48, 24, 1]).model_dump(mode="json")
+
+        assert client.post("/api/attribution/compare", json=body).status_code == 200
+        assert client.post("/api/attribution/linear", json=body).status_code == 200
+
+        distributions = main.conversion_path_analytics.get()
+        assert distributions.path_length.count == 1
+        assert distributions.time_to_convert.count == 1
+        reach = main.reach_tracker.query("paid_search", "all")[0]
+        assert (reach["touches"], reach["conversions"]) == (3, 1)
+
+    def test_recent_id_set_is_bounded(self):
+        """The oldest IDs are forgotten past capacity"""
+        recent = RecentIdSet(capacity=2)
+
+        assert recent.add("a") and recent.add("b")
+        assert not recent.add("a")
+        assert recent.add("c")
+        assert "b" not in recent and len(recent) == 2
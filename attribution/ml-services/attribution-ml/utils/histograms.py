@@ -0,0 +1,164 @@
+"""
+Log-Scale Histograms
+UnMoGrowP Attribution Platform - Attribution ML Service
+
+Fixed-bucket, log-scale streaming histograms. Bucket boundaries depend only
+on the histogram layout, so histograms recorded by different workers can be
+merged by adding their bucket counts.
+"""
+
+import math
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class LogHistogram:
+    """Streaming histogram with fixed log-scale buckets"""
+
+    def __init__(self, min_value: float = 1.0, max_value: float = 1e8,
+                 buckets_per_decade: int = 10):
+        if min_value <= 0 or max_value <= min_value:
+            raise ValueError("LogHistogram requires 0 < min_value < max_value")
+        if buckets_per_decade < 1:
+            raise ValueError("buckets_per_decade must be at least 1")
+
+        self.min_value = float(min_value)
+        self.max_value = float(max_value)
+        self.buckets_per_decade = int(buckets_per_decade)
+        self.num_buckets = int(math.ceil(
+            math.log10(self.max_value / self.min_value) * self.buckets_per_decade
+        ))
+
+        # Bucket 0 is underflow (< min_value), last bucket is overflow (>= max_value)
+        self.counts: List[int] = [0] * (self.num_buckets + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min_seen: Optional[float] = None
+        self.max_seen: Optional[float] = None
+
+    @property
+    def layout(self) -> Dict[str, Any]:
+        """Parameters that define the bucket boundaries"""
+        return {
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "buckets_per_decade": self.buckets_per_decade
+        }
+
+    def record(self, value: float, count: int = 1):
+        """Record a value (optionally several times)"""
+        self.counts[self._bucket_index(value)] += count
+        self.count += count
+        self.total += value * count
+        self.min_seen = value if self.min_seen is None else min(self.min_seen, value)
+        self.max_seen = value if self.max_seen is None else max(self.max_seen, value)
+
+    def merge(self, other: "LogHistogram"):
+        """Add the counts of another histogram with the same layout"""
+        if other.layout != self.layout:
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+
+        for i, bucket_count in enumerate(other.counts):
+            self.counts[i] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        if other.min_seen is not None:
+            self.min_seen = other.min_seen if self.min_seen is None else min(self.min_seen, other.min_seen)
+        if other.max_seen is not None:
+            self.max_seen = other.max_seen if self.max_seen is None else max(self.max_seen, other.max_seen)
+
+    def mean(self) -> Optional[float]:
+        """Exact mean of recorded values"""
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile (geometric midpoint of the matching bucket)"""
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("Quantile must be between 0 and 1")
+        if not self.count:
+            return None
+        if q == 0.0:
+            return self.min_seen
+
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if bucket_count and cumulative >= rank:
+                lower, upper = self.bucket_bounds(index)
+                estimate = math.sqrt(lower * upper) if lower > 0 else upper
+                # Exact extremes are tracked, so clamp the estimate into them
+                return min(max(estimate, self.min_seen), self.max_seen)
+
+        return self.max_seen
+
+    def bucket_bounds(self, index: int) -> Tuple[float, float]:
+        """Lower and upper boundary of a bucket"""
+        if index == 0:
+            return 0.0, self.min_value
+        if index > self.num_buckets:
+            return self.max_value, math.inf
+
+        lower = self.min_value * 10 ** ((index - 1) / self.buckets_per_decade)
+        upper = self.min_value * 10 ** (index / self.buckets_per_decade)
+        return lower, min(upper, self.max_value)
+
+    def summary(self, quantiles: tuple = (0.5, 0.75, 0.9, 0.95, 0.99),
+                include_buckets: bool = False) -> Dict[str, Any]:
+        """Summary statistics for API responses"""
+        summary = {
+            "count": self.count,
+            "mean": self.mean(),
+            "min": self.min_seen,
+            "max": self.max_seen,
+            "quantiles": {f"p{round(q * 100):g}": self.quantile(q) for q in quantiles}
+        }
+
+        if include_buckets:
+            buckets = []
+            for index, bucket_count in enumerate(self.counts):
+                if not bucket_count:
+                    continue
+                lower, upper = self.bucket_bounds(index)
+                buckets.append({
+                    "lower": lower,
+                    "upper": upper if math.isfinite(upper) else None,
+                    "count": bucket_count
+                })
+            summary["buckets"] = buckets
+
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize state so it can be merged by another worker"""
+        return {
+            "layout": self.layout,
+            "counts": list(self.counts),
+            "count": self.count,
+            "total": self.total,
+            "min": self.min_seen,
+            "max": self.max_seen
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LogHistogram":
+        """Rebuild a histogram serialized with to_dict()"""
+        histogram = cls(**data["layout"])
+        if len(data["counts"]) != len(histogram.counts):
+            raise ValueError("Bucket counts do not match histogram layout")
+
+        histogram.counts = [int(c) for c in data["counts"]]
+        histogram.count = int(data["count"])
+        histogram.total = float(data["total"])
+        histogram.min_seen = data.get("min")
+        histogram.max_seen = data.get("max")
+        return histogram
+
+    def _bucket_index(self, value: float) -> int:
+        """Map a value onto its bucket"""
+        if value < self.min_value:
+            return 0
+        if value >= self.max_value:
+            return self.num_buckets + 1
+
+        index = int(math.log10(value / self.min_value) * self.buckets_per_decade) + 1
+        return min(index, self.num_buckets)
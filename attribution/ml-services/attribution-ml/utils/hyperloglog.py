@@ -0,0 +1,95 @@
+"""
+HyperLogLog Sketch
+UnMoGrowP Attribution Platform - Attribution ML Service
+
+Mergeable approximate distinct counting. A sketch with precision p uses
+2^p one-byte registers (4 KB at the default p=12, ~1.6% standard error)
+regardless of how many distinct items it has seen.
+"""
+
+import base64
+import hashlib
+import math
+from typing import Dict, Any, Optional
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter"""
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = bytearray(self.num_registers)
+        self._cached_estimate: Optional[int] = None
+
+    def add(self, item: str) -> bool:
+        """Add an item, returning True if a register changed"""
+        hashed = int.from_bytes(
+            hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        remaining = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - remaining.bit_length() + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._cached_estimate = None
+            return True
+        return False
+
+    def count(self) -> int:
+        """Estimated number of distinct items"""
+        if self._cached_estimate is None:
+            self._cached_estimate = self._estimate()
+        return self._cached_estimate
+
+    def merge(self, other: "HyperLogLog"):
+        """Union with another sketch of the same precision"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        self._cached_estimate = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize registers for cross-worker merging"""
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(bytes(self.registers)).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        """Rebuild a sketch serialized with to_dict()"""
+        sketch = cls(precision=int(data["precision"]))
+        registers = base64.b64decode(data["registers"])
+        if len(registers) != sketch.num_registers:
+            raise ValueError("Register count does not match sketch precision")
+        sketch.registers = bytearray(registers)
+        return sketch
+
+    def _estimate(self) -> int:
+        m = self.num_registers
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+
+        harmonic_sum = 0.0
+        zero_registers = 0
+        for register in self.registers:
+            harmonic_sum += 2.0 ** -register
+            if register == 0:
+                zero_registers += 1
+
+        estimate = alpha * m * m / harmonic_sum
+
+        # Small-range correction: linear counting while registers are sparse
+        if estimate <= 2.5 * m and zero_registers:
+            estimate = m * math.log(m / zero_registers)
+
+        return int(round(estimate))
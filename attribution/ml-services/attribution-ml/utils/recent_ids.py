@@ -0,0 +1,35 @@
+"""
+Recent ID Set
+UnMoGrowP Attribution Platform - Attribution ML Service
+
+Bounded set of recently seen IDs with least-recently-seen eviction, used
+to count each conversion once in the streaming analytics when a client
+sends it to several attribution endpoints (compare, then a model).
+"""
+
+from collections import OrderedDict
+
+
+class RecentIdSet:
+    """Last `capacity` distinct IDs"""
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._ids
+
+    def add(self, item: str) -> bool:
+        """Remember an ID; False if it was already among the recent ones"""
+        if item in self._ids:
+            self._ids.move_to_end(item)
+            return False
+
+        self._ids[item] = None
+        if len(self._ids) > self.capacity:
+            self._ids.popitem(last=False)
+        return True
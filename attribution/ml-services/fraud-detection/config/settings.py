@@ -0,0 +1,130 @@
+"""
+Fraud Detection Settings
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Runtime configuration read from environment variables.
+"""
+
+import os
+
+# Micro-batching for /api/fraud/detect
+BATCH_MAX_SIZE = int(os.getenv("FRAUD_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_DELAY_MS = float(os.getenv("FRAUD_BATCH_MAX_DELAY_MS", "2.0"))
+
+# Scoring cascade: rule scores inside [lower, upper] go to the model, the
+# rest are decided by the rules stage (the default sends everything on)
+CASCADE_LOWER = float(os.getenv("FRAUD_CASCADE_LOWER", "0.0"))
+CASCADE_UPPER = float(os.getenv("FRAUD_CASCADE_UPPER", "1.0"))
+
+# Stop running anomaly checks once one reaches the critical severity
+ANOMALY_SHORT_CIRCUIT = os.getenv("FRAUD_ANOMALY_SHORT_CIRCUIT", "false").lower() in ("1", "true", "yes")
+
+# Streaming mean/covariance of behavior features (population and per
+# `behavior_data[segment_field]`) for Mahalanobis anomaly scoring, refit in
+# the background; flags requests below the chi-square tail probability ALPHA
+BEHAVIOR_COVARIANCE_SEGMENT_FIELD = os.getenv("FRAUD_BEHAVIOR_COVARIANCE_SEGMENT_FIELD", "segment")
+BEHAVIOR_COVARIANCE_MIN_SAMPLES = int(os.getenv("FRAUD_BEHAVIOR_COVARIANCE_MIN_SAMPLES", "100"))
+BEHAVIOR_COVARIANCE_ALPHA = float(os.getenv("FRAUD_BEHAVIOR_COVARIANCE_ALPHA", "0.001"))
+BEHAVIOR_COVARIANCE_HALF_LIFE_SECONDS = float(os.getenv("FRAUD_BEHAVIOR_COVARIANCE_HALF_LIFE_SECONDS", str(7 * 86400)))
+BEHAVIOR_COVARIANCE_REFIT_INTERVAL_SECONDS = float(os.getenv("FRAUD_BEHAVIOR_COVARIANCE_REFIT_INTERVAL_SECONDS", "60"))
+
+# Idle-key sweeps of the per-key state stores run in the background every
+# interval, releasing CHUNK keys at a time between other requests
+STATE_SWEEP_INTERVAL_SECONDS = float(os.getenv("FRAUD_STATE_SWEEP_INTERVAL_SECONDS", "60"))
+STATE_SWEEP_CHUNK = int(os.getenv("FRAUD_STATE_SWEEP_CHUNK", "10000"))
+
+# Server-side velocity counters (~230 bytes per key)
+VELOCITY_CAPACITY = int(os.getenv("FRAUD_VELOCITY_CAPACITY", "1000000"))
+VELOCITY_IDLE_TTL_SECONDS = int(os.getenv("FRAUD_VELOCITY_IDLE_TTL_SECONDS", str(48 * 3600)))
+
+# Per-user behavioral baselines (~68 bytes per user)
+BASELINE_CAPACITY = int(os.getenv("FRAUD_BASELINE_CAPACITY", "1000000"))
+BASELINE_IDLE_TTL_SECONDS = int(os.getenv("FRAUD_BASELINE_IDLE_TTL_SECONDS", str(90 * 86400)))
+
+# Per-user hour-of-week activity histograms for time_pattern anomalies
+# (~340 bytes per user seen); flags hours whose likelihood relative to an
+# average hour is below UNUSUAL_HOUR_RATIO once a user has MIN_TRANSACTIONS
+ACTIVITY_PROFILE_CAPACITY = int(os.getenv("FRAUD_ACTIVITY_PROFILE_CAPACITY", "1000000"))
+ACTIVITY_PROFILE_IDLE_TTL_SECONDS = int(os.getenv("FRAUD_ACTIVITY_PROFILE_IDLE_TTL_SECONDS", str(90 * 86400)))
+ACTIVITY_PROFILE_MIN_TRANSACTIONS = int(os.getenv("FRAUD_ACTIVITY_PROFILE_MIN_TRANSACTIONS", "20"))
+ACTIVITY_UNUSUAL_HOUR_RATIO = float(os.getenv("FRAUD_ACTIVITY_UNUSUAL_HOUR_RATIO", "0.1"))
+
+# User/device/IP/card link graph for network risk (~52 bytes per node,
+# two generations)
+LINK_GRAPH_CAPACITY = int(os.getenv("FRAUD_LINK_GRAPH_CAPACITY", "1000000"))
+LINK_GRAPH_MAX_ENTITY_MERGES = int(os.getenv("FRAUD_LINK_GRAPH_MAX_ENTITY_MERGES", "50"))
+
+# IP geolocation (CSV: start_ip,end_ip,country_code,city,latitude,longitude)
+# and per-user last location for impossible-travel detection (~64 bytes per user)
+GEOIP_CSV_PATH = os.getenv("FRAUD_GEOIP_CSV_PATH")
+LOCATION_CAPACITY = int(os.getenv("FRAUD_LOCATION_CAPACITY", "1000000"))
+LOCATION_IDLE_TTL_SECONDS = int(os.getenv("FRAUD_LOCATION_IDLE_TTL_SECONDS", str(30 * 86400)))
+IMPOSSIBLE_TRAVEL_SPEED_KMH = float(os.getenv("FRAUD_IMPOSSIBLE_TRAVEL_SPEED_KMH", "900"))
+IMPOSSIBLE_TRAVEL_MIN_DISTANCE_KM = float(os.getenv("FRAUD_IMPOSSIBLE_TRAVEL_MIN_DISTANCE_KM", "500"))
+
+# MinHash/LSH index of device attribute sets for near-duplicate devices
+# across accounts (~300 bytes per device plus ~40 per user)
+DEVICE_INDEX_CAPACITY = int(os.getenv("FRAUD_DEVICE_INDEX_CAPACITY", "1000000"))
+DEVICE_INDEX_IDLE_TTL_SECONDS = int(os.getenv("FRAUD_DEVICE_INDEX_IDLE_TTL_SECONDS", str(90 * 86400)))
+DEVICE_SIMILARITY_THRESHOLD = float(os.getenv("FRAUD_DEVICE_SIMILARITY_THRESHOLD", "0.75"))
+
+# Signed feature hashing of merchant_id, email_domain, currency and device
+# model into this many extra model columns (0 disables; models must be
+# trained with the same width and fields)
+HASHED_FEATURE_WIDTH = int(os.getenv("FRAUD_HASHED_FEATURE_WIDTH", "0"))
+HASHED_FEATURE_FIELDS = os.getenv("FRAUD_HASHED_FEATURE_FIELDS", "merchant_id,email_domain,currency,device_model")
+
+# Count-Min sketch merchant/category profiles (width x depth x 3 float64
+# counters, ~6 MB by default) with exponential decay, plus top-k merchants
+MERCHANT_SKETCH_WIDTH = int(os.getenv("FRAUD_MERCHANT_SKETCH_WIDTH", "65536"))
+MERCHANT_SKETCH_DEPTH = int(os.getenv("FRAUD_MERCHANT_SKETCH_DEPTH", "4"))
+MERCHANT_HEAVY_HITTERS = int(os.getenv("FRAUD_MERCHANT_HEAVY_HITTERS", "1000"))
+MERCHANT_HALF_LIFE_SECONDS = float(os.getenv("FRAUD_MERCHANT_HALF_LIFE_SECONDS", str(7 * 86400)))
+
+# Risk assessment cache, invalidated by detect/anomaly activity per user
+RISK_CACHE_MAX_ENTRIES = int(os.getenv("FRAUD_RISK_CACHE_MAX_ENTRIES", "100000"))
+RISK_CACHE_TTL_SECONDS = float(os.getenv("FRAUD_RISK_CACHE_TTL_SECONDS", "300"))
+
+# Idempotent detect: responses kept per transaction_id for gateway retries,
+# concurrent duplicates share one scoring (TTL 0 disables)
+DECISION_CACHE_MAX_ENTRIES = int(os.getenv("FRAUD_DECISION_CACHE_MAX_ENTRIES", "100000"))
+DECISION_CACHE_TTL_SECONDS = float(os.getenv("FRAUD_DECISION_CACHE_TTL_SECONDS", "900"))
+
+# Bloom filter blocklists (.bloom files are memory-mapped; text files are
+# built in memory), reloaded when the file changes
+IP_BLOCKLIST_PATH = os.getenv("FRAUD_IP_BLOCKLIST_PATH")
+DEVICE_BLOCKLIST_PATH = os.getenv("FRAUD_DEVICE_BLOCKLIST_PATH")
+EMAIL_DOMAIN_BLOCKLIST_PATH = os.getenv("FRAUD_EMAIL_DOMAIN_BLOCKLIST_PATH")
+BLOCKLIST_RELOAD_INTERVAL_SECONDS = float(os.getenv("FRAUD_BLOCKLIST_RELOAD_INTERVAL_SECONDS", "30"))
+
+# Declarative fraud rules (JSON, see models/rule_engine.py), recompiled when
+# the file changes; built-in defaults when unset
+RULES_PATH = os.getenv("FRAUD_RULES_PATH")
+RULES_RELOAD_INTERVAL_SECONDS = float(os.getenv("FRAUD_RULES_RELOAD_INTERVAL_SECONDS", "30"))
+
+# Shadow scoring: challenger models ("name=path,name2=path2") scored off the
+# request path from a bounded queue of detect batches
+CHALLENGER_MODEL_PATHS = os.getenv("FRAUD_CHALLENGER_MODEL_PATHS", "")
+SHADOW_QUEUE_SIZE = int(os.getenv("FRAUD_SHADOW_QUEUE_SIZE", "1000"))
+
+# Model artifacts (.joblib/.pkl, .npy or a directory of .npy weights);
+# arrays are memory-mapped read-only so uvicorn workers share one copy
+TRANSACTION_MODEL_PATH = os.getenv("FRAUD_TRANSACTION_MODEL_PATH")
+ANOMALY_MODEL_PATH = os.getenv("FRAUD_ANOMALY_MODEL_PATH")
+RISK_MODEL_PATH = os.getenv("FRAUD_RISK_MODEL_PATH")
+
+# Calibrated risk/severity thresholds written by `python -m utils.calibration`,
+# applied at startup; the built-in constants are used when unset
+THRESHOLDS_PATH = os.getenv("FRAUD_THRESHOLDS_PATH")
+
+# Record POST requests to a gzip JSON-lines file for `python -m utils.replay`
+# ("{pid}" is replaced per worker process); disabled when unset
+REPLAY_RECORD_PATH = os.getenv("FRAUD_REPLAY_RECORD_PATH")
+
+# Append-only audit log of detect decisions (segment directory, shared by
+# workers); fsynced in groups every N ms or N records, disabled when unset
+AUDIT_LOG_DIR = os.getenv("FRAUD_AUDIT_LOG_DIR")
+AUDIT_COMMIT_INTERVAL_MS = float(os.getenv("FRAUD_AUDIT_COMMIT_INTERVAL_MS", "10"))
+AUDIT_COMMIT_RECORDS = int(os.getenv("FRAUD_AUDIT_COMMIT_RECORDS", "256"))
+AUDIT_SEGMENT_BYTES = int(os.getenv("FRAUD_AUDIT_SEGMENT_BYTES", str(64 << 20)))
+AUDIT_QUEUE_SIZE = int(os.getenv("FRAUD_AUDIT_QUEUE_SIZE", "100000"))
@@ -0,0 +1,123 @@
+"""
+Behavioral Baselines
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Per-user streaming baselines maintained from transaction traffic in constant
+memory per user (~68 bytes including the key index):
+- Welford mean/variance and EWMA of transaction amount
+- EWMA of the inter-arrival time (transaction frequency)
+Typical activity times are kept per hour of the week by
+data.activity_profiles.
+"""
+
+import math
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Optional
+from schemas.fraud import TransactionData
+from utils.key_index import KeyedStateStore
+
+SECONDS_PER_DAY = 86400.0
+
+
+@dataclass
+class UserBaseline:
+    """Snapshot of a user's behavioral baseline"""
+    transaction_count: int
+    amount_mean: float
+    amount_std: float
+    amount_ewma: float
+    interarrival_ewma_seconds: Optional[float]
+
+    @property
+    def expected_daily_transactions(self) -> Optional[float]:
+        if not self.interarrival_ewma_seconds:
+            return None
+        return SECONDS_PER_DAY / self.interarrival_ewma_seconds
+
+    def amount_z_score(self, amount: float) -> Optional[float]:
+        """Standard score of an amount against the user's history"""
+        if self.transaction_count < 2:
+            return None
+        # Floor the deviation so users with near-constant amounts do not explode
+        std = max(self.amount_std, 0.05 * abs(self.amount_mean), 1.0)
+        return (amount - self.amount_mean) / std
+
+    def frequency_z_score(self, transaction_count_24h: float) -> Optional[float]:
+        """Poisson standard score of a 24h transaction count"""
+        expected = self.expected_daily_transactions
+        if expected is None:
+            return None
+        expected = max(expected, 1.0)
+        return (transaction_count_24h - expected) / math.sqrt(expected)
+
+
+class BehaviorBaselineStore(KeyedStateStore):
+    """Streaming per-user amount and frequency baselines"""
+
+    def __init__(self, capacity: int = 1_000_000, idle_ttl_seconds: int = 90 * 86400,
+                 ewma_alpha: float = 0.1, min_samples: int = 5,
+                 sweep_interval: int = 100_000):
+        super().__init__(capacity, idle_ttl_seconds, sweep_interval)
+        self.ewma_alpha = ewma_alpha
+        self.min_samples = min_samples
+
+        self.count = np.zeros(capacity, dtype=np.uint32)
+        self.amount_mean = np.zeros(capacity, dtype=np.float64)
+        self.amount_m2 = np.zeros(capacity, dtype=np.float64)
+        self.amount_ewma = np.zeros(capacity, dtype=np.float32)
+        self.last_timestamp = np.zeros(capacity, dtype=np.float64)
+        self.interarrival_ewma = np.zeros(capacity, dtype=np.float32)
+
+    def update(self, user_id: str, amount: float, timestamp: float):
+        """Fold one transaction into the user's baseline"""
+        key_id, _ = self.touch(user_id, timestamp)
+        alpha = self.ewma_alpha
+        n = int(self.count[key_id]) + 1
+        self.count[key_id] = n
+
+        # Welford running mean/variance of the amount
+        delta = amount - self.amount_mean[key_id]
+        self.amount_mean[key_id] += delta / n
+        self.amount_m2[key_id] += delta * (amount - self.amount_mean[key_id])
+
+        if n == 1:
+            self.amount_ewma[key_id] = amount
+        else:
+            self.amount_ewma[key_id] += alpha * (amount - self.amount_ewma[key_id])
+
+            interarrival = max(timestamp - self.last_timestamp[key_id], 0.0)
+            if n == 2:
+                self.interarrival_ewma[key_id] = interarrival
+            else:
+                self.interarrival_ewma[key_id] += alpha * (interarrival - self.interarrival_ewma[key_id])
+
+        self.last_timestamp[key_id] = max(self.last_timestamp[key_id], timestamp)
+
+    def get(self, user_id: str) -> Optional[UserBaseline]:
+        """User's baseline, or None until enough transactions were seen"""
+        key_id = self.index.lookup(user_id)
+        if key_id < 0 or self.count[key_id] < self.min_samples:
+            return None
+
+        n = int(self.count[key_id])
+        variance = self.amount_m2[key_id] / (n - 1) if n > 1 else 0.0
+
+        return UserBaseline(
+            transaction_count=n,
+            amount_mean=float(self.amount_mean[key_id]),
+            amount_std=math.sqrt(max(variance, 0.0)),
+            amount_ewma=float(self.amount_ewma[key_id]),
+            interarrival_ewma_seconds=float(self.interarrival_ewma[key_id]) or None
+        )
+
+    def update_from_transaction(self, transaction: TransactionData):
+        """Fold a TransactionData into its user's baseline"""
+        timestamp = min(transaction.timestamp.timestamp(), time.time())
+        self.update(transaction.user_id, transaction.amount, timestamp)
+
+    def _clear_state(self, key_ids: np.ndarray):
+        for array in (self.count, self.amount_mean, self.amount_m2, self.amount_ewma,
+                      self.last_timestamp, self.interarrival_ewma):
+            array[key_ids] = 0
@@ -0,0 +1,200 @@
+"""
+Behavior Covariance Model
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Streaming multivariate baseline of the anomaly detector's behavior
+features, for the population and per segment. Each request updates a
+weighted Welford mean and co-moment matrix in O(d²); a background task
+periodically decays the accumulators (exponential forgetting with a
+configurable half-life) and refits the scoring snapshot: the mean and the
+inverse of the ridge-regularized covariance. Requests are scored by their
+squared Mahalanobis distance to the snapshot, also O(d²), and its
+chi-square tail probability with d degrees of freedom. Nothing is
+retrained from history.
+
+Features are log1p-transformed (they are non-negative rates and ratios
+with long right tails), which keeps the Gaussian approximation usable.
+Segments use their own snapshot once they have `min_samples`, otherwise
+the population's; at most `max_segments` segments are tracked.
+"""
+
+import asyncio
+import logging
+import math
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def chi2_sf(x: float, dof: int) -> float:
+    """Chi-square survival function for integer degrees of freedom"""
+    if x <= 0:
+        return 1.0
+    half = x / 2.0
+    if dof % 2 == 0:
+        term, total = 1.0, 1.0
+        for i in range(1, dof // 2):
+            term *= half / i
+            total += term
+        return min(1.0, math.exp(-half) * total)
+    total = math.erfc(math.sqrt(half))
+    for i in range((dof - 1) // 2):
+        total += math.exp(-half + (i + 0.5) * math.log(half) - math.lgamma(i + 1.5))
+    return min(1.0, total)
+
+
+class CovarianceAccumulator:
+    """Weighted Welford mean and co-moment of d-dimensional samples"""
+
+    def __init__(self, dimensions: int):
+        self.weight = 0.0
+        self.samples = 0
+        self.mean = np.zeros(dimensions)
+        self.comoment = np.zeros((dimensions, dimensions))
+
+    def update(self, x: np.ndarray):
+        self.weight += 1.0
+        self.samples += 1
+        delta = x - self.mean
+        self.mean += delta / self.weight
+        self.comoment += np.outer(delta, x - self.mean)
+
+    def decay(self, factor: float):
+        """Down-weight all past samples (the mean is unchanged)"""
+        self.weight *= factor
+        self.comoment *= factor
+
+    def covariance(self) -> np.ndarray:
+        return self.comoment / max(self.weight, 1.0)
+
+
+@dataclass
+class FittedBaseline:
+    """Scoring snapshot of one accumulator"""
+    mean: np.ndarray
+    precision: np.ndarray
+    samples: int
+
+
+@dataclass
+class MultivariateScore:
+    distance_squared: float
+    p_value: float
+    segment: Optional[str]
+    samples: int
+
+
+class BehaviorCovarianceModel:
+    """Population and per-segment streaming Mahalanobis baselines"""
+
+    def __init__(self, features: Sequence[str], segment_field: Optional[str] = "segment",
+                 min_samples: int = 100, max_segments: int = 1000, alpha: float = 1e-3,
+                 half_life_seconds: float = 7 * 86400, refit_interval_seconds: float = 60.0,
+                 ridge: float = 1e-3):
+        self.features = list(features)
+        self.dimensions = len(self.features)
+        self.segment_field = segment_field
+        self.min_samples = min_samples
+        self.max_segments = max_segments
+        self.alpha = alpha
+        self.half_life_seconds = half_life_seconds
+        self.refit_interval_seconds = refit_interval_seconds
+        self.ridge = ridge
+
+        self.population = CovarianceAccumulator(self.dimensions)
+        self.segments: Dict[str, CovarianceAccumulator] = {}
+        # None is the population snapshot
+        self.fitted: Dict[Optional[str], FittedBaseline] = {}
+        self.refits = 0
+        self._refitted_at = time.time()
+        self._refit_task: Optional[asyncio.Task] = None
+
+    def vector(self, features: Dict[str, float]) -> np.ndarray:
+        """Model-space vector of a preprocessed feature dict"""
+        values = np.array([features.get(name, 0.0) for name in self.features], dtype=np.float64)
+        return np.log1p(np.maximum(values, 0.0))
+
+    def segment_of(self, behavior_data: Dict[str, Any]) -> Optional[str]:
+        if not self.segment_field:
+            return None
+        segment = behavior_data.get(self.segment_field)
+        return str(segment) if segment is not None else None
+
+    def score(self, x: np.ndarray, segment: Optional[str] = None) -> Optional[MultivariateScore]:
+        """Mahalanobis score against the segment's snapshot, else the population's"""
+        fitted = self.fitted.get(segment) if segment is not None else None
+        if fitted is None:
+            segment, fitted = None, self.fitted.get(None)
+        if fitted is None:
+            return None
+        difference = x - fitted.mean
+        distance_squared = float(difference @ fitted.precision @ difference)
+        return MultivariateScore(distance_squared, chi2_sf(distance_squared, self.dimensions),
+                                 segment, fitted.samples)
+
+    def update(self, x: np.ndarray, segment: Optional[str] = None):
+        self.population.update(x)
+        if segment is None:
+            return
+        accumulator = self.segments.get(segment)
+        if accumulator is None:
+            if len(self.segments) >= self.max_segments:
+                return
+            accumulator = self.segments[segment] = CovarianceAccumulator(self.dimensions)
+        accumulator.update(x)
+
+    def refit(self, now: Optional[float] = None):
+        """Decay the accumulators and rebuild the scoring snapshots"""
+        now = time.time() if now is None else now
+        if self.half_life_seconds > 0:
+            factor = 0.5 ** ((now - self._refitted_at) / self.half_life_seconds)
+            self.population.decay(factor)
+            for accumulator in self.segments.values():
+                accumulator.decay(factor)
+        self._refitted_at = now
+
+        fitted: Dict[Optional[str], FittedBaseline] = {}
+        for segment, accumulator in [(None, self.population), *self.segments.items()]:
+            if accumulator.samples < self.min_samples:
+                continue
+            covariance = accumulator.covariance()
+            # Ridge scaled to the average variance keeps near-constant features invertible
+            ridge = self.ridge * max(float(np.trace(covariance)) / self.dimensions, 1e-6)
+            precision = np.linalg.inv(covariance + ridge * np.eye(self.dimensions))
+            fitted[segment] = FittedBaseline(accumulator.mean.copy(), precision, accumulator.samples)
+        # Swapped whole, so scoring never sees a half-built snapshot
+        self.fitted = fitted
+        self.refits += 1
+
+    def start(self):
+        if self._refit_task is None and self.refit_interval_seconds > 0:
+            self._refit_task = asyncio.get_running_loop().create_task(self._refit_periodically())
+
+    async def stop(self):
+        if self._refit_task is not None:
+            self._refit_task.cancel()
+            try:
+                await self._refit_task
+            except asyncio.CancelledError:
+                pass
+            self._refit_task = None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "features": self.features,
+            "population_samples": self.population.samples,
+            "segments": len(self.segments),
+            "fitted_segments": sum(1 for segment in self.fitted if segment is not None),
+            "refits": self.refits
+        }
+
+    async def _refit_periodically(self):
+        while True:
+            await asyncio.sleep(self.refit_interval_seconds)
+            try:
+                self.refit()
+            except Exception:
+                logger.exception("Behavior covariance refit failed")
@@ -0,0 +1,176 @@
+"""
+Blocklists
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+IP, device and email-domain blocklists backed by Bloom filters. `.bloom`
+files (built with `python -m data.blocklists build`) are memory-mapped
+read-only and shared by all workers; plain text files with one entry per
+line are also accepted for small lists. Lists are reloaded when their file
+changes, without a restart. Replace `.bloom` files with a rename (as the
+build command does), never rewrite them in place: workers have them mapped.
+
+Usage:
+    python -m data.blocklists build ips.txt ips.bloom --kind ip --false-positive-rate 0.001
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from schemas.fraud import FraudDetectionRequest
+from utils.bloom_filter import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+BLOCKLIST_KINDS = ("ip", "device", "email_domain")
+
+
+def normalize_entry(kind: str, value: Any) -> str:
+    """Canonical form of a blocklist entry or lookup value"""
+    value = str(value).strip()
+    if kind == "email_domain":
+        value = value.lower().rsplit("@", 1)[-1].rstrip(".")
+    return value
+
+
+def read_entries(kind: str, path: str) -> List[str]:
+    """Entries of a text blocklist, skipping blank lines and # comments"""
+    with open(path, encoding="utf-8") as f:
+        return [
+            normalize_entry(kind, line)
+            for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+
+@dataclass
+class LoadedBlocklist:
+    """A blocklist filter and the file version it was loaded from"""
+    path: str
+    bloom: BloomFilter
+    mtime_ns: int
+    size: int
+    loaded_at: float
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "entries": len(self.bloom),
+            "size_bytes": self.bloom.size_bytes,
+            "false_positive_rate": round(self.bloom.false_positive_rate, 6),
+            "loaded_at": self.loaded_at
+        }
+
+
+class Blocklists:
+    """Hot-reloadable Bloom filter blocklists for IPs, devices and email domains"""
+
+    def __init__(self, paths: Dict[str, Optional[str]], reload_interval_seconds: float = 30.0,
+                 false_positive_rate: float = 0.001):
+        unknown = set(paths) - set(BLOCKLIST_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown blocklist kinds: {sorted(unknown)}")
+
+        self.paths = {kind: path for kind, path in paths.items() if path}
+        self.reload_interval_seconds = reload_interval_seconds
+        self.false_positive_rate = false_positive_rate
+        self.lists: Dict[str, LoadedBlocklist] = {}
+        self._reload_task: Optional[asyncio.Task] = None
+
+    def contains(self, kind: str, value: Any) -> bool:
+        blocklist = self.lists.get(kind)
+        if blocklist is None or value is None or value == "":
+            return False
+        return normalize_entry(kind, value) in blocklist.bloom
+
+    def check(self, request: FraudDetectionRequest) -> List[str]:
+        """Kinds of blocklists a detect request hits"""
+        transaction = request.transaction_data
+        values = {
+            "ip": transaction.ip_address,
+            "device": transaction.device_info.get("device_id"),
+            "email_domain": request.user_data.email_domain
+        }
+        return [kind for kind, value in values.items() if self.contains(kind, value)]
+
+    def reload(self, force: bool = False) -> List[str]:
+        """Reload lists whose files changed; returns the kinds reloaded"""
+        reloaded = []
+        for kind, path in self.paths.items():
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                logger.warning(f"Blocklist {kind} unavailable at {path}: {e}")
+                continue
+
+            current = self.lists.get(kind)
+            if not force and current and (current.mtime_ns, current.size) == (stat.st_mtime_ns, stat.st_size):
+                continue
+
+            try:
+                bloom = self._load(kind, path)
+            except (OSError, ValueError) as e:
+                # Keep serving the previous version of the list
+                logger.error(f"Failed to load blocklist {kind} from {path}: {e}")
+                continue
+
+            # Swapping the reference is atomic for concurrent lookups
+            self.lists[kind] = LoadedBlocklist(path, bloom, stat.st_mtime_ns, stat.st_size, time.time())
+            reloaded.append(kind)
+            logger.info(f"Loaded {kind} blocklist from {path} ({len(bloom)} entries)")
+        return reloaded
+
+    def start(self):
+        """Load all lists and start watching their files"""
+        self.reload(force=True)
+        if self._reload_task is None and self.paths and self.reload_interval_seconds > 0:
+            self._reload_task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self):
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+
+    def info(self) -> Dict[str, Any]:
+        return {kind: blocklist.info() for kind, blocklist in self.lists.items()}
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.reload_interval_seconds)
+            self.reload()
+
+    def _load(self, kind: str, path: str) -> BloomFilter:
+        if path.endswith(".bloom"):
+            return BloomFilter.load(path)
+        return BloomFilter.from_entries(read_entries(kind, path), self.false_positive_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build Bloom filter blocklists")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Build a .bloom file from a text list")
+    build.add_argument("input", help="Text file with one entry per line")
+    build.add_argument("output", help="Output .bloom file")
+    build.add_argument("--kind", choices=BLOCKLIST_KINDS, default="ip")
+    build.add_argument("--false-positive-rate", type=float, default=0.001)
+    args = parser.parse_args()
+
+    entries = read_entries(args.kind, args.input)
+    bloom = BloomFilter.from_entries(entries, args.false_positive_rate)
+    # Write then rename so watching workers never map a partial file
+    temporary = f"{args.output}.tmp"
+    bloom.save(temporary)
+    os.replace(temporary, args.output)
+    print(f"{args.output}: {len(bloom)} entries, {bloom.size_bytes} bytes, "
+          f"{bloom.num_hashes} hashes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Decision Cache
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Idempotency cache for /api/fraud/detect. Payment gateways retry on
+timeouts, and rescoring a retried transaction both wastes a model call and
+double-counts it in the stateful features (velocity, baselines, link
+graph). The first request for a transaction_id is scored once in its own
+task; concurrent duplicates await that same task, and later retries
+within the TTL get the stored response, so every caller sees the
+identical decision. Failed computations are not cached.
+
+A retry must carry the same payload: a different request under a known
+transaction_id raises IdempotencyConflict instead of returning a decision
+made for other data. The cache is bounded with LRU eviction.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from schemas.fraud import FraudDetectionRequest, FraudDetectionResponse
+
+
+class IdempotencyConflict(ValueError):
+    """A transaction_id was reused with a different request payload"""
+
+
+class DecisionCache:
+    """LRU + TTL cache of detect responses by transaction_id, coalescing in-flight duplicates"""
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float = 900.0, requests_counter=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.requests_counter = requests_counter
+
+        self._entries: "OrderedDict[str, Tuple[float, str, FraudDetectionResponse]]" = OrderedDict()
+        self._in_flight: Dict[str, Tuple[str, asyncio.Task]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def fingerprint(request: FraudDetectionRequest) -> str:
+        return hashlib.blake2b(request.model_dump_json().encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, transaction_id: str, fingerprint: str) -> Optional[FraudDetectionResponse]:
+        """Stored response, or None if missing or expired"""
+        entry = self._entries.get(transaction_id)
+        if entry is None:
+            return None
+
+        expires_at, stored_fingerprint, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[transaction_id]
+            return None
+        self._check_fingerprint(transaction_id, stored_fingerprint, fingerprint)
+        self._entries.move_to_end(transaction_id)
+        return response
+
+    def put(self, transaction_id: str, fingerprint: str, response: FraudDetectionResponse):
+        self._entries[transaction_id] = (time.monotonic() + self.ttl_seconds, fingerprint, response)
+        self._entries.move_to_end(transaction_id)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, request: FraudDetectionRequest,
+                             compute: Callable[[], Awaitable[FraudDetectionResponse]]) -> FraudDetectionResponse:
+        """The transaction's decision: stored, joined while in flight, or computed once"""
+        transaction_id = request.transaction_data.transaction_id
+        fingerprint = self.fingerprint(request)
+
+        cached = self.get(transaction_id, fingerprint)
+        if cached is not None:
+            self._count("hit")
+            return cached
+
+        in_flight = self._in_flight.get(transaction_id)
+        if in_flight is not None:
+            self._check_fingerprint(transaction_id, in_flight[0], fingerprint)
+            self._count("coalesced")
+            task = in_flight[1]
+        else:
+            self._count("miss")
+            # Its own task, so a disconnecting first caller does not cancel it for the others
+            task = asyncio.ensure_future(compute())
+            self._in_flight[transaction_id] = (fingerprint, task)
+            task.add_done_callback(lambda done: self._finish(transaction_id, fingerprint, done))
+        return await asyncio.shield(task)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _finish(self, transaction_id: str, fingerprint: str, task: asyncio.Task):
+        self._in_flight.pop(transaction_id, None)
+        if not task.cancelled() and task.exception() is None:
+            self.put(transaction_id, fingerprint, task.result())
+
+    @staticmethod
+    def _check_fingerprint(transaction_id: str, stored: str, fingerprint: str):
+        if stored != fingerprint:
+            raise IdempotencyConflict(
+                f"Transaction {transaction_id} was already submitted with a different payload"
+            )
+
+    def _count(self, result: str):
+        if self.requests_counter is not None:
+            self.requests_counter.labels(result=result).inc()
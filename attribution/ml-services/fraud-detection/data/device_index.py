@@ -0,0 +1,253 @@
+"""
+Device Similarity Index
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+MinHash signatures of device attribute sets (`device_info` flattened into
+"key=value" tokens) with locality-sensitive hashing bands, to find
+near-duplicate devices used by other accounts: the same phone behind a
+reset device id, or an emulator farm cloning one profile. A lookup hashes
+the signature's bands and walks only the matching buckets, so its cost
+depends on the number of similar devices, not on the size of the index.
+
+Buckets are intrusive doubly-linked lists in NumPy arrays (one head table
+per band, next/prev links per device and band), so devices are inserted,
+updated and evicted in O(bands) without Python containers. With the
+defaults (32 permutations, 8 bands of 4) a device costs ~300 bytes, and
+devices at Jaccard similarity 0.8 become candidates with ~98% probability
+(0.7: ~89%). Lookups take tens of microseconds in CPython, dominated by
+bucket walks; each walk is capped, so a very common profile cannot make a
+lookup linear.
+Attribute sets with fewer than `min_attributes` tokens are not indexed,
+since they say too little about the device.
+"""
+
+import hashlib
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+from schemas.fraud import TransactionData
+from utils.key_index import KeyedStateStore, hash_key
+
+# Attributes that identify rather than describe the device
+IDENTITY_ATTRIBUTES = ("device_id",)
+
+
+@dataclass
+class DeviceMatch:
+    """Near-duplicate devices of one observed device"""
+    similar_devices: int
+    other_accounts: int
+    max_similarity: float
+
+
+def device_tokens(device_info: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Flatten device attributes into 'key=value' tokens (lists give one token per item)"""
+    tokens = []
+    for key, value in device_info.items():
+        if not prefix and key in IDENTITY_ATTRIBUTES:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            tokens.extend(device_tokens(value, f"{name}."))
+        elif isinstance(value, (list, tuple, set)):
+            tokens.extend(f"{name}={item}" for item in value)
+        elif value is not None and value != "":
+            tokens.append(f"{name}={value}")
+    return tokens
+
+
+def _token_hashes(tokens: Iterable[str]) -> np.ndarray:
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+         for token in tokens],
+        dtype=np.uint64
+    )
+
+
+class UserDeviceScores(KeyedStateStore):
+    """Per-user count of other accounts on near-duplicate devices (latest observation)"""
+
+    def __init__(self, capacity: int = 1_000_000, idle_ttl_seconds: int = 90 * 86400):
+        super().__init__(capacity, idle_ttl_seconds)
+        self.other_accounts = np.zeros(capacity, dtype=np.uint16)
+        self.observed = np.zeros(capacity, dtype=bool)
+
+    def record(self, user_id: str, other_accounts: int, timestamp: float):
+        key_id, _ = self.touch(user_id, timestamp)
+        self.other_accounts[key_id] = min(other_accounts, np.iinfo(np.uint16).max)
+        self.observed[key_id] = True
+
+    def get(self, user_id: str) -> Optional[int]:
+        key_id = self.index.lookup(user_id)
+        if key_id < 0 or not self.observed[key_id]:
+            return None
+        return int(self.other_accounts[key_id])
+
+    def _clear_state(self, key_ids: np.ndarray):
+        self.other_accounts[key_ids] = 0
+        self.observed[key_ids] = False
+
+
+class DeviceSimilarityIndex(KeyedStateStore):
+    """MinHash/LSH index of device attribute sets"""
+
+    def __init__(self, capacity: int = 1_000_000, idle_ttl_seconds: int = 90 * 86400,
+                 num_permutations: int = 32, bands: int = 8, similarity_threshold: float = 0.75,
+                 min_attributes: int = 3, max_candidates: int = 64, seed: int = 1):
+        if num_permutations % bands:
+            raise ValueError("num_permutations must be a multiple of bands")
+        super().__init__(capacity, idle_ttl_seconds)
+        self.num_permutations = num_permutations
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self.similarity_threshold = similarity_threshold
+        self.min_attributes = min_attributes
+        self.max_candidates = max_candidates
+
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family: h(x) = ((a * x + b) mod 2^64) >> 32, a odd
+        self._a = rng.integers(0, 2**63, num_permutations, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2**63, num_permutations, dtype=np.uint64)
+        self._band_multipliers = (
+            rng.integers(0, 2**63, (bands, self.rows), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        )
+
+        self.table_size = 1 << max(4, (capacity - 1).bit_length())
+        self.signatures = np.zeros((capacity, num_permutations), dtype=np.uint32)
+        self.user_hashes = np.zeros(capacity, dtype=np.int64)
+        self._heads = np.full((bands, self.table_size), -1, dtype=np.int32)
+        self._next = np.full((capacity, bands), -1, dtype=np.int32)
+        self._prev = np.full((capacity, bands), -1, dtype=np.int32)
+        self._slots = np.full((capacity, bands), -1, dtype=np.int32)
+        self._band_index = np.arange(bands)
+        self.user_scores = UserDeviceScores(capacity, idle_ttl_seconds)
+
+    @property
+    def memory_bytes(self) -> int:
+        arrays = (self.signatures, self.user_hashes, self._heads, self._next, self._prev,
+                  self._slots, self.index._hashes, self.index._ids, self.last_seen)
+        return sum(array.nbytes for array in arrays)
+
+    def start(self, interval_seconds: float = 60.0, chunk_size: int = 10_000):
+        super().start(interval_seconds, chunk_size)
+        self.user_scores.start(interval_seconds, chunk_size)
+
+    async def stop(self):
+        await super().stop()
+        await self.user_scores.stop()
+
+    def signature(self, device_info: Dict[str, Any]) -> Optional[np.ndarray]:
+        """MinHash signature of a device's attributes, None if it has too few"""
+        hashes = np.unique(_token_hashes(device_tokens(device_info)))
+        if len(hashes) < self.min_attributes:
+            return None
+        permuted = (hashes[:, None] * self._a + self._b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def band_slots(self, signature: np.ndarray) -> np.ndarray:
+        bands = signature.astype(np.uint64).reshape(self.bands, self.rows)
+        mixed = (bands * self._band_multipliers).sum(axis=1) >> np.uint64(17)
+        return (mixed % np.uint64(self.table_size)).astype(np.int64)
+
+    def query(self, signature: np.ndarray, user_id: Optional[str] = None,
+              exclude_id: int = -1, slots: Optional[np.ndarray] = None) -> DeviceMatch:
+        """Indexed devices at or above the similarity threshold, and how many other accounts use them"""
+        if slots is None:
+            slots = self.band_slots(signature)
+        candidates = set()
+        for band, slot in zip(self._band_index.tolist(), slots.tolist()):
+            device_id = int(self._heads[band, slot])
+            walked = 0
+            while device_id >= 0 and walked < self.max_candidates:
+                candidates.add(device_id)
+                device_id = int(self._next[device_id, band])
+                walked += 1
+        candidates.discard(exclude_id)
+        # The device itself counts when another account used it before
+        owners = [int(self.user_hashes[exclude_id])] if exclude_id >= 0 else []
+
+        similar_count, max_similarity = 0, 0.0
+        if candidates:
+            candidate_ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarities = (self.signatures[candidate_ids] == signature).mean(axis=1)
+            similar = similarities >= self.similarity_threshold
+            similar_count = int(np.count_nonzero(similar))
+            max_similarity = float(similarities.max())
+            owners.extend(self.user_hashes[candidate_ids[similar]].tolist())
+
+        other_owners = set(owners) - {0}
+        if user_id is not None:
+            other_owners.discard(hash_key(user_id))
+        return DeviceMatch(similar_count, len(other_owners), max_similarity)
+
+    def observe(self, device_key: str, user_id: str, device_info: Dict[str, Any],
+                timestamp: float) -> Optional[DeviceMatch]:
+        """Match a device against the index, then index (or re-index) it for this user"""
+        signature = self.signature(device_info)
+        if signature is None:
+            return None
+
+        slots = self.band_slots(signature)
+        existing = self.index.lookup(device_key)
+        match = self.query(signature, user_id, exclude_id=existing, slots=slots)
+
+        key_id, created = self.touch(device_key, timestamp)
+        if created or not np.array_equal(self.signatures[key_id], signature):
+            self._unlink(key_id)
+            self.signatures[key_id] = signature
+            self._link(key_id, slots)
+        self.user_hashes[key_id] = hash_key(user_id)
+        return match
+
+    def observe_transaction(self, transaction: TransactionData) -> Optional[DeviceMatch]:
+        """Observe a transaction's device, keyed by device_id or by its attribute fingerprint"""
+        device_info = transaction.device_info
+        device_key = device_info.get('device_id')
+        if not device_key:
+            tokens = sorted(device_tokens(device_info))
+            device_key = "fp:" + hashlib.blake2b("|".join(tokens).encode("utf-8"), digest_size=8).hexdigest()
+        timestamp = min(transaction.timestamp.timestamp(), time.time())
+        match = self.observe(str(device_key), transaction.user_id, device_info, timestamp)
+        if match is not None:
+            self.user_scores.record(transaction.user_id, match.other_accounts, timestamp)
+        return match
+
+    def device_risk(self, user_id: str) -> Optional[float]:
+        """Risk from other accounts on near-duplicates of the user's latest device"""
+        other_accounts = self.user_scores.get(user_id)
+        if other_accounts is None:
+            return None
+        return round(1.0 - 0.95 * 0.5 ** other_accounts, 4)
+
+    def _link(self, key_id: int, slots: np.ndarray):
+        for band, slot in zip(self._band_index.tolist(), slots.tolist()):
+            head = int(self._heads[band, slot])
+            self._next[key_id, band] = head
+            self._prev[key_id, band] = -1
+            if head >= 0:
+                self._prev[head, band] = key_id
+            self._heads[band, slot] = key_id
+            self._slots[key_id, band] = slot
+
+    def _unlink(self, key_id: int):
+        for band in self._band_index.tolist():
+            slot = int(self._slots[key_id, band])
+            if slot < 0:
+                continue
+            previous, following = int(self._prev[key_id, band]), int(self._next[key_id, band])
+            if previous >= 0:
+                self._next[previous, band] = following
+            else:
+                self._heads[band, slot] = following
+            if following >= 0:
+                self._prev[following, band] = previous
+            self._slots[key_id, band] = -1
+            self._next[key_id, band] = -1
+            self._prev[key_id, band] = -1
+
+    def _clear_state(self, key_ids: np.ndarray):
+        for key_id in key_ids.tolist():
+            self._unlink(key_id)
+        self.signatures[key_ids] = 0
+        self.user_hashes[key_ids] = 0
@@ -0,0 +1,193 @@
+"""
+Transaction Feature Vectorizer
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Maps TransactionData/UserData straight into float32 feature rows in a fixed
+column order, filling a whole batch matrix in one pass for model inference.
+
+High-cardinality categoricals (merchant id, email domain, currency, device
+model) go through the hashing trick: each "field=value" token is hashed
+into one of `width` extra columns with a +1/-1 sign, so the model input
+size stays fixed and no vocabulary grows with traffic. Signed hashing
+makes collisions cancel out in expectation instead of piling up.
+"""
+
+import hashlib
+import numpy as np
+from typing import Any, List, Dict, Optional, Sequence, Tuple
+from schemas.fraud import TransactionData, UserData
+
+
+class CategoricalEncoding:
+    """Categorical value -> numeric encoding backed by a lookup array"""
+
+    def __init__(self, encoding: Dict[str, float], default: float = 0.0):
+        self.vocabulary = {value: code for code, value in enumerate(encoding)}
+        # Last slot holds the encoding of unseen values
+        self.values = np.array(list(encoding.values()) + [default], dtype=np.float32)
+        self.unknown_code = len(encoding)
+
+    def code(self, value: Optional[str]) -> int:
+        if not value:
+            return self.unknown_code
+        return self.vocabulary.get(value.lower(), self.unknown_code)
+
+    def encode(self, value: Optional[str]) -> float:
+        return float(self.values[self.code(value)])
+
+    def encode_codes(self, codes: np.ndarray) -> np.ndarray:
+        return self.values[codes]
+
+
+PAYMENT_METHOD_ENCODING = CategoricalEncoding({
+    'credit_card': 1.0,
+    'debit_card': 0.8,
+    'bank_transfer': 0.6,
+    'digital_wallet': 0.4,
+    'cryptocurrency': 0.2,
+    'unknown': 0.0
+})
+
+
+# Hashed categorical fields: name -> (source, attribute path)
+HASHED_FIELDS = {
+    'merchant_id': ('transaction', 'merchant_id'),
+    'email_domain': ('user', 'email_domain'),
+    'currency': ('transaction', 'currency'),
+    'device_model': ('transaction', 'device_info.model')
+}
+
+
+def _field_value(source: Any, path: str) -> Any:
+    """Attribute or key lookup along a dotted path, for models and dicts alike"""
+    value = source
+    for part in path.split('.'):
+        if value is None:
+            return None
+        value = value.get(part) if isinstance(value, dict) else getattr(value, part, None)
+    return value
+
+
+class FeatureHasher:
+    """Signed hashing trick for categorical fields into a fixed-width block"""
+
+    def __init__(self, width: int, fields: Sequence[str] = tuple(HASHED_FIELDS)):
+        if width < 1:
+            raise ValueError("Hashed feature width must be positive")
+        unknown = set(fields) - set(HASHED_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown hashed fields: {sorted(unknown)}")
+        self.width = width
+        self.fields = list(fields)
+        self._paths = [HASHED_FIELDS[field] for field in self.fields]
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [f"hashed_{i}" for i in range(self.width)]
+
+    def values(self, transaction: Any, user: Any) -> List[Optional[str]]:
+        """Raw values of the hashed fields (request models or their dicts)"""
+        sources = {'transaction': transaction, 'user': user}
+        return [_field_value(sources[source], path) for source, path in self._paths]
+
+    def hash_values(self, values: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse (columns, signs) of one row's field values; empty values are skipped"""
+        columns, signs = [], []
+        for field, value in zip(self.fields, values):
+            if value is None or value == "":
+                continue
+            token = f"{field}={str(value).lower()}".encode("utf-8")
+            hashed = int.from_bytes(hashlib.blake2b(token, digest_size=8).digest(), "little")
+            columns.append((hashed & 0x7FFFFFFFFFFFFFFF) % self.width)
+            signs.append(-1.0 if hashed >> 63 else 1.0)
+        return np.array(columns, dtype=np.intp), np.array(signs, dtype=np.float32)
+
+    def transform_into(self, block: np.ndarray, rows_values: Sequence[Sequence[Any]]):
+        """Add the hashed rows into a zeroed (rows x width) block"""
+        row_index, columns, signs = [], [], []
+        for i, values in enumerate(rows_values):
+            row_columns, row_signs = self.hash_values(values)
+            row_index.append(np.full(len(row_columns), i, dtype=np.intp))
+            columns.append(row_columns)
+            signs.append(row_signs)
+        if columns:
+            # Colliding fields of one row must accumulate, hence add.at
+            np.add.at(block, (np.concatenate(row_index), np.concatenate(columns)), np.concatenate(signs))
+
+    def to_dict(self, values: Sequence[Any]) -> Dict[str, float]:
+        """Non-zero hashed features of one row by feature name"""
+        features: Dict[str, float] = {}
+        for column, sign in zip(*self.hash_values(values)):
+            name = f"hashed_{column}"
+            features[name] = features.get(name, 0.0) + float(sign)
+        return features
+
+
+class FeatureVectorizer:
+    """Fixed-order float32 feature rows for TransactionFraudDetector"""
+
+    def __init__(self, features: Sequence[str], hasher: Optional[FeatureHasher] = None):
+        self.hasher = hasher
+        # Hashed columns follow the named features
+        self.hashed_offset = len(features)
+        self.features = list(features) + (hasher.feature_names if hasher is not None else [])
+        self.width = len(self.features)
+        self.column_index = {feature: i for i, feature in enumerate(self.features)}
+
+        # Columns filled directly from the request models, in extraction order
+        self._numeric_columns = np.array([
+            self.column_index[name] for name in (
+                'transaction_amount', 'transaction_hour', 'user_age_days', 'user_risk_score'
+            )
+        ])
+        self._payment_method_column = self.column_index['payment_method']
+
+    def column(self, feature: str) -> int:
+        """Column index of a feature"""
+        return self.column_index[feature]
+
+    def allocate(self, rows: int) -> np.ndarray:
+        """Allocate a zeroed feature matrix"""
+        return np.zeros((rows, self.width), dtype=np.float32)
+
+    def transform(self, transactions: Sequence[TransactionData], users: Sequence[UserData],
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Fill one feature row per transaction, reusing `out` when it is large enough"""
+        rows = len(transactions)
+        if out is not None and out.shape[0] >= rows and out.shape[1] == self.width:
+            matrix = out[:rows]
+            matrix.fill(0.0)
+        else:
+            matrix = self.allocate(rows)
+
+        if not rows:
+            return matrix
+
+        numeric = np.empty((rows, len(self._numeric_columns)), dtype=np.float32)
+        payment_codes = np.empty(rows, dtype=np.intp)
+
+        for i, (transaction, user) in enumerate(zip(transactions, users)):
+            numeric[i] = (
+                transaction.amount,
+                transaction.timestamp.hour,
+                user.account_age_days,
+                user.risk_score
+            )
+            payment_codes[i] = PAYMENT_METHOD_ENCODING.code(transaction.payment_method)
+
+        matrix[:, self._numeric_columns] = numeric
+        matrix[:, self._payment_method_column] = PAYMENT_METHOD_ENCODING.encode_codes(payment_codes)
+        if self.hasher is not None:
+            self.hasher.transform_into(
+                matrix[:, self.hashed_offset:],
+                [self.hasher.values(transaction, user) for transaction, user in zip(transactions, users)]
+            )
+        return matrix
+
+    def transform_one(self, transaction: TransactionData, user: UserData) -> np.ndarray:
+        """Feature row for a single transaction"""
+        return self.transform([transaction], [user])[0]
+
+    def to_dict(self, row: np.ndarray) -> Dict[str, float]:
+        """Named view of a feature row"""
+        return {feature: float(value) for feature, value in zip(self.features, row)}
@@ -0,0 +1,308 @@
+"""
+Rolling Fraud Statistics
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+In-process aggregator of detect and anomaly results into time-bucketed
+counters at three resolutions (minute, hour, day), each a ring of
+preallocated NumPy rows with one column per series (risk level, merchant
+category, risk factor, anomaly type, labelled outcome). Any period is answered by summing at
+most one ring's buckets, and aggregators from several workers merge bucket
+by bucket.
+"""
+
+import math
+import re
+import time
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from schemas.fraud import FraudDetectionResponse, AnomalyDetectionResponse
+
+# (name, bucket seconds, number of buckets)
+RESOLUTIONS: Tuple[Tuple[str, int, int], ...] = (
+    ("minute", 60, 120),
+    ("hour", 3600, 48),
+    ("day", 86400, 90),
+)
+
+PERIOD_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+OTHER = "other"
+# Placeholder risk factor of transactions with no risk factors; not a pattern
+NORMAL_PATTERN_FACTOR = "Normal transaction pattern"
+
+
+def parse_period(period: str) -> int:
+    """'30m', '24h', '7d', '2w' -> seconds"""
+    match = re.fullmatch(r"\s*(\d+)\s*([mhdw])\s*", period.lower())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid period '{period}', expected e.g. 30m, 24h, 7d")
+    return int(match.group(1)) * PERIOD_UNITS[match.group(2)]
+
+
+def severity_label(severity: float) -> str:
+    if severity >= 0.7:
+        return "high"
+    elif severity >= 0.4:
+        return "medium"
+    return "low"
+
+
+class BucketRing:
+    """Fixed ring of time buckets x series counters"""
+
+    def __init__(self, bucket_seconds: int, num_buckets: int, max_series: int):
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = num_buckets
+        self.values = np.zeros((num_buckets, max_series), dtype=np.float64)
+        # Absolute bucket number held by each slot, -1 when unused
+        self.bucket_ids = np.full(num_buckets, -1, dtype=np.int64)
+
+    @property
+    def window_seconds(self) -> int:
+        return self.bucket_seconds * self.num_buckets
+
+    def row(self, bucket: int) -> Optional[np.ndarray]:
+        """Row for an absolute bucket, recycling its slot; None if too old for the ring"""
+        slot = bucket % self.num_buckets
+        held = self.bucket_ids[slot]
+        if held == bucket:
+            return self.values[slot]
+        if held > bucket:
+            return None
+        self.values[slot] = 0.0
+        self.bucket_ids[slot] = bucket
+        return self.values[slot]
+
+    def add(self, timestamp: float, columns: List[int], amounts: List[float]):
+        row = self.row(int(timestamp // self.bucket_seconds))
+        if row is not None:
+            np.add.at(row, columns, amounts)
+
+    def window_mask(self, now: float, seconds: int) -> np.ndarray:
+        current = int(now // self.bucket_seconds)
+        buckets = math.ceil(seconds / self.bucket_seconds)
+        return (self.bucket_ids > current - buckets) & (self.bucket_ids <= current)
+
+    def totals(self, now: float, seconds: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(per-series sums, newest bucket id per series) over the window ending at `now`"""
+        mask = self.window_mask(now, seconds)
+        values = self.values[mask]
+        bucket_ids = self.bucket_ids[mask]
+        latest = np.where(values > 0, bucket_ids[:, None], -1).max(axis=0, initial=-1)
+        return values.sum(axis=0), latest
+
+
+class FraudStatsAggregator:
+    """Minute/hour/day counters of detect and anomaly results"""
+
+    def __init__(self, max_series: int = 1024, max_verdicts: int = 100_000):
+        self.max_series = max_series
+        self.max_verdicts = max_verdicts
+        # Recent transaction_id -> is_fraud verdicts, matched against feedback labels
+        self.verdicts: "OrderedDict[str, bool]" = OrderedDict()
+        self.series: Dict[str, int] = {}
+        self.rings = {
+            name: BucketRing(bucket_seconds, num_buckets, max_series)
+            for name, bucket_seconds, num_buckets in RESOLUTIONS
+        }
+
+    def column(self, name: str) -> int:
+        """Column of a series; once nearly full, new series fold into '<dimension>:other'"""
+        column = self.series.get(name)
+        if column is not None:
+            return column
+
+        if len(self.series) >= self.max_series * 15 // 16 and not name.endswith(f":{OTHER}"):
+            return self.column(f"{name.split(':', 1)[0]}:{OTHER}")
+        if len(self.series) >= self.max_series - 1:
+            # The last column is reserved for everything beyond capacity
+            return self.series.setdefault(OTHER, self.max_series - 1)
+
+        column = len(self.series)
+        self.series[name] = column
+        return column
+
+    def record(self, increments: Dict[str, float], timestamp: Optional[float] = None):
+        """Add series increments at `timestamp` to every resolution"""
+        timestamp = time.time() if timestamp is None else timestamp
+        columns = [self.column(name) for name in increments]
+        amounts = list(increments.values())
+        for ring in self.rings.values():
+            ring.add(timestamp, columns, amounts)
+
+    def record_detection(self, result: FraudDetectionResponse, merchant_category: str,
+                         timestamp: Optional[float] = None):
+        increments = {
+            "transactions": 1.0,
+            "fraud": float(result.is_fraud),
+            "fraud_score": result.fraud_score,
+            f"risk_level:{result.risk_level}": 1.0,
+            f"merchant_category:{merchant_category}": 1.0,
+        }
+        if result.is_fraud:
+            increments[f"merchant_category_fraud:{merchant_category}"] = 1.0
+        for factor in result.risk_factors:
+            name = factor.get("factor", "unknown")
+            if name == NORMAL_PATTERN_FACTOR:
+                continue
+            increments[f"risk_factor:{name}"] = increments.get(f"risk_factor:{name}", 0.0) + 1.0
+            increments[f"risk_factor_impact:{name}"] = (
+                increments.get(f"risk_factor_impact:{name}", 0.0) + float(factor.get("impact", 0.0))
+            )
+        self.record(increments, timestamp)
+
+        self.verdicts[result.transaction_id] = result.is_fraud
+        self.verdicts.move_to_end(result.transaction_id)
+        if len(self.verdicts) > self.max_verdicts:
+            self.verdicts.popitem(last=False)
+
+    def record_feedback(self, transaction_id: str, is_fraud: bool, timestamp: Optional[float] = None) -> bool:
+        """Compare a confirmed label with the recorded verdict; False if there is none"""
+        flagged = self.verdicts.pop(transaction_id, None)
+        if flagged is None:
+            return False
+
+        self.record({
+            "labelled": 1.0,
+            "labelled_correct": float(flagged == is_fraud),
+            "labelled_legitimate": float(not is_fraud),
+            "false_positive": float(flagged and not is_fraud),
+        }, timestamp)
+        return True
+
+    def record_anomalies(self, result: AnomalyDetectionResponse, timestamp: Optional[float] = None):
+        increments = {
+            "anomaly_checks": 1.0,
+            f"anomaly_severity_level:{result.severity_level}": 1.0,
+        }
+        for anomaly in result.anomalies_detected:
+            anomaly_type = anomaly.get("type", "unknown")
+            increments[f"anomaly:{anomaly_type}"] = increments.get(f"anomaly:{anomaly_type}", 0.0) + 1.0
+            increments[f"anomaly_severity:{anomaly_type}"] = (
+                increments.get(f"anomaly_severity:{anomaly_type}", 0.0) + float(anomaly.get("severity", 0.0))
+            )
+        self.record(increments, timestamp)
+
+    def resolution_for(self, seconds: int) -> str:
+        """Finest resolution whose ring covers the period"""
+        for name, _, _ in RESOLUTIONS:
+            if self.rings[name].window_seconds >= seconds:
+                return name
+        return RESOLUTIONS[-1][0]
+
+    def totals(self, seconds: int, now: Optional[float] = None) -> Tuple[Dict[str, float], Dict[str, float], str]:
+        """({series: sum}, {series: newest bucket start}, resolution) over the last `seconds`"""
+        now = time.time() if now is None else now
+        resolution = self.resolution_for(seconds)
+        ring = self.rings[resolution]
+        sums, latest = ring.totals(now, seconds)
+
+        values, last_seen = {}, {}
+        for name, column in self.series.items():
+            if sums[column]:
+                values[name] = float(sums[column])
+                last_seen[name] = float(latest[column] * ring.bucket_seconds)
+        return values, last_seen, resolution
+
+    def stats(self, seconds: int, now: Optional[float] = None) -> Dict[str, Any]:
+        """Detection statistics over the last `seconds`"""
+        values, _, resolution = self.totals(seconds, now)
+        transactions = values.get("transactions", 0.0)
+        fraud = values.get("fraud", 0.0)
+        fraud_by_category = _dimension(values, "merchant_category_fraud")
+        labelled = values.get("labelled", 0.0)
+        legitimate = values.get("labelled_legitimate", 0.0)
+
+        return {
+            "total_transactions_analyzed": int(transactions),
+            "fraud_detected": int(fraud),
+            "fraud_rate": round(100.0 * fraud / transactions, 2) if transactions else 0.0,
+            "average_fraud_score": round(values.get("fraud_score", 0.0) / transactions, 4) if transactions else 0.0,
+            # Over transactions with a /feedback label; None until labels arrive
+            "false_positive_rate": (
+                round(100.0 * values.get("false_positive", 0.0) / legitimate, 2) if legitimate else None
+            ),
+            "model_accuracy": round(100.0 * values.get("labelled_correct", 0.0) / labelled, 2) if labelled else None,
+            "labelled_transactions": int(labelled),
+            "risk_levels": _dimension(values, "risk_level"),
+            "merchant_categories": {
+                category: {
+                    "transactions": count,
+                    "fraud_detected": fraud_by_category.get(category, 0)
+                }
+                for category, count in _dimension(values, "merchant_category").items()
+            },
+            "anomaly_checks": int(values.get("anomaly_checks", 0.0)),
+            "anomalies": _dimension(values, "anomaly"),
+            "resolution": resolution
+        }
+
+    def patterns(self, seconds: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Anomaly types and risk factors seen over the last `seconds`, most frequent first"""
+        values, last_seen, _ = self.totals(seconds, now)
+        patterns = []
+
+        for prefix, weight_prefix, description in (
+            ("anomaly", "anomaly_severity", "Behavioral anomaly"),
+            ("risk_factor", "risk_factor_impact", "Transaction risk factor"),
+        ):
+            for name, count in _dimension(values, prefix).items():
+                key = f"{prefix}:{name}"
+                mean_weight = values.get(f"{weight_prefix}:{name}", 0.0) / count
+                patterns.append({
+                    "pattern_id": f"{prefix}:{name}",
+                    "description": f"{description}: {name}",
+                    "count": count,
+                    "severity": severity_label(mean_weight),
+                    "detected_at": datetime.utcfromtimestamp(last_seen[key]).isoformat()
+                })
+
+        patterns.sort(key=lambda pattern: pattern["count"], reverse=True)
+        return patterns
+
+    def merge(self, other: "FraudStatsAggregator"):
+        """Add another aggregator's buckets (e.g. from another worker) into this one"""
+        columns = np.array([self.column(name) for name in other.series], dtype=np.int64)
+        other_columns = np.array(list(other.series.values()), dtype=np.int64)
+
+        for name, ring in self.rings.items():
+            other_ring = other.rings[name]
+            for slot in np.nonzero(other_ring.bucket_ids >= 0)[0]:
+                row = ring.row(int(other_ring.bucket_ids[slot]))
+                if row is not None and len(columns):
+                    np.add.at(row, columns, other_ring.values[slot, other_columns])
+
+    def to_dict(self) -> Dict[str, Any]:
+        series = list(self.series)
+        columns = list(self.series.values())
+        rings = {}
+        for name, ring in self.rings.items():
+            used = np.nonzero(ring.bucket_ids >= 0)[0]
+            rings[name] = {
+                str(int(ring.bucket_ids[slot])): ring.values[slot, columns].tolist()
+                for slot in used
+            }
+        return {"series": series, "buckets": rings}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_series: int = 1024) -> "FraudStatsAggregator":
+        aggregator = cls(max_series=max_series)
+        columns = [aggregator.column(name) for name in data["series"]]
+        for name, buckets in data["buckets"].items():
+            ring = aggregator.rings[name]
+            for bucket, values in buckets.items():
+                row = ring.row(int(bucket))
+                if row is not None:
+                    np.add.at(row, columns, values)
+        return aggregator
+
+
+def _dimension(values: Dict[str, float], prefix: str) -> Dict[str, int]:
+    """{value: count} of the series '<prefix>:<value>'"""
+    start = len(prefix) + 1
+    return {
+        name[start:]: int(count)
+        for name, count in values.items()
+        if name.startswith(prefix + ":")
+    }
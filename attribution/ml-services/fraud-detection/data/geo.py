@@ -0,0 +1,274 @@
+"""
+IP Geolocation and Impossible Travel
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+GeoIndex maps IPs to locations with sorted range starts in NumPy arrays and
+`searchsorted` (IPv4 as uint32, IPv6 as high/low uint64 pairs), loaded from
+a CSV file with the header:
+
+    start_ip,end_ip,country_code,city,latitude,longitude
+
+IPs may be written as addresses or integers. Identical locations are stored
+once, so a range costs ~16 bytes (IPv4) or ~36 bytes (IPv6).
+UserLocationStore keeps each user's last location and flags impossible
+travel: a jump between locations faster than an airliner.
+"""
+
+import csv
+import ipaddress
+import logging
+import math
+import socket
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from utils.key_index import KeyedStateStore
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+UINT64_MASK = (1 << 64) - 1
+
+
+@dataclass
+class GeoLocation:
+    """Location of an IP range"""
+    location_id: int
+    country_code: str
+    city: str
+    latitude: float
+    longitude: float
+
+
+@dataclass
+class TravelCheck:
+    """Movement between a user's previous and current location"""
+    from_location: GeoLocation
+    to_location: GeoLocation
+    distance_km: float
+    elapsed_hours: float
+    speed_kmh: float
+    impossible: bool
+
+
+def parse_ip(ip) -> Tuple[int, int]:
+    """(version, integer value) of an IP given as an address or an integer"""
+    if isinstance(ip, int):
+        return (4 if ip <= 0xFFFFFFFF else 6), ip
+    ip = ip.strip()
+    if ip.isdigit():
+        value = int(ip)
+        return (4 if value <= 0xFFFFFFFF else 6), value
+    if ip.count(".") == 3 and ":" not in ip:
+        # Fast path for dotted IPv4
+        try:
+            return 4, int.from_bytes(socket.inet_aton(ip), "big")
+        except OSError:
+            raise ValueError(f"Invalid IP address '{ip}'")
+
+    address = ipaddress.ip_address(ip)
+    if address.version == 6 and address.ipv4_mapped is not None:
+        return 4, int(address.ipv4_mapped)
+    return address.version, int(address)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoIndex:
+    """IP range -> location index over sorted NumPy arrays"""
+
+    def __init__(self):
+        self.v4_starts = np.empty(0, dtype=np.uint32)
+        self.v4_ends = np.empty(0, dtype=np.uint32)
+        self.v4_locations = np.empty(0, dtype=np.int32)
+        self.v6_start_hi = np.empty(0, dtype=np.uint64)
+        self.v6_start_lo = np.empty(0, dtype=np.uint64)
+        self.v6_end_hi = np.empty(0, dtype=np.uint64)
+        self.v6_end_lo = np.empty(0, dtype=np.uint64)
+        self.v6_locations = np.empty(0, dtype=np.int32)
+
+        self.countries: List[str] = []
+        self.cities: List[str] = []
+        self.latitudes = np.empty(0, dtype=np.float32)
+        self.longitudes = np.empty(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.v4_starts) + len(self.v6_start_hi)
+
+    @property
+    def memory_bytes(self) -> int:
+        arrays = (self.v4_starts, self.v4_ends, self.v4_locations, self.v6_start_hi, self.v6_start_lo,
+                  self.v6_end_hi, self.v6_end_lo, self.v6_locations, self.latitudes, self.longitudes)
+        return sum(array.nbytes for array in arrays)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "GeoIndex":
+        """Build an index from a CSV of IP ranges (ranges must not overlap)"""
+        index = cls()
+        location_ids: Dict[Tuple[str, str, float, float], int] = {}
+        latitudes, longitudes = [], []
+        v4, v6 = [], []
+
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                start_version, start = parse_ip(row["start_ip"])
+                end_version, end = parse_ip(row["end_ip"])
+                if start_version != end_version or end < start:
+                    raise ValueError(f"Invalid IP range {row['start_ip']}-{row['end_ip']}")
+
+                location = (row["country_code"], row.get("city", ""),
+                            float(row["latitude"]), float(row["longitude"]))
+                location_id = location_ids.get(location)
+                if location_id is None:
+                    location_id = location_ids[location] = len(location_ids)
+                    index.countries.append(location[0])
+                    index.cities.append(location[1])
+                    latitudes.append(location[2])
+                    longitudes.append(location[3])
+
+                (v4 if start_version == 4 else v6).append((start, end, location_id))
+
+        v4.sort()
+        v6.sort()
+        if v4:
+            starts, ends, locations = zip(*v4)
+            index.v4_starts = np.array(starts, dtype=np.uint32)
+            index.v4_ends = np.array(ends, dtype=np.uint32)
+            index.v4_locations = np.array(locations, dtype=np.int32)
+        if v6:
+            starts, ends, locations = zip(*v6)
+            index.v6_start_hi = np.array([s >> 64 for s in starts], dtype=np.uint64)
+            index.v6_start_lo = np.array([s & UINT64_MASK for s in starts], dtype=np.uint64)
+            index.v6_end_hi = np.array([e >> 64 for e in ends], dtype=np.uint64)
+            index.v6_end_lo = np.array([e & UINT64_MASK for e in ends], dtype=np.uint64)
+            index.v6_locations = np.array(locations, dtype=np.int32)
+        index.latitudes = np.array(latitudes, dtype=np.float32)
+        index.longitudes = np.array(longitudes, dtype=np.float32)
+
+        logger.info(f"Loaded {len(index)} IP ranges ({len(location_ids)} locations) from {path}")
+        return index
+
+    def lookup_id(self, ip) -> int:
+        """Location id of an IP, or -1 if it is not covered"""
+        try:
+            version, value = parse_ip(ip)
+        except ValueError:
+            return -1
+
+        if version == 4:
+            position = int(np.searchsorted(self.v4_starts, value, side="right")) - 1
+            if position < 0 or value > self.v4_ends[position]:
+                return -1
+            return int(self.v4_locations[position])
+
+        high, low = value >> 64, value & UINT64_MASK
+        high, low = np.uint64(high), np.uint64(low)
+        left = int(np.searchsorted(self.v6_start_hi, high, side="left"))
+        right = int(np.searchsorted(self.v6_start_hi, high, side="right"))
+        position = left + int(np.searchsorted(self.v6_start_lo[left:right], low, side="right")) - 1
+        if position < 0:
+            return -1
+        end = (int(self.v6_end_hi[position]) << 64) | int(self.v6_end_lo[position])
+        return int(self.v6_locations[position]) if value <= end else -1
+
+    def location(self, location_id: int) -> GeoLocation:
+        return GeoLocation(
+            location_id=location_id,
+            country_code=self.countries[location_id],
+            city=self.cities[location_id],
+            latitude=float(self.latitudes[location_id]),
+            longitude=float(self.longitudes[location_id])
+        )
+
+    def lookup(self, ip) -> Optional[GeoLocation]:
+        location_id = self.lookup_id(ip)
+        return self.location(location_id) if location_id >= 0 else None
+
+
+class UserLocationStore(KeyedStateStore):
+    """Per-user last location with impossible-travel detection (~64 bytes per user)"""
+
+    def __init__(self, geo_index: GeoIndex, capacity: int = 1_000_000,
+                 idle_ttl_seconds: int = 30 * 86400, max_speed_kmh: float = 900.0,
+                 min_distance_km: float = 500.0, sweep_interval: int = 100_000):
+        super().__init__(capacity, idle_ttl_seconds, sweep_interval)
+        self.geo_index = geo_index
+        self.max_speed_kmh = max_speed_kmh
+        self.min_distance_km = min_distance_km
+
+        self.location_id = np.full(capacity, -1, dtype=np.int32)
+        self.seen_at = np.zeros(capacity, dtype=np.float64)
+        # Most recent impossible-travel event per user
+        self.event_at = np.zeros(capacity, dtype=np.float64)
+        self.event_from = np.full(capacity, -1, dtype=np.int32)
+        self.event_to = np.full(capacity, -1, dtype=np.int32)
+        self.event_speed = np.zeros(capacity, dtype=np.float32)
+
+    def observe(self, user_id: str, ip, timestamp: float) -> Optional[TravelCheck]:
+        """Record a user's location from an IP and check travel from the previous one"""
+        location_id = self.geo_index.lookup_id(ip) if ip else -1
+        if location_id < 0:
+            return None
+
+        key_id, _ = self.touch(user_id, timestamp)
+        previous_id = int(self.location_id[key_id])
+        previous_at = float(self.seen_at[key_id])
+
+        check = None
+        if previous_id >= 0 and previous_id != location_id:
+            check = self._check_travel(previous_id, location_id, abs(timestamp - previous_at))
+            if check.impossible and timestamp >= self.event_at[key_id]:
+                self.event_at[key_id] = timestamp
+                self.event_from[key_id] = previous_id
+                self.event_to[key_id] = location_id
+                self.event_speed[key_id] = min(check.speed_kmh, np.finfo(np.float32).max)
+
+        # Out-of-order events do not move the user back in time
+        if timestamp >= previous_at:
+            self.location_id[key_id] = location_id
+            self.seen_at[key_id] = timestamp
+        return check
+
+    def recent_impossible_travel(self, user_id: str, since: float) -> Optional[TravelCheck]:
+        """The user's latest impossible-travel event at or after `since`"""
+        key_id = self.index.lookup(user_id)
+        if key_id < 0 or self.event_to[key_id] < 0 or self.event_at[key_id] < since:
+            return None
+        from_location = self.geo_index.location(int(self.event_from[key_id]))
+        to_location = self.geo_index.location(int(self.event_to[key_id]))
+        distance = haversine_km(from_location.latitude, from_location.longitude,
+                                to_location.latitude, to_location.longitude)
+        speed = float(self.event_speed[key_id])
+        return TravelCheck(from_location, to_location, distance,
+                           distance / speed if speed else 0.0, speed, True)
+
+    def _check_travel(self, from_id: int, to_id: int, elapsed_seconds: float) -> TravelCheck:
+        from_location = self.geo_index.location(from_id)
+        to_location = self.geo_index.location(to_id)
+        distance = haversine_km(from_location.latitude, from_location.longitude,
+                                to_location.latitude, to_location.longitude)
+        elapsed_hours = elapsed_seconds / 3600.0
+        # Simultaneous events count as one minute apart to keep the speed finite
+        speed = distance / max(elapsed_hours, 1.0 / 60.0)
+        impossible = distance >= self.min_distance_km and speed > self.max_speed_kmh
+        return TravelCheck(from_location, to_location, distance, elapsed_hours, speed, impossible)
+
+    def observe_transaction(self, transaction) -> Optional[TravelCheck]:
+        """Observe a TransactionData's IP at its (clamped) timestamp"""
+        timestamp = min(transaction.timestamp.timestamp(), time.time())
+        return self.observe(transaction.user_id, transaction.ip_address, timestamp)
+
+    def _clear_state(self, key_ids: np.ndarray):
+        self.location_id[key_ids] = -1
+        self.seen_at[key_ids] = 0.0
+        self.event_at[key_ids] = 0.0
+        self.event_from[key_ids] = -1
+        self.event_to[key_ids] = -1
+        self.event_speed[key_ids] = 0.0
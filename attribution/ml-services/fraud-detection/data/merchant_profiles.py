@@ -0,0 +1,176 @@
+"""
+Merchant Profiles
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Per-merchant, per-(merchant, hour of day) and per-category transaction
+counts, amounts and fraud counts in one Count-Min sketch, so the long tail
+of merchants costs fixed memory (width x depth x 3 float64 counters,
+~6 MB by default) instead of a dictionary entry each. Counters decay
+exponentially with a configurable half-life, so baselines follow recent
+traffic. The busiest merchants are tracked as heavy hitters for reporting.
+
+Counts and amounts come from detect traffic. Fraud counts come only from
+confirmed labels (chargebacks, manual review) passed to record_labels,
+never from the detector's own decisions, which would feed back into the
+score through merchant_fraud_rate.
+
+At detect time the profiles are read as rule features on each
+transaction (before the transaction itself is counted):
+
+- merchant_transactions: estimated (decayed) transaction count
+- merchant_fraud_rate / category_fraud_rate: smoothed share of labelled fraud
+- merchant_amount_ratio: amount / merchant average amount
+- merchant_hour_share: share of the merchant's traffic in this hour of day
+
+Ratios are only reported once a merchant has min_transactions; before that
+the amount ratio reads 0 and the hour share 1 (no signal).
+"""
+
+import time
+import numpy as np
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from schemas.fraud import TransactionData
+from utils.count_min import CountMinSketch, HeavyHitters
+
+# Sketch channels
+COUNT, AMOUNT, FRAUD = 0, 1, 2
+# Sketch keys per transaction: merchant, merchant-hour, category
+KEYS_PER_TRANSACTION = 3
+
+
+@dataclass
+class MerchantLookup:
+    """Sketch positions and features of one batch, reused for the update"""
+    keys: List[str]
+    indices: np.ndarray
+    features: List[Dict[str, float]]
+
+
+class MerchantProfiles:
+    """Count-Min sketch merchant and category baselines"""
+
+    def __init__(self, width: int = 65536, depth: int = 4, heavy_hitters: int = 1000,
+                 half_life_seconds: float = 7 * 86400, decay_interval_seconds: float = 3600,
+                 min_transactions: float = 20.0, prior_fraud_rate: float = 0.01,
+                 prior_weight: float = 20.0):
+        self.sketch = CountMinSketch(width, depth, channels=3)
+        self.top_merchants = HeavyHitters(heavy_hitters)
+        self.half_life_seconds = half_life_seconds
+        self.decay_interval_seconds = decay_interval_seconds
+        self.min_transactions = min_transactions
+        self.prior_fraud_rate = prior_fraud_rate
+        self.prior_weight = prior_weight
+        self._decayed_at = time.time()
+
+    @staticmethod
+    def transaction_keys(merchant_id: str, merchant_category: str, timestamp: datetime) -> List[str]:
+        """Sketch keys of one transaction, in KEYS_PER_TRANSACTION order"""
+        return [f"m:{merchant_id}", f"mh:{merchant_id}:{timestamp.hour}", f"c:{merchant_category}"]
+
+    @classmethod
+    def keys(cls, transactions: Sequence[TransactionData]) -> List[str]:
+        keys = []
+        for transaction in transactions:
+            keys.extend(cls.transaction_keys(
+                transaction.merchant_id, transaction.merchant_category, transaction.timestamp
+            ))
+        return keys
+
+    def lookup(self, transactions: Sequence[TransactionData]) -> MerchantLookup:
+        """Merchant features of a batch from one vectorized sketch query"""
+        keys = self.keys(transactions)
+        indices = self.sketch.indices(keys)
+        estimates = self.sketch.query(keys, indices).reshape(len(transactions), KEYS_PER_TRANSACTION, 3)
+        merchant, merchant_hour, category = estimates[:, 0], estimates[:, 1], estimates[:, 2]
+
+        counts = merchant[:, COUNT]
+        established = counts >= self.min_transactions
+        safe_counts = np.maximum(counts, 1.0)
+        amounts = np.array([transaction.amount for transaction in transactions], dtype=np.float64)
+        average_amounts = merchant[:, AMOUNT] / safe_counts
+
+        prior = self.prior_fraud_rate * self.prior_weight
+        merchant_fraud_rate = (merchant[:, FRAUD] + prior) / np.maximum(counts + self.prior_weight, 1e-9)
+        category_fraud_rate = (category[:, FRAUD] + prior) / np.maximum(category[:, COUNT] + self.prior_weight, 1e-9)
+        amount_ratio = np.where(established & (average_amounts > 0),
+                                amounts / np.maximum(average_amounts, 1e-9), 0.0)
+        hour_share = np.where(established, np.minimum(merchant_hour[:, COUNT] / safe_counts, 1.0), 1.0)
+
+        features = [
+            {
+                "merchant_transactions": round(float(count), 2),
+                "merchant_fraud_rate": round(float(merchant_rate), 4),
+                "merchant_amount_ratio": round(float(ratio), 3),
+                "merchant_hour_share": round(float(share), 4),
+                "category_fraud_rate": round(float(category_rate), 4)
+            }
+            for count, merchant_rate, ratio, share, category_rate in zip(
+                counts.tolist(), merchant_fraud_rate.tolist(), amount_ratio.tolist(),
+                hour_share.tolist(), category_fraud_rate.tolist()
+            )
+        ]
+        return MerchantLookup(keys, indices, features)
+
+    def update(self, lookup: MerchantLookup, transactions: Sequence[TransactionData],
+               now: Optional[float] = None):
+        """Count the volume and amount of a scored batch into every key of its transactions"""
+        self.maybe_decay(now)
+        values = np.array(
+            [[1.0, transaction.amount, 0.0] for transaction in transactions],
+            dtype=np.float64
+        ).reshape(len(transactions), 3)
+        self.sketch.add(lookup.keys, np.repeat(values, KEYS_PER_TRANSACTION, axis=0), lookup.indices)
+
+        merchant_keys = lookup.keys[::KEYS_PER_TRANSACTION]
+        counts = self.sketch.query(merchant_keys, lookup.indices[::KEYS_PER_TRANSACTION])[:, COUNT]
+        for key, count in zip(merchant_keys, counts.tolist()):
+            self.top_merchants.offer(key, count)
+
+    def record_labels(self, merchant_id: str, merchant_category: str, timestamp: datetime,
+                      is_fraud: bool, now: Optional[float] = None):
+        """Count a confirmed fraud label; legitimate labels only confirm the traffic already counted"""
+        self.maybe_decay(now)
+        if not is_fraud:
+            return
+        keys = self.transaction_keys(merchant_id, merchant_category, timestamp)
+        values = np.zeros((len(keys), 3), dtype=np.float64)
+        values[:, FRAUD] = 1.0
+        self.sketch.add(keys, values)
+
+    def maybe_decay(self, now: Optional[float] = None):
+        """Apply exponential forgetting once per decay interval"""
+        now = time.time() if now is None else now
+        elapsed = now - self._decayed_at
+        if elapsed < self.decay_interval_seconds or self.half_life_seconds <= 0:
+            return
+        factor = 0.5 ** (elapsed / self.half_life_seconds)
+        self.sketch.decay(factor)
+        self.top_merchants.decay(factor)
+        self._decayed_at = now
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Busiest merchants with their estimated profile"""
+        ranked = self.top_merchants.top(limit)
+        keys = [key for key, _ in ranked]
+        estimates = self.sketch.query(keys)
+        prior = self.prior_fraud_rate * self.prior_weight
+        return [
+            {
+                "merchant_id": key[2:],
+                "transactions": round(float(count), 2),
+                "avg_amount": round(float(amount / max(count, 1.0)), 2),
+                "fraud_rate": round(float((fraud + prior) / max(count + self.prior_weight, 1e-9)), 4)
+            }
+            for key, (count, amount, fraud) in zip(keys, estimates.tolist())
+        ]
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "width": self.sketch.width,
+            "depth": self.sketch.depth,
+            "memory_bytes": self.sketch.memory_bytes,
+            "heavy_hitters": len(self.top_merchants),
+            "half_life_seconds": self.half_life_seconds
+        }
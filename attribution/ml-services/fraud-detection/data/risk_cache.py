@@ -0,0 +1,122 @@
+"""
+Risk Assessment Cache
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Per-user cache of risk assessments keyed by (user_id, assessment_type,
+historical_window_days, include_external_data). Entries are dropped as soon
+as detect or anomaly traffic reports new activity for the user, expire after
+a TTL as a safety net, and the cache is bounded with LRU eviction.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+from schemas.fraud import RiskAssessmentRequest, RiskAssessmentResponse
+
+CacheKey = Tuple[str, str, int, bool]
+
+
+class RiskAssessmentCache:
+    """LRU + TTL cache of risk assessments with per-user invalidation"""
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float = 300.0,
+                 requests_counter=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.requests_counter = requests_counter
+
+        self._entries: "OrderedDict[CacheKey, Tuple[float, RiskAssessmentResponse]]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[CacheKey]] = {}
+        # Users with assessments being computed, and those invalidated meanwhile
+        self._in_flight: Dict[str, int] = {}
+        self._invalidated_in_flight: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(request: RiskAssessmentRequest) -> CacheKey:
+        return (
+            request.user_id,
+            request.assessment_type,
+            request.historical_window_days,
+            request.include_external_data
+        )
+
+    def get(self, key: CacheKey) -> Optional[RiskAssessmentResponse]:
+        """Cached assessment, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._count("miss")
+            return None
+
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self._count("miss")
+            return None
+
+        self._entries.move_to_end(key)
+        self._count("hit")
+        return response
+
+    def put(self, key: CacheKey, response: RiskAssessmentResponse):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        self._keys_by_user.setdefault(key[0], set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    async def get_or_compute(self, request: RiskAssessmentRequest,
+                             compute: Callable[[], Awaitable[RiskAssessmentResponse]]) -> RiskAssessmentResponse:
+        """Cached assessment for a request, computing and caching it on a miss"""
+        key = self.key(request)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        user_id = request.user_id
+        self._in_flight[user_id] = self._in_flight.get(user_id, 0) + 1
+        try:
+            response = await compute()
+            # Activity that arrived while computing makes the result stale
+            if user_id not in self._invalidated_in_flight:
+                self.put(key, response)
+            return response
+        finally:
+            remaining = self._in_flight[user_id] - 1
+            if remaining:
+                self._in_flight[user_id] = remaining
+            else:
+                del self._in_flight[user_id]
+                self._invalidated_in_flight.discard(user_id)
+
+    def invalidate(self, user_id: str) -> int:
+        """Drop every cached assessment of a user; returns the number dropped"""
+        if user_id in self._in_flight:
+            self._invalidated_in_flight.add(user_id)
+
+        keys = self._keys_by_user.pop(user_id, None)
+        if not keys:
+            return 0
+        for key in keys:
+            self._entries.pop(key, None)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+    def _remove(self, key: CacheKey):
+        self._entries.pop(key, None)
+        user_keys = self._keys_by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[key[0]]
+
+    def _count(self, result: str):
+        if self.requests_counter is not None:
+            self.requests_counter.labels(result=result).inc()
@@ -0,0 +1,140 @@
+"""
+Velocity Feature Store
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Server-side sliding-window transaction counters (count and amount) per user,
+card and device. Each key owns two fixed-size ring buffers of time buckets
+in preallocated NumPy arrays: 12 x 5 minutes for the 1h window and
+24 x 1 hour for the 24h window (~230 bytes per key). Idle keys are evicted,
+and when the store is full the least recently seen keys make room.
+"""
+
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+from schemas.fraud import FraudDetectionRequest
+from utils.key_index import KeyedStateStore
+
+COUNT_MAX = np.iinfo(np.uint16).max
+
+
+@dataclass
+class VelocitySnapshot:
+    """Windowed counters for one key"""
+    count_1h: int = 0
+    amount_1h: float = 0.0
+    count_24h: int = 0
+    amount_24h: float = 0.0
+
+
+class BucketRing:
+    """Ring of time buckets for every key of a store"""
+
+    def __init__(self, capacity: int, bucket_seconds: int, num_buckets: int):
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = num_buckets
+        self.counts = np.zeros((capacity, num_buckets), dtype=np.uint16)
+        self.amounts = np.zeros((capacity, num_buckets), dtype=np.float32)
+        # Absolute bucket number of the newest bucket written per key
+        self.head = np.zeros(capacity, dtype=np.int32)
+
+    def advance(self, key_id: int, bucket: int):
+        """Move a key's ring forward to `bucket`, clearing expired buckets"""
+        head = int(self.head[key_id])
+        if bucket <= head:
+            return
+
+        if bucket - head >= self.num_buckets:
+            self.counts[key_id] = 0
+            self.amounts[key_id] = 0.0
+        else:
+            expired = np.arange(head + 1, bucket + 1) % self.num_buckets
+            self.counts[key_id, expired] = 0
+            self.amounts[key_id, expired] = 0.0
+        self.head[key_id] = bucket
+
+    def add(self, key_id: int, timestamp: float, amount: float):
+        bucket = int(timestamp // self.bucket_seconds)
+        self.advance(key_id, bucket)
+
+        # Late events still count while their bucket is inside the window
+        if int(self.head[key_id]) - bucket >= self.num_buckets:
+            return
+        slot = bucket % self.num_buckets
+        if self.counts[key_id, slot] < COUNT_MAX:
+            self.counts[key_id, slot] += 1
+        self.amounts[key_id, slot] += amount
+
+    def window(self, key_id: int, timestamp: float) -> Tuple[int, float]:
+        """(count, amount) over the ring's window ending at `timestamp`"""
+        self.advance(key_id, int(timestamp // self.bucket_seconds))
+        return int(self.counts[key_id].sum()), float(self.amounts[key_id].sum())
+
+    def clear(self, key_ids: np.ndarray):
+        self.counts[key_ids] = 0
+        self.amounts[key_ids] = 0.0
+        self.head[key_ids] = 0
+
+
+class VelocityStore(KeyedStateStore):
+    """Sliding-window transaction velocity per user, card and device"""
+
+    def __init__(self, capacity: int = 1_000_000, idle_ttl_seconds: int = 48 * 3600,
+                 sweep_interval: int = 100_000):
+        super().__init__(capacity, idle_ttl_seconds, sweep_interval)
+        self.hourly = BucketRing(capacity, bucket_seconds=300, num_buckets=12)
+        self.daily = BucketRing(capacity, bucket_seconds=3600, num_buckets=24)
+
+    def record(self, key: str, amount: float, timestamp: float) -> VelocitySnapshot:
+        """Count a transaction for a key and return its updated windows"""
+        key_id, _ = self.touch(key, timestamp)
+        self.hourly.add(key_id, timestamp, amount)
+        self.daily.add(key_id, timestamp, amount)
+        return self._snapshot(key_id, timestamp)
+
+    def get(self, key: str, timestamp: Optional[float] = None) -> VelocitySnapshot:
+        """Windowed counters for a key without recording a transaction"""
+        key_id = self.index.lookup(key)
+        if key_id < 0:
+            return VelocitySnapshot()
+        return self._snapshot(key_id, time.time() if timestamp is None else timestamp)
+
+    def record_transaction(self, request: FraudDetectionRequest) -> Dict[str, VelocitySnapshot]:
+        """Record a detect request for all its velocity keys"""
+        transaction = request.transaction_data
+        # Client clocks ahead of ours must not push the windows into the future
+        timestamp = min(transaction.timestamp.timestamp(), time.time())
+        return {
+            key: self.record(key, transaction.amount, timestamp)
+            for key in velocity_keys(request)
+        }
+
+    def _clear_state(self, key_ids: np.ndarray):
+        self.hourly.clear(key_ids)
+        self.daily.clear(key_ids)
+
+    def _snapshot(self, key_id: int, timestamp: float) -> VelocitySnapshot:
+        count_1h, amount_1h = self.hourly.window(key_id, timestamp)
+        count_24h, amount_24h = self.daily.window(key_id, timestamp)
+        return VelocitySnapshot(count_1h, amount_1h, count_24h, amount_24h)
+
+
+def user_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def velocity_keys(request: FraudDetectionRequest) -> List[str]:
+    """Velocity keys of a request: user, plus card and device when known"""
+    transaction = request.transaction_data
+    keys = [user_key(transaction.user_id)]
+
+    card = request.context_data.get('card_fingerprint') or request.context_data.get('card_id')
+    if card:
+        keys.append(f"card:{card}")
+
+    device = transaction.device_info.get('device_id')
+    if device:
+        keys.append(f"device:{device}")
+
+    return keys
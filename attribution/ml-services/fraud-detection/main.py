@@ -25,10 +25,13 @@ from prometheus_client import CONTENT_TYPE_LATEST
 # Import ML models
 from models import (
     TransactionFraudDetector,
-    UserBehaviorAnalyzer,
     AnomalyDetector,
-    RiskScorer
+    RiskScorer,
+    ShadowScorer,
+    RuleEngine
 )
+from models.shadow_scorer import parse_challenger_paths
+from models.anomaly_detector import BEHAVIOR_FEATURES
 
 # Import schemas
 from schemas import (
@@ -37,9 +40,30 @@ from schemas import (
     RiskAssessmentRequest,
     RiskAssessmentResponse,
     AnomalyDetectionRequest,
-    AnomalyDetectionResponse
+    AnomalyDetectionResponse,
+    FraudFeedbackRequest
 )
 
+from config import settings
+from utils.micro_batcher import MicroBatcher
+from data.feature_vectorizer import FeatureHasher
+from data.velocity_store import VelocityStore
+from data.behavior_baselines import BehaviorBaselineStore
+from data.behavior_covariance import BehaviorCovarianceModel
+from data.activity_profiles import ActivityProfileStore
+from data.risk_cache import RiskAssessmentCache
+from data.decision_cache import DecisionCache, IdempotencyConflict
+from data.fraud_stats import FraudStatsAggregator, parse_period
+from data.blocklists import Blocklists
+from data.link_graph import LinkGraph
+from data.geo import GeoIndex, UserLocationStore
+from data.merchant_profiles import MerchantProfiles
+from data.device_index import DeviceSimilarityIndex
+from utils.model_artifacts import load_artifact
+from utils.replay import RequestRecorder
+from utils.audit_log import AuditLogWriter
+from utils.calibration import apply_thresholds, load_thresholds
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -66,12 +90,202 @@ app.add_middleware(
 fraud_detections = Counter('fraud_detections_total', 'Total fraud detections', ['result'])
 fraud_detection_latency = Histogram('fraud_detection_latency_seconds', 'Fraud detection latency')
 api_requests = Counter('api_requests_total', 'Total API requests', ['endpoint', 'method'])
+detect_batch_size = Histogram(
+    'fraud_detection_batch_size', 'Transactions per batched fraud inference',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+detect_queue_delay = Histogram(
+    'fraud_detection_batch_queue_delay_seconds', 'Time a detect request waits for its batch',
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05)
+)
+detect_stage_latency = Histogram(
+    'fraud_detection_stage_latency_seconds', 'Latency of each scoring cascade stage per batch',
+    ['stage'],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+)
+detect_cascade_outcomes = Counter(
+    'fraud_detection_cascade_total', 'Transactions decided by the rules stage or passed to the model',
+    ['outcome']
+)
+anomaly_detector_latency = Histogram(
+    'fraud_anomaly_detector_latency_seconds', 'Latency of each anomaly check',
+    ['detector'],
+    buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025)
+)
+shadow_comparisons = Counter(
+    'fraud_shadow_comparisons_total', 'Challenger decisions compared with the champion',
+    ['challenger', 'agreement']
+)
+shadow_score_delta = Histogram(
+    'fraud_shadow_score_delta', 'Challenger minus champion fraud score',
+    ['challenger'],
+    buckets=(-0.5, -0.25, -0.1, -0.05, -0.01, 0.01, 0.05, 0.1, 0.25, 0.5)
+)
+shadow_dropped = Counter(
+    'fraud_shadow_dropped_total', 'Transactions not shadow-scored because the queue was full'
+)
+fraud_feedback_labels = Counter(
+    'fraud_feedback_labels_total', 'Confirmed transaction labels received', ['label', 'source']
+)
+audit_dropped = Counter(
+    'fraud_audit_dropped_total', 'Decisions not audit-logged because the writer queue was full'
+)
+audit_commit_latency = Histogram(
+    'fraud_audit_commit_seconds', 'Audit log group commit (flush + fsync) latency',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+risk_cache_requests = Counter(
+    'fraud_risk_cache_requests_total', 'Risk assessment cache lookups', ['result']
+)
+decision_cache_requests = Counter(
+    'fraud_decision_cache_requests_total', 'Detect requests served from, joined to or missing the decision cache',
+    ['result']
+)
+
+# Server-side feature state
+velocity_store = VelocityStore(
+    capacity=settings.VELOCITY_CAPACITY,
+    idle_ttl_seconds=settings.VELOCITY_IDLE_TTL_SECONDS
+)
+behavior_baselines = BehaviorBaselineStore(
+    capacity=settings.BASELINE_CAPACITY,
+    idle_ttl_seconds=settings.BASELINE_IDLE_TTL_SECONDS
+)
+activity_profiles = ActivityProfileStore(
+    capacity=settings.ACTIVITY_PROFILE_CAPACITY,
+    idle_ttl_seconds=settings.ACTIVITY_PROFILE_IDLE_TTL_SECONDS,
+    min_transactions=settings.ACTIVITY_PROFILE_MIN_TRANSACTIONS
+)
+user_locations = UserLocationStore(
+    GeoIndex(),
+    capacity=settings.LOCATION_CAPACITY,
+    idle_ttl_seconds=settings.LOCATION_IDLE_TTL_SECONDS,
+    max_speed_kmh=settings.IMPOSSIBLE_TRAVEL_SPEED_KMH,
+    min_distance_km=settings.IMPOSSIBLE_TRAVEL_MIN_DISTANCE_KM
+)
+device_index = DeviceSimilarityIndex(
+    capacity=settings.DEVICE_INDEX_CAPACITY,
+    idle_ttl_seconds=settings.DEVICE_INDEX_IDLE_TTL_SECONDS,
+    similarity_threshold=settings.DEVICE_SIMILARITY_THRESHOLD
+)
+merchant_profiles = MerchantProfiles(
+    width=settings.MERCHANT_SKETCH_WIDTH,
+    depth=settings.MERCHANT_SKETCH_DEPTH,
+    heavy_hitters=settings.MERCHANT_HEAVY_HITTERS,
+    half_life_seconds=settings.MERCHANT_HALF_LIFE_SECONDS
+)
+link_graph = LinkGraph(
+    capacity=settings.LINK_GRAPH_CAPACITY,
+    max_entity_merges=settings.LINK_GRAPH_MAX_ENTITY_MERGES
+)
+risk_cache = RiskAssessmentCache(
+    max_entries=settings.RISK_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RISK_CACHE_TTL_SECONDS,
+    requests_counter=risk_cache_requests
+)
+decision_cache = DecisionCache(
+    max_entries=settings.DECISION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.DECISION_CACHE_TTL_SECONDS,
+    requests_counter=decision_cache_requests
+) if settings.DECISION_CACHE_TTL_SECONDS > 0 else None
+blocklists = Blocklists(
+    {
+        "ip": settings.IP_BLOCKLIST_PATH,
+        "device": settings.DEVICE_BLOCKLIST_PATH,
+        "email_domain": settings.EMAIL_DOMAIN_BLOCKLIST_PATH
+    },
+    reload_interval_seconds=settings.BLOCKLIST_RELOAD_INTERVAL_SECONDS
+)
+
+# Declarative fraud rules shared by the detect rules stage and anomaly fallbacks
+rule_engine = RuleEngine(settings.RULES_PATH, reload_interval_seconds=settings.RULES_RELOAD_INTERVAL_SECONDS)
+
+# Rolling detect/anomaly statistics behind /stats and /patterns
+fraud_stats = FraudStatsAggregator()
+
+# Challenger models score detect traffic in the background
+shadow_scorer = ShadowScorer(
+    queue_size=settings.SHADOW_QUEUE_SIZE,
+    comparisons_counter=shadow_comparisons,
+    score_delta_histogram=shadow_score_delta,
+    dropped_counter=shadow_dropped
+)
+challenger_artifacts = {}
+
+# Optional traffic recording for the replay harness
+request_recorder = RequestRecorder(settings.REPLAY_RECORD_PATH) if settings.REPLAY_RECORD_PATH else None
+
+# Durable decision audit log, written off the request path
+audit_log = AuditLogWriter(
+    settings.AUDIT_LOG_DIR,
+    commit_interval_ms=settings.AUDIT_COMMIT_INTERVAL_MS,
+    commit_records=settings.AUDIT_COMMIT_RECORDS,
+    segment_bytes=settings.AUDIT_SEGMENT_BYTES,
+    queue_size=settings.AUDIT_QUEUE_SIZE,
+    dropped_counter=audit_dropped,
+    commit_histogram=audit_commit_latency
+) if settings.AUDIT_LOG_DIR else None
+
+# Hashing trick for high-cardinality categoricals (fixed model input width)
+# Swept for idle keys in the background once started
+state_stores = [velocity_store, behavior_baselines, activity_profiles, user_locations, device_index]
+feature_hasher = FeatureHasher(
+    settings.HASHED_FEATURE_WIDTH,
+    [field.strip() for field in settings.HASHED_FEATURE_FIELDS.split(",") if field.strip()]
+) if settings.HASHED_FEATURE_WIDTH > 0 else None
 
 # Initialize Fraud Detection Models
-transaction_detector = TransactionFraudDetector()
-behavior_analyzer = UserBehaviorAnalyzer()
-anomaly_detector = AnomalyDetector()
-risk_scorer = RiskScorer()
+transaction_detector = TransactionFraudDetector(
+    velocity_store=velocity_store,
+    baselines=behavior_baselines,
+    blocklists=blocklists,
+    link_graph=link_graph,
+    shadow_scorer=shadow_scorer,
+    user_locations=user_locations,
+    rules=rule_engine,
+    merchant_profiles=merchant_profiles,
+    device_index=device_index,
+    hasher=feature_hasher,
+    activity_profiles=activity_profiles,
+    cascade_band=(settings.CASCADE_LOWER, settings.CASCADE_UPPER),
+    stage_latency_histogram=detect_stage_latency,
+    cascade_counter=detect_cascade_outcomes
+)
+behavior_covariance = BehaviorCovarianceModel(
+    BEHAVIOR_FEATURES,
+    segment_field=settings.BEHAVIOR_COVARIANCE_SEGMENT_FIELD or None,
+    min_samples=settings.BEHAVIOR_COVARIANCE_MIN_SAMPLES,
+    alpha=settings.BEHAVIOR_COVARIANCE_ALPHA,
+    half_life_seconds=settings.BEHAVIOR_COVARIANCE_HALF_LIFE_SECONDS,
+    refit_interval_seconds=settings.BEHAVIOR_COVARIANCE_REFIT_INTERVAL_SECONDS
+)
+anomaly_detector = AnomalyDetector(
+    baselines=behavior_baselines, velocity_store=velocity_store, user_locations=user_locations, rules=rule_engine,
+    covariance=behavior_covariance,
+    activity_profiles=activity_profiles, unusual_hour_ratio=settings.ACTIVITY_UNUSUAL_HOUR_RATIO,
+    short_circuit=settings.ANOMALY_SHORT_CIRCUIT, detector_latency_histogram=anomaly_detector_latency
+)
+risk_scorer = RiskScorer(cache=risk_cache, link_graph=link_graph, device_index=device_index)
+
+fraud_models = {
+    "transaction_detector": transaction_detector,
+    "anomaly_detector": anomaly_detector,
+    "risk_scorer": risk_scorer
+}
+model_paths = {
+    "transaction_detector": settings.TRANSACTION_MODEL_PATH,
+    "anomaly_detector": settings.ANOMALY_MODEL_PATH,
+    "risk_scorer": settings.RISK_MODEL_PATH
+}
+
+# Concurrent detect requests share one batched model call
+detect_batcher = MicroBatcher(
+    transaction_detector.detect_batch,
+    max_batch_size=settings.BATCH_MAX_SIZE,
+    max_delay_ms=settings.BATCH_MAX_DELAY_MS,
+    batch_size_histogram=detect_batch_size,
+    queue_delay_histogram=detect_queue_delay
+)
 
 # ============================================================================
 # Health & Status Endpoints
@@ -86,10 +300,20 @@ async def health_check():
         "version": "1.0.0",
         "timestamp": datetime.utcnow().isoformat(),
         "models": {
-            "transaction_detector": "loaded",
-            "behavior_analyzer": "loaded",
-            "anomaly_detector": "loaded",
-            "risk_scorer": "loaded"
+            name: model.artifact.info() if model.artifact else {"status": "mock"}
+            for name, model in fraud_models.items()
+        },
+        "challengers": {name: artifact.info() for name, artifact in challenger_artifacts.items()},
+        "blocklists": blocklists.info(),
+        "rules": rule_engine.info(),
+        "merchant_profiles": merchant_profiles.info(),
+        "behavior_covariance": behavior_covariance.info(),
+        "audit_log": audit_log.info() if audit_log is not None else None,
+        "device_index": {"devices": len(device_index), "memory_bytes": device_index.memory_bytes},
+        "activity_profiles": {"users": len(activity_profiles), "memory_bytes": activity_profiles.memory_bytes},
+        "geoip": {
+            "ranges": len(user_locations.geo_index),
+            "memory_bytes": user_locations.geo_index.memory_bytes
         }
     }
 
@@ -106,17 +330,20 @@ async def metrics():
 async def detect_fraud(request: FraudDetectionRequest):
     """Detect fraud in real-time transaction"""
     api_requests.labels(endpoint='/fraud/detect', method='POST').inc()
+    _record('/api/fraud/detect', request)
 
-    with fraud_detection_latency.time():
-        result = await transaction_detector.detect(request)
-
-    fraud_detections.labels(result=result.risk_level).inc()
-    return result
+    if decision_cache is None:
+        return await _detect(request)
+    try:
+        return await decision_cache.get_or_compute(request, lambda: _detect(request))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 @app.post("/api/fraud/risk-assessment", response_model=RiskAssessmentResponse)
 async def assess_risk(request: RiskAssessmentRequest):
     """Assess overall fraud risk for user/transaction"""
     api_requests.labels(endpoint='/fraud/risk-assessment', method='POST').inc()
+    _record('/api/fraud/risk-assessment', request)
 
     with fraud_detection_latency.time():
         result = await risk_scorer.assess(request)
@@ -127,35 +354,52 @@ async def assess_risk(request: RiskAssessmentRequest):
 async def detect_anomalies(request: AnomalyDetectionRequest):
     """Detect behavioral anomalies"""
     api_requests.labels(endpoint='/fraud/anomaly-detection', method='POST').inc()
+    _record('/api/fraud/anomaly-detection', request)
 
-    with fraud_detection_latency.time():
-        result = await anomaly_detector.detect(request)
+    try:
+        with fraud_detection_latency.time():
+            result = await anomaly_detector.detect(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    risk_cache.invalidate(request.user_id)
+    fraud_stats.record_anomalies(result)
 
     return result
 
+@app.post("/api/fraud/feedback")
+async def record_feedback(feedback: FraudFeedbackRequest):
+    """Record a confirmed fraud or legitimate label for a scored transaction"""
+    api_requests.labels(endpoint='/fraud/feedback', method='POST').inc()
+    _record('/api/fraud/feedback', feedback)
+
+    transaction_detector.record_feedback(feedback)
+    fraud_stats.record_feedback(feedback.transaction_id, feedback.is_fraud)
+    # network_risk of the user's component may have changed
+    risk_cache.invalidate(feedback.user_id)
+    fraud_feedback_labels.labels(label='fraud' if feedback.is_fraud else 'legitimate', source=feedback.source).inc()
+
+    return {"transaction_id": feedback.transaction_id, "status": "recorded"}
+
+@app.get("/api/fraud/shadow/stats")
+async def get_shadow_stats():
+    """Agreement and score deltas of challenger models against the champion"""
+    api_requests.labels(endpoint='/fraud/shadow/stats', method='GET').inc()
+
+    return shadow_scorer.summary()
+
+@app.get("/api/fraud/merchants/top")
+async def get_top_merchants(limit: int = 20):
+    """Busiest merchants with sketch-estimated volume, average amount and fraud rate"""
+    api_requests.labels(endpoint='/fraud/merchants/top', method='GET').inc()
+
+    return {"merchants": merchant_profiles.top(max(1, min(limit, settings.MERCHANT_HEAVY_HITTERS)))}
+
 @app.get("/api/fraud/patterns")
 async def get_fraud_patterns(time_range: str = "24h"):
     """Get detected fraud patterns"""
     api_requests.labels(endpoint='/fraud/patterns', method='GET').inc()
 
-    # Mock patterns data
-    patterns = [
-        {
-            "pattern_id": "suspicious_velocity",
-            "description": "Unusually high transaction velocity",
-            "count": 45,
-            "severity": "high",
-            "detected_at": datetime.utcnow().isoformat()
-        },
-        {
-            "pattern_id": "geographic_anomaly",
-            "description": "Transactions from unusual locations",
-            "count": 23,
-            "severity": "medium",
-            "detected_at": datetime.utcnow().isoformat()
-        }
-    ]
-
+    patterns = fraud_stats.patterns(_period_seconds(time_range))
     return {"patterns": patterns, "time_range": time_range}
 
 @app.get("/api/fraud/stats")
@@ -163,14 +407,37 @@ async def get_fraud_stats(period: str = "24h"):
     """Get fraud detection statistics"""
     api_requests.labels(endpoint='/fraud/stats', method='GET').inc()
 
-    return {
-        "total_transactions_analyzed": 12450,
-        "fraud_detected": 128,
-        "fraud_rate": 1.03,
-        "false_positive_rate": 0.15,
-        "model_accuracy": 98.7,
-        "period": period
-    }
+    stats = fraud_stats.stats(_period_seconds(period))
+    return {**stats, "period": period}
+
+@app.get("/api/fraud/stats/snapshot")
+async def get_fraud_stats_snapshot():
+    """Raw stats buckets of this worker, mergeable with FraudStatsAggregator.merge"""
+    api_requests.labels(endpoint='/fraud/stats/snapshot', method='GET').inc()
+
+    return fraud_stats.to_dict()
+
+async def _detect(request: FraudDetectionRequest) -> FraudDetectionResponse:
+    """Score a transaction once and record the decision"""
+    with fraud_detection_latency.time():
+        result = await detect_batcher.submit(request)
+    if audit_log is not None:
+        audit_log.append(result)
+    risk_cache.invalidate(request.transaction_data.user_id)
+    fraud_stats.record_detection(result, request.transaction_data.merchant_category)
+
+    fraud_detections.labels(result=result.risk_level).inc()
+    return result
+
+def _record(path: str, request):
+    if request_recorder is not None:
+        request_recorder.record(path, request.model_dump(mode="json"))
+
+def _period_seconds(period: str) -> int:
+    try:
+        return parse_period(period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # ============================================================================
 # Startup & Shutdown Events
@@ -181,12 +448,44 @@ async def startup_event():
     """Initialize fraud detection models on startup"""
     logger.info("Starting Fraud Detection Service...")
     logger.info("Loading fraud detection models...")
+    if settings.THRESHOLDS_PATH:
+        apply_thresholds(load_thresholds(settings.THRESHOLDS_PATH), fraud_models)
+    for name, model in fraud_models.items():
+        if model_paths[name]:
+            model.load_model(model_paths[name])
+        else:
+            logger.info(f"No artifact configured for {name}, using mock scoring")
+    for name, path in parse_challenger_paths(settings.CHALLENGER_MODEL_PATHS).items():
+        challenger_artifacts[name] = load_artifact(f"challenger:{name}", path)
+        shadow_scorer.add_challenger(name, challenger_artifacts[name].model)
+    shadow_scorer.start()
+    if settings.GEOIP_CSV_PATH:
+        user_locations.geo_index = GeoIndex.from_csv(settings.GEOIP_CSV_PATH)
+    blocklists.start()
+    rule_engine.start()
+    behavior_covariance.start()
+    for store in state_stores:
+        store.start(settings.STATE_SWEEP_INTERVAL_SECONDS, settings.STATE_SWEEP_CHUNK)
+    if audit_log is not None:
+        audit_log.start()
+    detect_batcher.start()
     logger.info("Fraud Detection Service started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down Fraud Detection Service...")
+    await detect_batcher.stop()
+    await blocklists.stop()
+    await rule_engine.stop()
+    await behavior_covariance.stop()
+    for store in state_stores:
+        await store.stop()
+    await shadow_scorer.stop()
+    if request_recorder is not None:
+        request_recorder.close()
+    if audit_log is not None:
+        await asyncio.to_thread(audit_log.close)
 
 # ============================================================================
 # Main Entry Point
@@ -0,0 +1,20 @@
+"""
+Fraud Detection Models Package
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Collection of fraud detection and risk assessment models.
+"""
+
+from .transaction_fraud import TransactionFraudDetector
+from .anomaly_detector import AnomalyDetector
+from .risk_scorer import RiskScorer
+from .shadow_scorer import ShadowScorer
+from .rule_engine import RuleEngine
+
+__all__ = [
+    'TransactionFraudDetector',
+    'AnomalyDetector',
+    'RiskScorer',
+    'ShadowScorer',
+    'RuleEngine'
+]
@@ -2,23 +2,87 @@
 Anomaly Detection Model
 UnMoGrowP Attribution Platform - Fraud Detection Service
 
-ML model for detecting behavioral anomalies and unusual patterns.
+ML model for detecting behavioral anomalies and unusual patterns. Each
+anomaly type is a registered check; a request runs only the types in its
+`anomaly_types` (["all"] runs every check), and inputs shared by several
+checks (the user's baseline, the rule set) are computed on first use.
+With short-circuiting enabled the pipeline stops at the first anomaly that
+reaches the critical severity, so checks are registered cheapest first.
 """
 
 import asyncio
-from typing import List, Dict, Any
+import math
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Callable, List, Dict, Any, Optional
 from schemas.fraud import AnomalyDetectionRequest, AnomalyDetectionResponse
+from data.behavior_baselines import BehaviorBaselineStore, UserBaseline
+from data.behavior_covariance import BehaviorCovarianceModel
+from data.activity_profiles import ActivityProfileStore
+from data.fraud_stats import parse_period
+from data.geo import UserLocationStore
+from data.velocity_store import VelocityStore, user_key
+from models.rule_engine import RuleEngine
+from utils.model_artifacts import ModelArtifact, load_artifact
+
+# Features of preprocess_behavior_data, in model order
+BEHAVIOR_FEATURES = ('transaction_frequency', 'amount_variance', 'time_variance', 'location_variance')
+
+
+class DetectionContext:
+    """One request's inputs, shared by its anomaly checks and computed on first use"""
+
+    def __init__(self, detector: "AnomalyDetector", request: AnomalyDetectionRequest, now: float):
+        self.detector = detector
+        self.request = request
+        self.behavior_data = request.behavior_data
+        self.now = now
+
+    @cached_property
+    def baseline(self) -> Optional[UserBaseline]:
+        """Server-side baseline, which replaces caller-computed history when available"""
+        if self.detector.baselines is None:
+            return None
+        return self.detector.baselines.get(self.request.user_id)
+
+    @cached_property
+    def transaction_count_24h(self) -> int:
+        """User's transactions in the last 24h from the velocity store, else the caller's count"""
+        if self.detector.velocity_store is None:
+            return self.behavior_data.get('transaction_count_24h', 0)
+        return self.detector.velocity_store.get(user_key(self.request.user_id), self.now).count_24h
+
+    @cached_property
+    def rule_anomalies(self) -> Dict[str, Dict[str, Any]]:
+        """Declarative rules, used where no baseline or server-side signal decides"""
+        return self.detector._evaluate_rules(self.behavior_data)
+
+
+AnomalyCheck = Callable[[DetectionContext], Optional[Dict[str, Any]]]
 
 
 class AnomalyDetector:
     """Behavioral Anomaly Detection Model"""
 
-    def __init__(self):
+    def __init__(self, baselines: BehaviorBaselineStore = None, z_score_threshold: float = 3.0,
+                 velocity_store: VelocityStore = None,
+                 user_locations: UserLocationStore = None, rules: RuleEngine = None,
+                 covariance: BehaviorCovarianceModel = None,
+                 activity_profiles: ActivityProfileStore = None, unusual_hour_ratio: float = 0.1,
+                 short_circuit: bool = False, detector_latency_histogram=None):
         self.model = None  # Would load trained anomaly detection model (Isolation Forest, etc.)
-        self.anomaly_types = [
-            'spending_pattern', 'frequency_pattern', 'location_pattern',
-            'device_pattern', 'time_pattern', 'merchant_pattern'
-        ]
+        self.artifact: Optional[ModelArtifact] = None
+        self.baselines = baselines
+        self.velocity_store = velocity_store
+        self.user_locations = user_locations
+        self.rules = rules if rules is not None else RuleEngine()
+        self.covariance = covariance
+        self.activity_profiles = activity_profiles
+        self.unusual_hour_ratio = unusual_hour_ratio
+        self.z_score_threshold = z_score_threshold
+        self.short_circuit = short_circuit
+        self.detector_latency_histogram = detector_latency_histogram
         self.severity_thresholds = {
             'low': 0.3,
             'medium': 0.6,
@@ -26,55 +90,69 @@ class AnomalyDetector:
             'critical': 1.0
         }
 
+        # Anomaly checks in execution order
+        self.detectors: Dict[str, AnomalyCheck] = {}
+        self.register_detector('spending_pattern', self._check_spending_pattern)
+        self.register_detector('frequency_pattern', self._check_frequency_pattern)
+        self.register_detector('location_pattern', self._check_location_pattern)
+        # Device and merchant checks are rule-only until they get server-side signals
+        self.register_detector('device_pattern', self._rule_check('device_pattern'))
+        self.register_detector('time_pattern', self._check_time_pattern)
+        self.register_detector('merchant_pattern', self._rule_check('merchant_pattern'))
+        if covariance is not None:
+            self.register_detector('multivariate_pattern', self._check_multivariate_pattern)
+
+    @property
+    def anomaly_types(self) -> List[str]:
+        return list(self.detectors)
+
+    def register_detector(self, anomaly_type: str, check: AnomalyCheck):
+        """Add or replace the check for an anomaly type"""
+        self.detectors[anomaly_type] = check
+
+    def select_detectors(self, anomaly_types: List[str]) -> List[str]:
+        """Requested anomaly types in execution order ('spending' is short for 'spending_pattern')"""
+        if not anomaly_types or 'all' in anomaly_types:
+            return self.anomaly_types
+
+        requested = set()
+        for anomaly_type in anomaly_types:
+            name = anomaly_type if anomaly_type in self.detectors else f"{anomaly_type}_pattern"
+            if name not in self.detectors:
+                raise ValueError(
+                    f"Unknown anomaly type '{anomaly_type}', expected 'all' or one of {self.anomaly_types}"
+                )
+            requested.add(name)
+        return [name for name in self.detectors if name in requested]
+
     async def detect(self, request: AnomalyDetectionRequest) -> AnomalyDetectionResponse:
         """Detect behavioral anomalies"""
-        # Mock anomaly detection - replace with actual model inference
-        detected_anomalies = []
-
-        # Simulate different types of anomalies
-        behavior_data = request.behavior_data
+        selected = self.select_detectors(request.anomaly_types)
+        context = DetectionContext(self, request, time.time())
+        # Location history is kept current whichever checks run
+        self._observe_location(context)
 
-        # Check spending patterns
-        if behavior_data.get('avg_transaction_amount', 0) > behavior_data.get('historical_avg', 0) * 3:
-            detected_anomalies.append({
-                "type": "spending_pattern",
-                "description": "Unusually high transaction amounts",
-                "severity": 0.7,
-                "confidence": 0.85,
-                "details": {
-                    "current_avg": behavior_data.get('avg_transaction_amount', 0),
-                    "historical_avg": behavior_data.get('historical_avg', 0),
-                    "deviation_factor": 3.2
-                }
-            })
+        detected_anomalies = []
+        stopped = False
+        for anomaly_type in selected:
+            check_start = time.perf_counter()
+            anomaly = self.detectors[anomaly_type](context)
+            if self.detector_latency_histogram is not None:
+                self.detector_latency_histogram.labels(detector=anomaly_type).observe(
+                    time.perf_counter() - check_start
+                )
+            if anomaly:
+                detected_anomalies.append(anomaly)
+                if self.short_circuit and anomaly['severity'] >= self.severity_thresholds['high']:
+                    stopped = True
+                    break
 
-        # Check frequency patterns
-        transaction_count = behavior_data.get('transaction_count_24h', 0)
-        if transaction_count > 20:
-            detected_anomalies.append({
-                "type": "frequency_pattern",
-                "description": "Unusually high transaction frequency",
-                "severity": 0.6,
-                "confidence": 0.90,
-                "details": {
-                    "transaction_count_24h": transaction_count,
-                    "normal_range": "1-10",
-                    "time_window": "24h"
-                }
-            })
-
-        # Check location patterns
-        if behavior_data.get('new_location_transactions', 0) > 0:
-            detected_anomalies.append({
-                "type": "location_pattern",
-                "description": "Transactions from new geographic locations",
-                "severity": 0.5,
-                "confidence": 0.75,
-                "details": {
-                    "new_locations": behavior_data.get('new_locations', []),
-                    "distance_from_usual": behavior_data.get('location_distance_km', 0)
-                }
-            })
+        # Types defined only by custom rules run with the full set
+        if len(selected) == len(self.detectors) and not stopped:
+            detected_anomalies.extend(
+                anomaly for anomaly_type, anomaly in context.rule_anomalies.items()
+                if anomaly_type not in self.detectors
+            )
 
         # Calculate overall anomaly score
         if detected_anomalies:
@@ -93,12 +171,199 @@ class AnomalyDetector:
             recommended_actions=recommended_actions
         )
 
+    def _evaluate_rules(self, behavior_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Anomalies from the 'anomaly' rule set, the most severe per type"""
+        rule_set = self.rules.rule_set('anomaly')
+        matches = rule_set.matches(rule_set.extract([behavior_data]))[0]
+
+        anomalies: Dict[str, Dict[str, Any]] = {}
+        for rule, matched in zip(rule_set.rules, matches.tolist()):
+            if not matched:
+                continue
+            anomaly_type = rule.spec.get("type", rule.name)
+            severity = float(rule.spec.get("severity", 0.5))
+            if anomaly_type in anomalies and anomalies[anomaly_type]["severity"] >= severity:
+                continue
+            anomalies[anomaly_type] = {
+                "type": anomaly_type,
+                "description": rule.describe(behavior_data),
+                "severity": severity,
+                "confidence": float(rule.spec.get("confidence", 0.5)),
+                "details": {
+                    key: behavior_data.get(source, 0)
+                    for key, source in rule.spec.get("details", {}).items()
+                }
+            }
+        return anomalies
+
+    @staticmethod
+    def _rule_check(anomaly_type: str) -> AnomalyCheck:
+        """Check that reports the most severe matching rule of a type"""
+        return lambda context: context.rule_anomalies.get(anomaly_type)
+
+    def _check_spending_pattern(self, context: DetectionContext) -> Optional[Dict[str, Any]]:
+        """Spending anomaly as a z-score against the user's baseline"""
+        behavior_data, baseline = context.behavior_data, context.baseline
+        current_amount = behavior_data.get('transaction_amount', behavior_data.get('avg_transaction_amount'))
+
+        if baseline is not None and current_amount is not None:
+            z_score = baseline.amount_z_score(current_amount)
+            if z_score is None or z_score < self.z_score_threshold:
+                return None
+            return {
+                "type": "spending_pattern",
+                "description": "Unusually high transaction amounts",
+                "severity": self._z_score_severity(z_score),
+                "confidence": self._baseline_confidence(baseline),
+                "details": {
+                    "current_amount": current_amount,
+                    "baseline_mean": round(baseline.amount_mean, 2),
+                    "baseline_std": round(baseline.amount_std, 2),
+                    "baseline_ewma": round(baseline.amount_ewma, 2),
+                    "z_score": round(z_score, 2),
+                    "baseline_transactions": baseline.transaction_count
+                }
+            }
+
+        # No baseline yet: fall back to the rules on caller-provided history
+        return context.rule_anomalies.get('spending_pattern')
+
+    def _check_frequency_pattern(self, context: DetectionContext) -> Optional[Dict[str, Any]]:
+        """Frequency anomaly as a Poisson z-score against the user's baseline rate"""
+        baseline = context.baseline
+        transaction_count = context.transaction_count_24h if baseline is not None else None
+
+        z_score = baseline.frequency_z_score(transaction_count) if baseline is not None else None
+        if z_score is not None:
+            if z_score < self.z_score_threshold:
+                return None
+            return {
+                "type": "frequency_pattern",
+                "description": "Unusually high transaction frequency",
+                "severity": self._z_score_severity(z_score),
+                "confidence": self._baseline_confidence(baseline),
+                "details": {
+                    "transaction_count_24h": transaction_count,
+                    "expected_24h": round(baseline.expected_daily_transactions, 2),
+                    "z_score": round(z_score, 2),
+                    "time_window": "24h"
+                }
+            }
+
+        return context.rule_anomalies.get('frequency_pattern')
+
+    def _observe_location(self, context: DetectionContext):
+        """Record the request IP in the user's location history"""
+        ip_address = context.behavior_data.get('ip_address')
+        if self.user_locations is not None and ip_address:
+            self.user_locations.observe(context.request.user_id, ip_address, context.now)
+
+    def _check_location_pattern(self, context: DetectionContext) -> Optional[Dict[str, Any]]:
+        """Impossible travel from server-side geolocation, else the location rules"""
+        request = context.request
+
+        if self.user_locations is not None:
+            try:
+                window_seconds = parse_period(request.time_window)
+            except ValueError:
+                window_seconds = 86400
+            travel = self.user_locations.recent_impossible_travel(
+                request.user_id, context.now - window_seconds
+            )
+            if travel is not None:
+                return {
+                    "type": "location_pattern",
+                    "description": "Impossible travel between consecutive locations",
+                    "severity": 0.85,
+                    "confidence": 0.8,
+                    "details": {
+                        "from": f"{travel.from_location.city}, {travel.from_location.country_code}",
+                        "to": f"{travel.to_location.city}, {travel.to_location.country_code}",
+                        "distance_km": round(travel.distance_km, 1),
+                        "speed_kmh": round(travel.speed_kmh, 1)
+                    }
+                }
+
+        return context.rule_anomalies.get('location_pattern')
+
+    def _check_time_pattern(self, context: DetectionContext) -> Optional[Dict[str, Any]]:
+        """Activity at an hour of the week the user is rarely active in"""
+        activity = None
+        if self.activity_profiles is not None:
+            activity = self.activity_profiles.activity(context.request.user_id, self._event_time(context))
+        if activity is None:
+            return context.rule_anomalies.get('time_pattern')
+        if activity.relative_likelihood >= self.unusual_hour_ratio:
+            return None
+
+        rarity = math.log2(self.unusual_hour_ratio / max(activity.relative_likelihood, 1e-9))
+        return {
+            "type": "time_pattern",
+            "description": "Activity at an unusual hour of the week",
+            "severity": round(min(0.9, 0.6 + 0.1 * rarity), 3),
+            "confidence": round(min(0.95, activity.total / (activity.total + 50.0)), 2),
+            "details": {
+                "hour_of_week": activity.hour_of_week,
+                "hour_probability": round(activity.probability, 5),
+                "relative_likelihood": round(activity.relative_likelihood, 3),
+                "transactions_this_hour": activity.hour_count,
+                "profile_transactions": activity.total
+            }
+        }
+
+    @staticmethod
+    def _event_time(context: DetectionContext) -> float:
+        """behavior_data['timestamp'] (epoch seconds or ISO 8601), else now"""
+        value = context.behavior_data.get('timestamp')
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return context.now
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.timestamp()
+        return context.now
+
+    def _check_multivariate_pattern(self, context: DetectionContext) -> Optional[Dict[str, Any]]:
+        """Joint deviation of the behavior features from the population/segment baseline"""
+        features = self.preprocess_behavior_data(context.behavior_data)
+        vector = self.covariance.vector(features)
+        segment = self.covariance.segment_of(context.behavior_data)
+        score = self.covariance.score(vector, segment)
+
+        if score is None or score.p_value >= self.covariance.alpha:
+            # Only unflagged behavior feeds the baseline, so attacks do not become normal
+            self.covariance.update(vector, segment)
+            return None
+        surprise = -math.log10(max(score.p_value, 1e-300))
+        return {
+            "type": "multivariate_pattern",
+            "description": "Unusual combination of behavior features",
+            "severity": round(min(0.95, 0.6 + 0.05 * (surprise + math.log10(self.covariance.alpha))), 3),
+            "confidence": round(min(0.95, score.samples / (score.samples + 100.0)), 2),
+            "details": {
+                "mahalanobis_distance": round(math.sqrt(score.distance_squared), 3),
+                "p_value": score.p_value,
+                "baseline": score.segment or "population",
+                "features": {name: round(value, 4) for name, value in features.items()}
+            }
+        }
+
+    def _z_score_severity(self, z_score: float) -> float:
+        """Map a z-score above the threshold onto a 0.6-0.95 severity"""
+        return round(min(0.95, 0.6 + 0.05 * (z_score - self.z_score_threshold)), 3)
+
+    def _baseline_confidence(self, baseline: UserBaseline) -> float:
+        """More history gives more confidence in baseline-driven anomalies"""
+        return round(min(0.95, baseline.transaction_count / (baseline.transaction_count + 10.0)), 2)
+
     def load_model(self, model_path: str = None):
-        """Load trained anomaly detection model"""
-        # TODO: Implement actual model loading
-        # from sklearn.ensemble import IsolationForest
-        # self.model = joblib.load(model_path)
-        pass
+        """Load trained anomaly detection model (memory-mapped, shared across workers)"""
+        self.artifact = load_artifact("anomaly_detector", model_path)
+        self.model = self.artifact.model
 
     def _determine_severity_level(self, anomaly_score: float) -> str:
         """Determine severity level based on anomaly score"""
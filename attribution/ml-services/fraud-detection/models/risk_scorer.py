@@ -6,15 +6,24 @@ ML model for comprehensive risk assessment.
 """
 
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from schemas.fraud import RiskAssessmentRequest, RiskAssessmentResponse
+from data.risk_cache import RiskAssessmentCache
+from data.link_graph import LinkGraph
+from data.device_index import DeviceSimilarityIndex
+from utils.model_artifacts import ModelArtifact, load_artifact
 
 
 class RiskScorer:
     """Comprehensive Risk Assessment Model"""
 
-    def __init__(self):
+    def __init__(self, cache: RiskAssessmentCache = None, link_graph: LinkGraph = None,
+                 device_index: DeviceSimilarityIndex = None):
         self.model = None  # Would load trained risk scoring model
+        self.artifact: Optional[ModelArtifact] = None
+        self.cache = cache
+        self.link_graph = link_graph
+        self.device_index = device_index
         self.risk_components = [
             'transaction_risk', 'behavioral_risk', 'identity_risk',
             'velocity_risk', 'network_risk', 'device_risk'
@@ -27,7 +36,13 @@ class RiskScorer:
         }
 
     async def assess(self, request: RiskAssessmentRequest) -> RiskAssessmentResponse:
-        """Perform comprehensive risk assessment"""
+        """Perform comprehensive risk assessment, served from the cache when fresh"""
+        if self.cache is None:
+            return await self._assess(request)
+        return await self.cache.get_or_compute(request, lambda: self._assess(request))
+
+    async def _assess(self, request: RiskAssessmentRequest) -> RiskAssessmentResponse:
+        """Compute a risk assessment"""
         # Mock risk assessment - replace with actual model inference
         risk_components = {
             'transaction_risk': 0.2,
@@ -38,6 +53,16 @@ class RiskScorer:
             'device_risk': 0.25
         }
 
+        if self.link_graph is not None:
+            network_risk = self.link_graph.network_risk(request.user_id)
+            if network_risk is not None:
+                risk_components['network_risk'] = network_risk
+
+        if self.device_index is not None:
+            device_risk = self.device_index.device_risk(request.user_id)
+            if device_risk is not None:
+                risk_components['device_risk'] = device_risk
+
         # Calculate overall risk score (weighted average)
         weights = {
             'transaction_risk': 0.25,
@@ -67,10 +92,9 @@ class RiskScorer:
         )
 
     def load_model(self, model_path: str = None):
-        """Load trained risk scoring model"""
-        # TODO: Implement actual model loading
-        # self.model = joblib.load(model_path)
-        pass
+        """Load trained risk scoring model (memory-mapped, shared across workers)"""
+        self.artifact = load_artifact("risk_scorer", model_path)
+        self.model = self.artifact.model
 
     def _determine_risk_category(self, risk_score: float) -> str:
         """Determine risk category based on score"""
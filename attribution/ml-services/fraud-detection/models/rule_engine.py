@@ -0,0 +1,392 @@
+"""
+Fraud Rule Engine
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Declarative fraud rules compiled into NumPy predicates. A rule file holds
+named rule sets ("transaction" for the detect rules stage, "anomaly" for
+the anomaly detector fallbacks):
+
+    {
+      "version": "2025-10-24",
+      "rule_sets": {
+        "transaction": [
+          {"name": "high_amount", "factor": "High transaction amount", "impact": 0.4,
+           "description": "Transaction amount ${value} is above normal threshold",
+           "when": {"field": "amount", "op": ">", "value": 1000}}
+        ],
+        "anomaly": [
+          {"name": "spending_vs_history", "type": "spending_pattern", "severity": 0.7,
+           "confidence": 0.85, "description": "Unusually high transaction amounts",
+           "details": {"current_avg": "avg_transaction_amount"},
+           "when": {"field": "avg_transaction_amount", "op": ">", "ref": "historical_avg", "scale": 3}}
+        ]
+      }
+    }
+
+Conditions are comparisons of a field against a constant (`value`), another
+field times `scale` (`ref`), a range (`between`) or a set (`in`), combined
+with `all`, `any` and `not`. Each rule set is compiled once into closures
+over a (rows x fields) value matrix, so a batch is evaluated with a few
+array operations per condition rather than per transaction. Missing fields
+read as 0; lists count their items.
+
+The rule file is reloaded when it changes; a file that fails to compile is
+logged and the previous rules stay active.
+
+Usage:
+    python -m models.rule_engine check rules.json
+    python -m models.rule_engine defaults > rules.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+Predicate = Callable[[np.ndarray], np.ndarray]
+
+COMPARISONS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal
+}
+
+DEFAULT_RULES: Dict[str, Any] = {
+    "version": "default",
+    "rule_sets": {
+        "transaction": [
+            {
+                "name": "high_amount",
+                "factor": "High transaction amount",
+                "impact": 0.4,
+                "description": "Transaction amount ${value} is above normal threshold",
+                "when": {"field": "amount", "op": ">", "value": 1000}
+            },
+            {
+                "name": "high_velocity",
+                "factor": "High transaction velocity",
+                "impact": 0.35,
+                "description": "{value} transactions in the last hour",
+                "when": {"field": "velocity_1h", "op": ">", "value": 5}
+            },
+            {
+                "name": "shared_device_profile",
+                "factor": "Device shared across accounts",
+                "impact": 0.3,
+                "description": "Device closely matches devices of {value} other accounts",
+                "when": {"field": "similar_device_accounts", "op": ">=", "value": 2}
+            },
+            {
+                # Needs confirmed labels from /api/fraud/feedback; enable in the rule file once they flow
+                "name": "high_risk_merchant",
+                "enabled": False,
+                "factor": "High-risk merchant",
+                "impact": 0.25,
+                "description": "{merchant_fraud_rate:.0%} of recent transactions at this merchant were fraudulent",
+                "when": {"all": [
+                    {"field": "merchant_fraud_rate", "op": ">", "value": 0.2},
+                    {"field": "merchant_transactions", "op": ">=", "value": 50}
+                ]}
+            }
+        ],
+        "anomaly": [
+            {
+                "name": "spending_vs_history",
+                "type": "spending_pattern",
+                "description": "Unusually high transaction amounts",
+                "severity": 0.7,
+                "confidence": 0.85,
+                "details": {"current_avg": "avg_transaction_amount", "historical_avg": "historical_avg"},
+                "when": {"field": "avg_transaction_amount", "op": ">", "ref": "historical_avg", "scale": 3}
+            },
+            {
+                "name": "high_frequency",
+                "type": "frequency_pattern",
+                "description": "Unusually high transaction frequency",
+                "severity": 0.6,
+                "confidence": 0.9,
+                "details": {"transaction_count_24h": "transaction_count_24h"},
+                "when": {"field": "transaction_count_24h", "op": ">", "value": 20}
+            },
+            {
+                "name": "new_locations",
+                "type": "location_pattern",
+                "description": "Transactions from new geographic locations",
+                "severity": 0.5,
+                "confidence": 0.75,
+                "details": {"new_locations": "new_locations", "distance_from_usual": "location_distance_km"},
+                "when": {"field": "new_location_transactions", "op": ">", "value": 0}
+            }
+        ]
+    }
+}
+
+
+@dataclass
+class Rule:
+    """One compiled rule: metadata plus a batch predicate"""
+    name: str
+    spec: Dict[str, Any]
+    predicate: Predicate
+    primary_field: str
+
+    @property
+    def impact(self) -> float:
+        return float(self.spec.get("impact", 0.0))
+
+    def describe(self, row: Dict[str, Any]) -> str:
+        """Rule description formatted with the row's fields ({value} is the primary field)"""
+        template = self.spec.get("description", self.name)
+        try:
+            return template.format_map({**row, "value": row.get(self.primary_field) or 0})
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+            return template
+
+
+@dataclass
+class CompiledRuleSet:
+    """Rules compiled against a fixed field order"""
+    rules: List[Rule]
+    fields: List[str]
+    impacts: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        self.impacts = np.array([rule.impact for rule in self.rules], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def extract(self, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """(rows x fields) value matrix of the fields the rules reference"""
+        return np.array(
+            [[_numeric(row.get(name)) for name in self.fields] for row in rows],
+            dtype=np.float64
+        ).reshape(len(rows), len(self.fields))
+
+    def matches(self, values: np.ndarray) -> np.ndarray:
+        """(rows x rules) boolean matrix of triggered rules"""
+        matches = np.zeros((len(values), len(self.rules)), dtype=bool)
+        for i, rule in enumerate(self.rules):
+            matches[:, i] = rule.predicate(values)
+        return matches
+
+    def scores(self, matches: np.ndarray) -> np.ndarray:
+        """Summed impact of the triggered rules per row"""
+        return matches @ self.impacts
+
+
+def _numeric(value: Any) -> float:
+    if value is None:
+        return 0.0
+    if isinstance(value, (list, tuple, set, dict)):
+        return float(len(value))
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _compile_condition(spec: Dict[str, Any], fields: Dict[str, int]) -> Predicate:
+    if not isinstance(spec, dict):
+        raise ValueError(f"Condition must be an object, got {spec!r}")
+
+    for combinator, reduce in (("all", np.logical_and.reduce), ("any", np.logical_or.reduce)):
+        if combinator in spec:
+            parts = [_compile_condition(part, fields) for part in spec[combinator]]
+            if not parts:
+                raise ValueError(f"'{combinator}' needs at least one condition")
+            if len(parts) == 1:
+                return parts[0]
+            return lambda values, parts=parts, reduce=reduce: reduce([part(values) for part in parts])
+    if "not" in spec:
+        inner = _compile_condition(spec["not"], fields)
+        return lambda values: ~inner(values)
+
+    if "field" not in spec:
+        raise ValueError(f"Condition needs 'field', 'all', 'any' or 'not': {spec!r}")
+    column = fields.setdefault(spec["field"], len(fields))
+    op = spec.get("op", ">")
+
+    if op == "between":
+        low, high = (float(bound) for bound in spec["value"])
+        return lambda values: (values[:, column] >= low) & (values[:, column] <= high)
+    if op == "in":
+        members = np.array([float(member) for member in spec["value"]], dtype=np.float64)
+        return lambda values: np.isin(values[:, column], members)
+    if op not in COMPARISONS:
+        raise ValueError(f"Unknown operator '{op}'")
+    compare = COMPARISONS[op]
+
+    if "ref" in spec:
+        ref_column = fields.setdefault(spec["ref"], len(fields))
+        scale = float(spec.get("scale", 1.0))
+        return lambda values: compare(values[:, column], values[:, ref_column] * scale)
+    if "value" not in spec:
+        raise ValueError(f"Condition on '{spec['field']}' needs 'value' or 'ref'")
+    threshold = float(spec["value"])
+    return lambda values: compare(values[:, column], threshold)
+
+
+def _first_field(spec: Dict[str, Any]) -> str:
+    if "field" in spec:
+        return spec["field"]
+    for key in ("all", "any"):
+        if key in spec:
+            return _first_field(spec[key][0])
+    return _first_field(spec["not"])
+
+
+def compile_rule_set(specs: List[Dict[str, Any]]) -> CompiledRuleSet:
+    """Compile rule specs, raising ValueError on the first invalid rule"""
+    if not isinstance(specs, list):
+        raise ValueError(f"Rule set must be a list of rules, got {type(specs).__name__}")
+    fields: Dict[str, int] = {}
+    rules = []
+    names = set()
+    for i, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            raise ValueError(f"Rule {i} must be an object, got {type(spec).__name__}")
+        name = spec.get("name") or f"rule_{i}"
+        if not isinstance(name, str):
+            raise ValueError(f"Rule {i} name must be a string")
+        if name in names:
+            raise ValueError(f"Duplicate rule name '{name}'")
+        names.add(name)
+        if spec.get("enabled", True) is False:
+            continue
+        if "when" not in spec:
+            raise ValueError(f"Rule '{name}' has no 'when' condition")
+        details = spec.get("details", {})
+        if not isinstance(details, dict) or not all(isinstance(source, str) for source in details.values()):
+            raise ValueError(f"Rule '{name}' 'details' must map names to field names")
+        try:
+            predicate = _compile_condition(spec["when"], fields)
+            float(spec.get("impact", 0.0))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid rule '{name}': {e}")
+        rules.append(Rule(name, spec, predicate, _first_field(spec["when"])))
+    return CompiledRuleSet(rules, list(fields))
+
+
+def compile_rules(document: Dict[str, Any]) -> Dict[str, CompiledRuleSet]:
+    if not isinstance(document, dict):
+        raise ValueError(f"Rule file must be an object, got {type(document).__name__}")
+    rule_sets = document.get("rule_sets")
+    if not isinstance(rule_sets, dict):
+        raise ValueError("Rule file needs a 'rule_sets' object")
+    return {name: compile_rule_set(specs) for name, specs in rule_sets.items()}
+
+
+class RuleEngine:
+    """Hot-reloadable compiled rule sets, falling back to DEFAULT_RULES"""
+
+    def __init__(self, path: Optional[str] = None, reload_interval_seconds: float = 30.0):
+        self.path = path
+        self.reload_interval_seconds = reload_interval_seconds
+        self.version = DEFAULT_RULES["version"]
+        self.loaded_at: Optional[float] = None
+        self._rule_sets = compile_rules(DEFAULT_RULES)
+        self._file_version = None
+        self._reload_task: Optional[asyncio.Task] = None
+
+    def rule_set(self, name: str) -> CompiledRuleSet:
+        """Current rule set (an empty one if the file does not define it)"""
+        rule_set = self._rule_sets.get(name)
+        return rule_set if rule_set is not None else CompiledRuleSet([], [])
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile the rule file if it changed; True if new rules were loaded"""
+        if not self.path:
+            return False
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            logger.warning(f"Rule file unavailable at {self.path}: {e}")
+            return False
+
+        file_version = (stat.st_mtime_ns, stat.st_size)
+        if not force and file_version == self._file_version:
+            return False
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                document = json.load(f)
+            rule_sets = compile_rules(document)
+        except (OSError, ValueError) as e:
+            # Keep evaluating the previous rules
+            logger.error(f"Failed to load rules from {self.path}: {e}")
+            self._file_version = file_version
+            return False
+
+        # Swapping the reference is atomic for batches being scored
+        self._rule_sets = rule_sets
+        self._file_version = file_version
+        self.version = str(document.get("version", stat.st_mtime_ns))
+        self.loaded_at = time.time()
+        logger.info(f"Loaded rules version {self.version} from {self.path}: "
+                    + ", ".join(f"{name}={len(rules)}" for name, rules in rule_sets.items()))
+        return True
+
+    def start(self):
+        """Load the rule file and start watching it"""
+        self.reload(force=True)
+        if self._reload_task is None and self.path and self.reload_interval_seconds > 0:
+            self._reload_task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self):
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "rule_sets": {name: len(rules) for name, rules in self._rule_sets.items()}
+        }
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.reload_interval_seconds)
+            # A bad save must never stop the watcher
+            try:
+                self.reload()
+            except Exception:
+                logger.exception(f"Rule reload from {self.path} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate fraud rule files")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check = subparsers.add_parser("check", help="Compile a rule file and report its rule sets")
+    check.add_argument("path")
+    subparsers.add_parser("defaults", help="Print the built-in rules as a rule file")
+    args = parser.parse_args()
+
+    if args.command == "defaults":
+        print(json.dumps(DEFAULT_RULES, indent=2))
+        return
+
+    with open(args.path, encoding="utf-8") as f:
+        rule_sets = compile_rules(json.load(f))
+    for name, rule_set in rule_sets.items():
+        print(f"{name}: {len(rule_set)} rules over {rule_set.fields}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Shadow Scoring
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Champion/challenger evaluation on live traffic. Scored detect batches are
+copied onto a bounded queue; a background task scores them with every
+challenger model (in a worker thread) and records agreement and score
+deltas against the champion. When the queue is full batches are dropped,
+so the champion response never waits on a challenger.
+"""
+
+import asyncio
+import logging
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChallengerStats:
+    """Running comparison of one challenger against the champion"""
+    transactions: int = 0
+    agreements: int = 0
+    delta_sum: float = 0.0
+    abs_delta_sum: float = 0.0
+    champion_fraud: int = 0
+    challenger_fraud: int = 0
+    errors: int = 0
+
+    def summary(self) -> Dict[str, Any]:
+        n = self.transactions
+        return {
+            "transactions": n,
+            "agreement_rate": round(self.agreements / n, 4) if n else None,
+            "mean_score_delta": round(self.delta_sum / n, 4) if n else None,
+            "mean_abs_score_delta": round(self.abs_delta_sum / n, 4) if n else None,
+            "champion_fraud": self.champion_fraud,
+            "challenger_fraud": self.challenger_fraud,
+            "errors": self.errors
+        }
+
+
+class ShadowScorer:
+    """Scores detect batches with challenger models off the request path"""
+
+    def __init__(self, challengers: Optional[Dict[str, Any]] = None, queue_size: int = 1000,
+                 decision_threshold: float = 0.5, comparisons_counter=None,
+                 score_delta_histogram=None, dropped_counter=None):
+        self.challengers = dict(challengers or {})
+        self.queue_size = queue_size
+        self.decision_threshold = decision_threshold
+        self.comparisons_counter = comparisons_counter
+        self.score_delta_histogram = score_delta_histogram
+        self.dropped_counter = dropped_counter
+
+        self.stats = {name: ChallengerStats() for name in self.challengers}
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.challengers)
+
+    def add_challenger(self, name: str, model: Any):
+        """Register a challenger model (anything with predict_proba)"""
+        self.challengers[name] = model
+        self.stats[name] = ChallengerStats()
+
+    def start(self):
+        if not self.enabled or self._worker is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        self._queue = None
+
+    def submit(self, feature_matrix: np.ndarray, champion_scores: np.ndarray) -> bool:
+        """Queue a scored batch for the challengers; False if it was dropped"""
+        if self._queue is None:
+            return False
+        try:
+            # The detector reuses its feature buffer, so the batch must be copied
+            self._queue.put_nowait((feature_matrix.copy(), np.asarray(champion_scores, dtype=np.float64).copy()))
+            return True
+        except asyncio.QueueFull:
+            self.dropped += len(champion_scores)
+            if self.dropped_counter is not None:
+                self.dropped_counter.inc(len(champion_scores))
+            return False
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "challengers": {name: stats.summary() for name, stats in self.stats.items()},
+            "dropped_transactions": self.dropped,
+            "queued_batches": self._queue.qsize() if self._queue is not None else 0
+        }
+
+    async def _run(self):
+        while True:
+            feature_matrix, champion_scores = await self._queue.get()
+            for name, model in self.challengers.items():
+                try:
+                    scores = await asyncio.to_thread(_predict, model, feature_matrix)
+                except Exception:
+                    logger.exception(f"Challenger {name} failed to score a batch")
+                    self.stats[name].errors += 1
+                    continue
+                self.record(name, champion_scores, scores)
+
+    def record(self, name: str, champion_scores: np.ndarray, challenger_scores: np.ndarray):
+        """Fold one batch of champion/challenger scores into the challenger's stats"""
+        deltas = challenger_scores - champion_scores
+        champion_fraud = champion_scores > self.decision_threshold
+        challenger_fraud = challenger_scores > self.decision_threshold
+        agreements = int(np.count_nonzero(champion_fraud == challenger_fraud))
+
+        stats = self.stats[name]
+        stats.transactions += len(deltas)
+        stats.agreements += agreements
+        stats.delta_sum += float(deltas.sum())
+        stats.abs_delta_sum += float(np.abs(deltas).sum())
+        stats.champion_fraud += int(np.count_nonzero(champion_fraud))
+        stats.challenger_fraud += int(np.count_nonzero(challenger_fraud))
+
+        if self.comparisons_counter is not None:
+            self.comparisons_counter.labels(challenger=name, agreement='yes').inc(agreements)
+            self.comparisons_counter.labels(challenger=name, agreement='no').inc(len(deltas) - agreements)
+        if self.score_delta_histogram is not None:
+            for delta in deltas.tolist():
+                self.score_delta_histogram.labels(challenger=name).observe(delta)
+
+
+def _predict(model, feature_matrix: np.ndarray) -> np.ndarray:
+    return np.asarray(model.predict_proba(feature_matrix)[:, 1], dtype=np.float64)
+
+
+def parse_challenger_paths(value: Optional[str]) -> Dict[str, str]:
+    """'name=path,name2=path2' -> {name: path}"""
+    challengers = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        name, separator, path = item.partition("=")
+        if not separator or not name.strip() or not path.strip():
+            raise ValueError(f"Invalid challenger '{item}', expected name=path")
+        challengers[name.strip()] = path.strip()
+    return challengers
@@ -2,19 +2,65 @@
 Transaction Fraud Detection Model
 UnMoGrowP Attribution Platform - Fraud Detection Service
 
-ML model for real-time transaction fraud detection.
+ML model for real-time transaction fraud detection. Scoring is a cascade:
+a vectorized rules stage scores every transaction, and only those whose
+rule score falls inside the uncertainty band go on to the model.
 """
 
 import asyncio
-from typing import List, Dict, Any
-from schemas.fraud import FraudDetectionRequest, FraudDetectionResponse
+import time
+import numpy as np
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from schemas.fraud import FraudDetectionRequest, FraudDetectionResponse, FraudFeedbackRequest
+from data.feature_vectorizer import FeatureHasher, FeatureVectorizer, PAYMENT_METHOD_ENCODING
+from data.velocity_store import VelocityStore
+from data.behavior_baselines import BehaviorBaselineStore
+from data.blocklists import Blocklists
+from data.link_graph import LinkGraph
+from data.geo import UserLocationStore
+from data.merchant_profiles import MerchantProfiles
+from data.device_index import DeviceSimilarityIndex
+from data.activity_profiles import ActivityProfileStore
+from data.fraud_stats import NORMAL_PATTERN_FACTOR
+from models.shadow_scorer import ShadowScorer
+from models.rule_engine import RuleEngine
+from utils.model_artifacts import ModelArtifact, load_artifact
+
+
+BLOCKLIST_LABELS = {'ip': 'IP address', 'device': 'device', 'email_domain': 'email domain'}
+BLOCKLIST_IMPACT = 0.5
+IMPOSSIBLE_TRAVEL_IMPACT = 0.45
 
 
 class TransactionFraudDetector:
     """Machine Learning model for transaction fraud detection"""
 
-    def __init__(self):
+    def __init__(self, velocity_store: VelocityStore = None,
+                 baselines: BehaviorBaselineStore = None,
+                 blocklists: Blocklists = None,
+                 link_graph: LinkGraph = None,
+                 shadow_scorer: ShadowScorer = None,
+                 user_locations: UserLocationStore = None,
+                 rules: RuleEngine = None,
+                 merchant_profiles: MerchantProfiles = None,
+                 device_index: DeviceSimilarityIndex = None,
+                 hasher: FeatureHasher = None,
+                 activity_profiles: ActivityProfileStore = None,
+                 cascade_band: Tuple[float, float] = (0.0, 1.0),
+                 stage_latency_histogram=None, cascade_counter=None):
         self.model = None  # Would load trained fraud detection model
+        self.artifact: Optional[ModelArtifact] = None
+        self.velocity_store = velocity_store
+        self.baselines = baselines
+        self.blocklists = blocklists
+        self.link_graph = link_graph
+        self.shadow_scorer = shadow_scorer
+        self.user_locations = user_locations
+        self.rules = rules if rules is not None else RuleEngine()
+        self.merchant_profiles = merchant_profiles
+        self.device_index = device_index
+        self.activity_profiles = activity_profiles
         self.features = [
             'transaction_amount', 'user_age_days', 'transaction_hour',
             'payment_method', 'device_type', 'location_risk_score',
@@ -24,43 +70,265 @@ class TransactionFraudDetector:
         self.risk_thresholds = {
             'low': 0.3,
             'medium': 0.6,
-            'high': 1.0
+            'high': 1.0,
+            # is_fraud cut point
+            'decision': 0.5
         }
+        # Calibrated per merchant category, see utils.calibration
+        self.segment_thresholds: Dict[str, Dict[str, float]] = {}
+        # Hashed categorical columns (if any) follow the named features
+        self.hasher = hasher
+        self.vectorizer = FeatureVectorizer(self.features, hasher)
+        self._feature_buffer = self.vectorizer.allocate(64)
+
+        # Rule scores inside [lower, upper] go to the model; outside, the rules decide
+        self.cascade_lower, self.cascade_upper = cascade_band
+        self.stage_latency_histogram = stage_latency_histogram
+        self.cascade_counter = cascade_counter
 
     async def detect(self, request: FraudDetectionRequest) -> FraudDetectionResponse:
         """Detect fraud in transaction"""
-        # Mock fraud detection - replace with actual model inference
-        fraud_score = 0.25  # Would be model.predict_proba()
-
-        risk_level = self._determine_risk_level(fraud_score)
-        risk_factors = self._analyze_risk_factors(request.transaction_data)
-        recommendations = self._generate_recommendations(risk_level, fraud_score)
-
-        return FraudDetectionResponse(
-            transaction_id=request.transaction_id,
-            user_id=request.user_id,
-            fraud_score=fraud_score,
-            risk_level=risk_level,
-            is_fraud=fraud_score > 0.5,
-            risk_factors=risk_factors,
-            recommendations=recommendations,
-            processing_time_ms=25.4
+        results = await self.detect_batch([request])
+        return results[0]
+
+    async def detect_batch(self, requests: List[FraudDetectionRequest]) -> List[FraudDetectionResponse]:
+        """Detect fraud for a batch of transactions with one model call"""
+        start_time = time.perf_counter()
+
+        feature_matrix = self.build_feature_matrix(requests)
+        transactions = [request.transaction_data.model_dump() for request in requests]
+        if self.velocity_store is not None:
+            self._apply_velocity(requests, transactions, feature_matrix)
+        if self.blocklists is not None:
+            self._apply_blocklists(requests, transactions, feature_matrix)
+        if self.user_locations is not None:
+            self._apply_geo(requests, transactions, feature_matrix)
+        if self.device_index is not None:
+            self._apply_devices(requests, transactions)
+        if self.merchant_profiles is not None:
+            merchant_lookup = self.merchant_profiles.lookup([request.transaction_data for request in requests])
+            for transaction, merchant_features in zip(transactions, merchant_lookup.features):
+                transaction.update(merchant_features)
+        fraud_scores, stages = self._score_cascade(transactions, feature_matrix)
+
+        processing_time_ms = (time.perf_counter() - start_time) * 1000.0
+
+        if self.shadow_scorer is not None:
+            self.shadow_scorer.submit(feature_matrix, fraud_scores)
+
+        results = []
+        for request, transaction, fraud_score, stage in zip(requests, transactions, fraud_scores, stages):
+            fraud_score = float(fraud_score)
+            segment = request.transaction_data.merchant_category
+            risk_level = self._determine_risk_level(fraud_score, segment)
+            risk_factors = self._analyze_risk_factors(transaction)
+            recommendations = self._generate_recommendations(risk_level, fraud_score)
+
+            results.append(FraudDetectionResponse(
+                transaction_id=request.transaction_data.transaction_id,
+                user_id=request.user_data.user_id,
+                fraud_score=fraud_score,
+                risk_level=risk_level,
+                is_fraud=fraud_score >= self._thresholds(segment)['decision'],
+                risk_factors=risk_factors,
+                recommendations=recommendations,
+                processing_time_ms=processing_time_ms,
+                scoring_stage=stage
+            ))
+
+        # Baselines, activity and merchant profiles and the link graph learn from each transaction after it has been scored
+        if self.baselines is not None:
+            for request in requests:
+                self.baselines.update_from_transaction(request.transaction_data)
+        if self.activity_profiles is not None:
+            for request in requests:
+                self.activity_profiles.record_transaction(request.transaction_data)
+        if self.link_graph is not None:
+            for request in requests:
+                self.link_graph.add_transaction(request)
+        if self.merchant_profiles is not None:
+            self.merchant_profiles.update(merchant_lookup, [request.transaction_data for request in requests])
+
+        return results
+
+    def record_feedback(self, feedback: FraudFeedbackRequest):
+        """Learn a confirmed label (chargeback, manual review) for an already scored transaction"""
+        if self.merchant_profiles is not None:
+            self.merchant_profiles.record_labels(
+                feedback.merchant_id, feedback.merchant_category, feedback.timestamp, feedback.is_fraud
+            )
+        if self.link_graph is not None:
+            self.link_graph.record_label(feedback.user_id, feedback.is_fraud)
+
+    def build_feature_matrix(self, requests: List[FraudDetectionRequest]) -> np.ndarray:
+        """Fill the feature matrix for a batch, reusing the preallocated buffer"""
+        if len(requests) > len(self._feature_buffer):
+            self._feature_buffer = self.vectorizer.allocate(len(requests))
+
+        return self.vectorizer.transform(
+            [request.transaction_data for request in requests],
+            [request.user_data for request in requests],
+            out=self._feature_buffer
         )
 
+    def _apply_velocity(self, requests: List[FraudDetectionRequest],
+                        transactions: List[Dict[str, Any]], feature_matrix: np.ndarray):
+        """Record transactions in the velocity store and use server-side counts"""
+        velocity_1h_column = self.vectorizer.column('velocity_1h')
+        velocity_24h_column = self.vectorizer.column('velocity_24h')
+
+        for i, (request, transaction) in enumerate(zip(requests, transactions)):
+            snapshots = self.velocity_store.record_transaction(request)
+            user_velocity = snapshots[f"user:{request.transaction_data.user_id}"]
+            feature_matrix[i, velocity_1h_column] = user_velocity.count_1h
+            feature_matrix[i, velocity_24h_column] = user_velocity.count_24h
+
+            # Shared cards/devices count too when flagging velocity
+            transaction['velocity_1h'] = max(s.count_1h for s in snapshots.values())
+            transaction['velocity_24h'] = max(s.count_24h for s in snapshots.values())
+
+    def _apply_blocklists(self, requests: List[FraudDetectionRequest],
+                          transactions: List[Dict[str, Any]], feature_matrix: np.ndarray):
+        """Flag IPs, devices and email domains found in the blocklists"""
+        ip_column = self.vectorizer.column('ip_risk_score')
+        email_domain_column = self.vectorizer.column('email_domain_risk')
+
+        for i, (request, transaction) in enumerate(zip(requests, transactions)):
+            hits = self.blocklists.check(request)
+            if 'ip' in hits:
+                feature_matrix[i, ip_column] = 1.0
+            if 'email_domain' in hits:
+                feature_matrix[i, email_domain_column] = 1.0
+            transaction['blocklist_hits'] = hits
+
+    def _apply_geo(self, requests: List[FraudDetectionRequest],
+                   transactions: List[Dict[str, Any]], feature_matrix: np.ndarray):
+        """Locate each IP, score travel from the user's last location and flag impossible travel"""
+        location_column = self.vectorizer.column('location_risk_score')
+        max_speed = self.user_locations.max_speed_kmh
+
+        for i, (request, transaction) in enumerate(zip(requests, transactions)):
+            check = self.user_locations.observe_transaction(request.transaction_data)
+            if check is None:
+                continue
+            feature_matrix[i, location_column] = 1.0 if check.impossible else min(1.0, check.speed_kmh / max_speed)
+            if check.impossible:
+                transaction['impossible_travel'] = {
+                    "from": f"{check.from_location.city}, {check.from_location.country_code}",
+                    "to": f"{check.to_location.city}, {check.to_location.country_code}",
+                    "distance_km": round(check.distance_km, 1),
+                    "elapsed_hours": round(check.elapsed_hours, 2),
+                    "speed_kmh": round(check.speed_kmh, 1)
+                }
+
+    def _apply_devices(self, requests: List[FraudDetectionRequest], transactions: List[Dict[str, Any]]):
+        """Count near-duplicate devices on other accounts and index each transaction's device"""
+        for request, transaction in zip(requests, transactions):
+            match = self.device_index.observe_transaction(request.transaction_data)
+            if match is not None:
+                transaction['similar_devices'] = match.similar_devices
+                transaction['similar_device_accounts'] = match.other_accounts
+
+    def rule_scores(self, transactions: List[Dict[str, Any]]) -> np.ndarray:
+        """Vectorized rules stage: summed impacts of the triggered risk rules
+
+        The triggered rules are recorded on each transaction as 'rule_factors'
+        so explanations use the same rule version as the score.
+        """
+        rule_set = self.rules.rule_set('transaction')
+        matches = rule_set.matches(rule_set.extract(transactions))
+        for row in np.nonzero(matches.any(axis=1))[0].tolist():
+            transactions[row]['rule_factors'] = [
+                {
+                    "factor": rule.spec.get("factor", rule.name),
+                    "impact": rule.impact,
+                    "description": rule.describe(transactions[row])
+                }
+                for rule, matched in zip(rule_set.rules, matches[row]) if matched
+            ]
+
+        blocklist_hits = np.array(
+            [len(transaction.get('blocklist_hits', ())) for transaction in transactions],
+            dtype=np.float64
+        )
+        impossible_travel = np.array(
+            ['impossible_travel' in transaction for transaction in transactions], dtype=np.float64
+        )
+        scores = (
+            rule_set.scores(matches)
+            + BLOCKLIST_IMPACT * blocklist_hits
+            + IMPOSSIBLE_TRAVEL_IMPACT * impossible_travel
+        )
+        return np.clip(scores, 0.0, 1.0)
+
+    def _score_cascade(self, transactions: List[Dict[str, Any]],
+                       feature_matrix: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+        """Fraud scores and the deciding stage ('rules' or 'model') per transaction"""
+        stage_start = time.perf_counter()
+        scores = self.rule_scores(transactions)
+        to_model = (scores >= self.cascade_lower) & (scores <= self.cascade_upper)
+        self._observe_stage("rules", stage_start)
+
+        if to_model.any():
+            stage_start = time.perf_counter()
+            rows = np.nonzero(to_model)[0]
+            model_input = feature_matrix if len(rows) == len(scores) else feature_matrix[rows]
+            scores[rows] = self._predict_scores(model_input)
+            self._observe_stage("model", stage_start)
+
+        if self.cascade_counter is not None:
+            passed_low = int(np.count_nonzero(scores[~to_model] < self.cascade_lower))
+            passed_high = int(np.count_nonzero(~to_model)) - passed_low
+            self.cascade_counter.labels(outcome='rules_low').inc(passed_low)
+            self.cascade_counter.labels(outcome='rules_high').inc(passed_high)
+            self.cascade_counter.labels(outcome='model').inc(int(np.count_nonzero(to_model)))
+
+        stages = ['model' if routed else 'rules' for routed in to_model.tolist()]
+        return scores, stages
+
+    def _observe_stage(self, stage: str, stage_start: float):
+        if self.stage_latency_histogram is not None:
+            self.stage_latency_histogram.labels(stage=stage).observe(time.perf_counter() - stage_start)
+
+    def _predict_scores(self, feature_matrix: np.ndarray) -> np.ndarray:
+        """Fraud probability for each row of the feature matrix"""
+        if self.model is not None:
+            return self.model.predict_proba(feature_matrix)[:, 1]
+
+        # Mock fraud detection - replace with actual model inference
+        return np.full(len(feature_matrix), 0.25, dtype=np.float32)
+
     def load_model(self, model_path: str = None):
-        """Load trained fraud detection model"""
-        # TODO: Implement actual model loading
-        # self.model = joblib.load(model_path) or similar
-        pass
+        """Load trained fraud detection model (memory-mapped, shared across workers)"""
+        artifact = load_artifact("transaction_detector", model_path)
+        expected = self._model_input_width(artifact.model)
+        if expected is not None and expected != self.vectorizer.width:
+            raise ValueError(
+                f"Model {model_path} expects {expected} features, the vectorizer produces "
+                f"{self.vectorizer.width} (check FRAUD_HASHED_FEATURE_WIDTH)"
+            )
+        self.artifact = artifact
+        self.model = artifact.model
+
+    @staticmethod
+    def _model_input_width(model: Any) -> Optional[int]:
+        """Number of input features a loaded model expects, if it says"""
+        if hasattr(model, 'n_features_in_'):
+            return int(model.n_features_in_)
+        coef = getattr(model, 'coef', None)
+        return int(coef.shape[-1]) if coef is not None else None
 
     def preprocess_features(self, transaction_data: Dict[str, Any],
                           user_data: Dict[str, Any]) -> Dict[str, float]:
         """Preprocess features for fraud detection"""
-        features = {}
+        features = dict.fromkeys(self.features, 0.0)
 
-        # Transaction features
+        # Transaction features (the hour comes from the timestamp, as in FeatureVectorizer)
         features['transaction_amount'] = transaction_data.get('amount', 0)
-        features['transaction_hour'] = transaction_data.get('hour', 12)
+        timestamp = transaction_data.get('timestamp')
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        features['transaction_hour'] = timestamp.hour if timestamp is not None else transaction_data.get('hour', 12)
         features['payment_method'] = self._encode_payment_method(
             transaction_data.get('payment_method', 'unknown')
         )
@@ -73,45 +341,53 @@ class TransactionFraudDetector:
         features['velocity_1h'] = transaction_data.get('velocity_1h', 0)
         features['velocity_24h'] = transaction_data.get('velocity_24h', 0)
 
-        # Add default values for missing features
-        for feature in self.features:
-            if feature not in features:
-                features[feature] = 0.0
+        # Hashed categorical features
+        if self.hasher is not None:
+            features.update(dict.fromkeys(self.hasher.feature_names, 0.0))
+            features.update(self.hasher.to_dict(self.hasher.values(transaction_data, user_data)))
 
         return features
 
-    def _determine_risk_level(self, fraud_score: float) -> str:
+    def _thresholds(self, segment: Optional[str] = None) -> Dict[str, float]:
+        """Calibrated thresholds of a merchant category, else the global ones"""
+        return self.segment_thresholds.get(segment, self.risk_thresholds)
+
+    def _determine_risk_level(self, fraud_score: float, segment: Optional[str] = None) -> str:
         """Determine risk level based on fraud score"""
-        if fraud_score >= self.risk_thresholds['medium']:
+        thresholds = self._thresholds(segment)
+        if fraud_score >= thresholds['medium']:
             return "high"
-        elif fraud_score >= self.risk_thresholds['low']:
+        elif fraud_score >= thresholds['low']:
             return "medium"
         else:
             return "low"
 
     def _analyze_risk_factors(self, transaction_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Analyze contributing risk factors"""
-        factors = []
+        factors = list(transaction_data.get('rule_factors', []))
 
-        amount = transaction_data.get('amount', 0)
-        if amount > 1000:
+        for kind in transaction_data.get('blocklist_hits', []):
+            label = BLOCKLIST_LABELS[kind]
             factors.append({
-                "factor": "High transaction amount",
-                "impact": 0.4,
-                "description": f"Transaction amount ${amount} is above normal threshold"
+                "factor": f"Blocklisted {label}",
+                "impact": BLOCKLIST_IMPACT,
+                "description": f"The transaction {label} is on a fraud blocklist"
             })
 
-        velocity = transaction_data.get('velocity_1h', 0)
-        if velocity > 5:
+        travel = transaction_data.get('impossible_travel')
+        if travel:
             factors.append({
-                "factor": "High transaction velocity",
-                "impact": 0.35,
-                "description": f"{velocity} transactions in the last hour"
+                "factor": "Impossible travel",
+                "impact": IMPOSSIBLE_TRAVEL_IMPACT,
+                "description": (
+                    f"{travel['distance_km']} km from {travel['from']} to {travel['to']} "
+                    f"in {travel['elapsed_hours']} h"
+                )
             })
 
         if not factors:
             factors = [
-                {"factor": "Normal transaction pattern", "impact": 0.1, "description": "No significant risk factors identified"}
+                {"factor": NORMAL_PATTERN_FACTOR, "impact": 0.1, "description": "No significant risk factors identified"}
             ]
 
         return factors
@@ -141,12 +417,4 @@ class TransactionFraudDetector:
 
     def _encode_payment_method(self, payment_method: str) -> float:
         """Encode payment method as numeric value"""
-        encoding = {
-            'credit_card': 1.0,
-            'debit_card': 0.8,
-            'bank_transfer': 0.6,
-            'digital_wallet': 0.4,
-            'cryptocurrency': 0.2,
-            'unknown': 0.0
-        }
-        return encoding.get(payment_method.lower(), 0.0)
\ No newline at end of file
+        return PAYMENT_METHOD_ENCODING.encode(payment_method)
@@ -0,0 +1,30 @@
+"""
+Fraud Detection Schemas Package
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Pydantic models for fraud detection requests and responses.
+"""
+
+from .fraud import (
+    TransactionData,
+    UserData,
+    FraudDetectionRequest,
+    FraudDetectionResponse,
+    RiskAssessmentRequest,
+    RiskAssessmentResponse,
+    AnomalyDetectionRequest,
+    AnomalyDetectionResponse,
+    FraudFeedbackRequest
+)
+
+__all__ = [
+    'TransactionData',
+    'UserData',
+    'FraudDetectionRequest',
+    'FraudDetectionResponse',
+    'RiskAssessmentRequest',
+    'RiskAssessmentResponse',
+    'AnomalyDetectionRequest',
+    'AnomalyDetectionResponse',
+    'FraudFeedbackRequest'
+]
@@ -53,6 +53,7 @@ class FraudDetectionResponse(BaseModel):
     risk_factors: List[Dict[str, Any]]
     recommendations: List[str]
     processing_time_ms: float
+    scoring_stage: str = "model"  # rules, model
     model_version: str = "1.0.0"
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
@@ -91,4 +92,15 @@ class AnomalyDetectionResponse(BaseModel):
     anomaly_score: float = Field(..., ge=0.0, le=1.0)
     severity_level: str  # low, medium, high, critical
     recommended_actions: List[str]
-    detection_timestamp: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    detection_timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Confirmed label for a scored transaction (chargeback, manual review)
+class FraudFeedbackRequest(BaseModel):
+    transaction_id: str
+    user_id: str
+    merchant_id: str
+    merchant_category: str
+    timestamp: datetime
+    is_fraud: bool
+    source: str = "chargeback"  # chargeback, manual_review, customer_report
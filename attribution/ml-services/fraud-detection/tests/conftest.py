@@ -0,0 +1,50 @@
+"""
+Test configuration and fixtures for Fraud Detection Service
+UnMoGrowP Attribution Platform
+
+Provides shared test fixtures and mock fraud detection requests.
+"""
+
+import pytest
+from datetime import datetime
+
+# Make service modules importable
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from schemas.fraud import FraudDetectionRequest
+
+
+# =============================================================================
+# Mock Data Fixtures
+# =============================================================================
+
+@pytest.fixture
+def make_detection_request():
+    """Factory for fraud detection requests"""
+    def _make(transaction_id="txn_1", user_id="user_12345", amount=120.0,
+              timestamp=None, **transaction_overrides):
+        transaction_data = {
+            "transaction_id": transaction_id,
+            "user_id": user_id,
+            "amount": amount,
+            "payment_method": "credit_card",
+            "merchant_id": "merchant_1",
+            "merchant_category": "electronics",
+            "timestamp": timestamp or datetime(2025, 10, 23, 14, 30, 0),
+            "device_info": {"device_id": "device_1", "type": "mobile"},
+            "ip_address": "203.0.113.10"
+        }
+        transaction_data.update(transaction_overrides)
+        return FraudDetectionRequest(
+            transaction_data=transaction_data,
+            user_data={
+                "user_id": user_id,
+                "account_age_days": 400,
+                "email_domain": "example.com",
+                "risk_score": 0.2
+            }
+        )
+
+    return _make
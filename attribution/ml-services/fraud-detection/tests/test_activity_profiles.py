@@ -0,0 +1,128 @@
+"""
+Unit tests for hour-of-week activity profiles
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- hour_of_week / ActivityProfileStore
+- AnomalyDetector time_pattern check
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from data.activity_profiles import ActivityProfileStore, HOURS_PER_WEEK, hour_of_week
+from models.anomaly_detector import AnomalyDetector
+from models.transaction_fraud import TransactionFraudDetector
+from schemas.fraud import AnomalyDetectionRequest
+
+# Monday 2025-10-20 00:00 UTC
+MONDAY = datetime(2025, 10, 20, tzinfo=timezone.utc).timestamp()
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def office_hours(store, user_id, weeks=4):
+    """Weekday 10:00-16:00 activity"""
+    for week in range(weeks):
+        for day in range(5):
+            for hour in range(10, 17):
+                store.record(user_id, MONDAY + week * 7 * DAY + day * DAY + hour * HOUR)
+
+
+class TestActivityProfileStore:
+    """Test suite for hour_of_week and ActivityProfileStore"""
+
+    def test_hour_of_week(self):
+        assert hour_of_week(MONDAY) == 0
+        assert hour_of_week(MONDAY + 14 * HOUR + 30 * 60) == 14
+        assert hour_of_week(MONDAY + 6 * DAY + 23 * HOUR) == HOURS_PER_WEEK - 1
+        assert hour_of_week(MONDAY + 7 * DAY) == 0
+
+    def test_record_counts_and_halves_at_max_total(self):
+        store = ActivityProfileStore(capacity=16, slab_rows=8, max_total=10)
+        for _ in range(6):
+            store.record("u", MONDAY + 9 * HOUR)
+        for _ in range(3):
+            store.record("u", MONDAY + 20 * HOUR)
+
+        profile = store.profile("u")
+        assert profile[9] == 6 and profile[20] == 3 and profile.sum() == 9
+
+        store.record("u", MONDAY + 20 * HOUR)
+        profile = store.profile("u")
+        assert profile[9] == 3 and profile[20] == 2
+        assert store.profile("other") is None
+
+    def test_slabs_are_allocated_as_users_arrive(self):
+        store = ActivityProfileStore(capacity=64, slab_rows=8)
+        assert store.memory_bytes == 0
+
+        for i in range(9):
+            store.record(f"user_{i}", MONDAY)
+
+        assert len(store.slabs) == 2
+        assert store.memory_bytes == 2 * 8 * (HOURS_PER_WEEK * 2 + 4)
+        with pytest.raises(ValueError):
+            ActivityProfileStore(slab_rows=100)
+
+    def test_evicted_users_start_from_an_empty_profile(self):
+        store = ActivityProfileStore(capacity=16, idle_ttl_seconds=DAY, slab_rows=8, sweep_interval=1)
+        store.record("old", MONDAY)
+        store.record("new", MONDAY + 2 * DAY)
+        assert store.profile("old") is None
+
+        store.record("old", MONDAY + 2 * DAY + HOUR)
+        assert store.profile("old").sum() == 1
+
+    def test_unusual_hours_are_unlikely(self):
+        store = ActivityProfileStore(capacity=16)
+        office_hours(store, "u")
+        assert store.activity("u", MONDAY + 11 * HOUR) is not None
+        assert store.activity("fresh", MONDAY) is None
+
+        usual = store.activity("u", MONDAY + 7 * DAY + 13 * HOUR)
+        # Thursday 12:00 was never seen but is typical for the user
+        same_time_other_day = store.activity("u", MONDAY + 3 * DAY + 12 * HOUR)
+        night = store.activity("u", MONDAY + 6 * DAY + 3 * HOUR)
+
+        assert usual.relative_likelihood > 3.0
+        assert same_time_other_day.relative_likelihood > 3.0
+        assert night.hour_count == 0 and night.relative_likelihood < 0.1
+
+    def test_short_history_is_not_scored(self):
+        store = ActivityProfileStore(capacity=16, min_transactions=20)
+        for _ in range(19):
+            store.record("u", MONDAY + 12 * HOUR)
+        assert store.activity("u", MONDAY + 3 * HOUR) is None
+
+
+class TestTimePatternCheck:
+    """Test suite for the time_pattern anomaly check"""
+
+    @pytest.mark.asyncio
+    async def test_detector_flags_activity_at_an_unusual_hour(self):
+        store = ActivityProfileStore(capacity=16)
+        office_hours(store, "u")
+        detector = AnomalyDetector(activity_profiles=store)
+
+        usual = await detector.detect(AnomalyDetectionRequest(
+            user_id="u", anomaly_types=["time"], behavior_data={"timestamp": MONDAY + 7 * DAY + 11 * HOUR}
+        ))
+        unusual = await detector.detect(AnomalyDetectionRequest(
+            user_id="u", anomaly_types=["time"], behavior_data={"timestamp": "2025-11-16T03:15:00Z"}
+        ))
+
+        assert usual.anomalies_detected == []
+        assert unusual.anomalies_detected[0]["type"] == "time_pattern"
+        assert unusual.anomalies_detected[0]["severity"] >= 0.6
+        assert unusual.anomalies_detected[0]["details"]["hour_of_week"] == 6 * 24 + 3
+
+    @pytest.mark.asyncio
+    async def test_transactions_update_profiles(self, make_detection_request):
+        store = ActivityProfileStore(capacity=16)
+        detector = TransactionFraudDetector(activity_profiles=store)
+
+        await detector.detect(make_detection_request(timestamp=datetime(2025, 10, 23, 14, 30, tzinfo=timezone.utc)))
+
+        assert store.profile("user_12345")[3 * 24 + 14] == 1
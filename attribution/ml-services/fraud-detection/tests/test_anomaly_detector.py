@@ -0,0 +1,95 @@
+"""
+Unit tests for the anomaly detector pipeline
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- AnomalyDetector detector selection (anomaly_types)
+- Short-circuiting at critical severity
+- Per-detector latency reporting
+"""
+
+import pytest
+
+from models.anomaly_detector import AnomalyDetector
+from schemas.fraud import AnomalyDetectionRequest
+
+BEHAVIOR = {
+    "avg_transaction_amount": 900.0,
+    "historical_avg": 100.0,
+    "transaction_count_24h": 40,
+    "new_location_transactions": 2
+}
+
+
+class RecordingHistogram:
+    """Stand-in for a labelled prometheus Histogram"""
+
+    def __init__(self):
+        self.observations = {}
+
+    def labels(self, detector):
+        self._detector = detector
+        return self
+
+    def observe(self, value):
+        self.observations.setdefault(self._detector, []).append(value)
+
+
+def detected_types(response):
+    return [anomaly["type"] for anomaly in response.anomalies_detected]
+
+
+class TestAnomalyPipeline:
+    """Test suite for the AnomalyDetector check pipeline"""
+
+    @pytest.mark.asyncio
+    async def test_all_runs_every_check(self):
+        response = await AnomalyDetector().detect(AnomalyDetectionRequest(user_id="u1", behavior_data=BEHAVIOR))
+
+        assert detected_types(response) == ["spending_pattern", "frequency_pattern", "location_pattern"]
+
+    @pytest.mark.asyncio
+    async def test_only_requested_checks_run(self):
+        histogram = RecordingHistogram()
+        detector = AnomalyDetector(detector_latency_histogram=histogram)
+
+        response = await detector.detect(AnomalyDetectionRequest(
+            user_id="u1", behavior_data=BEHAVIOR, anomaly_types=["location_pattern", "frequency"]
+        ))
+
+        assert detected_types(response) == ["frequency_pattern", "location_pattern"]
+        assert set(histogram.observations) == {"frequency_pattern", "location_pattern"}
+
+    @pytest.mark.asyncio
+    async def test_unknown_type_is_rejected(self):
+        with pytest.raises(ValueError, match="Unknown anomaly type"):
+            await AnomalyDetector().detect(AnomalyDetectionRequest(
+                user_id="u1", behavior_data=BEHAVIOR, anomaly_types=["weather"]
+            ))
+
+    @pytest.mark.asyncio
+    async def test_short_circuit_stops_at_critical(self):
+        histogram = RecordingHistogram()
+        detector = AnomalyDetector(short_circuit=True, detector_latency_histogram=histogram)
+        detector.severity_thresholds['high'] = 0.7
+
+        response = await detector.detect(AnomalyDetectionRequest(user_id="u1", behavior_data=BEHAVIOR))
+
+        assert detected_types(response) == ["spending_pattern"]
+        assert response.severity_level == "critical"
+        assert list(histogram.observations) == ["spending_pattern"]
+
+    @pytest.mark.asyncio
+    async def test_registered_detector_runs_when_requested(self):
+        detector = AnomalyDetector()
+        detector.register_detector("session_pattern", lambda context: {
+            "type": "session_pattern", "description": "Scripted session", "severity": 0.4,
+            "confidence": 0.5, "details": {"user_id": context.request.user_id}
+        })
+
+        response = await detector.detect(AnomalyDetectionRequest(
+            user_id="u1", behavior_data={}, anomaly_types=["session"]
+        ))
+
+        assert detected_types(response) == ["session_pattern"]
+        assert response.anomalies_detected[0]["details"]["user_id"] == "u1"
@@ -0,0 +1,98 @@
+"""
+Unit tests for the decision audit log
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- AuditLogWriter
+- read_segment / iter_records
+"""
+
+import os
+
+from schemas.fraud import FraudDetectionResponse
+from utils.audit_log import AuditLogWriter, MAGIC, iter_records, read_segment, segment_paths
+
+
+def make_response(i: int) -> FraudDetectionResponse:
+    return FraudDetectionResponse(
+        transaction_id=f"txn_{i}",
+        user_id=f"user_{i % 7}",
+        fraud_score=0.25,
+        risk_level="low",
+        is_fraud=False,
+        risk_factors=[{"factor": "Normal transaction pattern", "impact": 0.1}],
+        recommendations=["Allow transaction to proceed"],
+        processing_time_ms=1.5
+    )
+
+
+class TestAuditLogWriter:
+    """Test suite for AuditLogWriter"""
+
+    def test_records_round_trip_in_order(self, tmp_path):
+        writer = AuditLogWriter(str(tmp_path), commit_records=32)
+        writer.start()
+        for i in range(100):
+            assert writer.append(make_response(i))
+
+        assert writer.flush(timeout=5)
+        writer.close()
+
+        records = list(iter_records(str(tmp_path)))
+        assert [record["transaction_id"] for record in records] == [f"txn_{i}" for i in range(100)]
+        assert records[0]["risk_factors"][0]["factor"] == "Normal transaction pattern"
+        assert writer.committed == 100
+
+    def test_group_commit_covers_many_records(self, tmp_path):
+        writer = AuditLogWriter(str(tmp_path), commit_interval_ms=10_000, commit_records=50)
+        # Queued before the writer starts, so the writer sees one backlog
+        for i in range(200):
+            writer.append(make_response(i))
+
+        writer.start()
+        writer.close()
+
+        assert writer.committed == 200
+        assert writer.commits <= 5
+
+    def test_segments_rotate_by_size(self, tmp_path):
+        writer = AuditLogWriter(str(tmp_path), segment_bytes=2048)
+        writer.start()
+        for i in range(60):
+            writer.append(make_response(i))
+        writer.close()
+
+        assert len(segment_paths(str(tmp_path))) > 1
+        assert len(list(iter_records(str(tmp_path)))) == 60
+
+    def test_full_queue_drops_instead_of_blocking(self, tmp_path):
+        writer = AuditLogWriter(str(tmp_path), queue_size=2)
+
+        results = [writer.append(make_response(i)) for i in range(3)]
+
+        assert results == [True, True, False]
+        assert writer.dropped == 1
+
+
+class TestAuditLogReader:
+    """Test suite for reading audit segments"""
+
+    def test_torn_tail_and_corrupt_records_end_the_segment(self, tmp_path):
+        writer = AuditLogWriter(str(tmp_path))
+        writer.start()
+        for i in range(3):
+            writer.append(make_response(i))
+        writer.close()
+        path = segment_paths(str(tmp_path))[0]
+
+        with open(path, "rb+") as f:
+            f.truncate(os.path.getsize(path) - 5)
+        assert [record["transaction_id"] for record in read_segment(path)] == ["txn_0", "txn_1"]
+
+        with open(path, "rb+") as f:
+            # Flip a payload byte of the first record
+            f.seek(len(MAGIC) + 8 + 3)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        assert list(read_segment(path)) == []
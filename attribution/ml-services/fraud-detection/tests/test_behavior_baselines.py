@@ -0,0 +1,102 @@
+"""
+Unit tests for per-user behavioral baselines
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- BehaviorBaselineStore
+- Baseline-driven AnomalyDetector checks
+"""
+
+import time
+
+import pytest
+import numpy as np
+
+from data.behavior_baselines import BehaviorBaselineStore
+from data.velocity_store import VelocityStore
+from models.anomaly_detector import AnomalyDetector
+from schemas.fraud import AnomalyDetectionRequest
+
+T0 = 1_760_000_400.0  # 09:00 UTC
+
+
+class TestBehaviorBaselineStore:
+    """Test suite for BehaviorBaselineStore"""
+
+    def test_welford_matches_numpy(self):
+        """Streaming mean/std match the batch computation"""
+        store = BehaviorBaselineStore(capacity=10, min_samples=1)
+        amounts = [12.0, 40.5, 33.0, 8.25, 19.0, 27.5]
+        for i, amount in enumerate(amounts):
+            store.update("user_1", amount, T0 + i * 3600)
+
+        baseline = store.get("user_1")
+        assert baseline.amount_mean == pytest.approx(np.mean(amounts))
+        assert baseline.amount_std == pytest.approx(np.std(amounts, ddof=1))
+        assert baseline.expected_daily_transactions == pytest.approx(24.0)
+
+    def test_min_samples(self):
+        """No baseline until enough samples exist"""
+        store = BehaviorBaselineStore(capacity=10, min_samples=5)
+        for day in range(4):
+            store.update("user_1", 10.0, T0 + day * 86400)
+        assert store.get("user_1") is None
+
+        store.update("user_1", 10.0, T0 + 4 * 86400)
+        assert store.get("user_1").transaction_count == 5
+
+
+class TestBaselineAnomalies:
+    """AnomalyDetector scores against server-side baselines"""
+
+    @pytest.fixture
+    def detector(self):
+        store = BehaviorBaselineStore(capacity=10)
+        for i in range(30):
+            store.update("user_1", 50.0 + (i % 5), T0 + i * 86400 / 3)
+        return AnomalyDetector(baselines=store)
+
+    @pytest.mark.asyncio
+    async def test_spending_z_score(self, detector):
+        """Large deviations from the user's mean amount are flagged"""
+        request = AnomalyDetectionRequest(
+            user_id="user_1", behavior_data={"transaction_amount": 400.0}
+        )
+        response = await detector.detect(request)
+
+        spending = [a for a in response.anomalies_detected if a["type"] == "spending_pattern"]
+        assert spending and spending[0]["details"]["z_score"] > 3
+
+    @pytest.mark.asyncio
+    async def test_frequency_z_score(self, detector):
+        """Counts far above the user's usual daily rate are flagged"""
+        normal = await detector.detect(AnomalyDetectionRequest(
+            user_id="user_1", behavior_data={"transaction_count_24h": 4}
+        ))
+        burst = await detector.detect(AnomalyDetectionRequest(
+            user_id="user_1", behavior_data={"transaction_count_24h": 15}
+        ))
+
+        assert not normal.anomalies_detected
+        assert burst.anomalies_detected[0]["type"] == "frequency_pattern"
+
+    @pytest.mark.asyncio
+    async def test_frequency_uses_server_side_velocity(self, detector):
+        """The 24h count comes from the velocity store, not the caller"""
+        velocity = VelocityStore(capacity=10)
+        now = time.time()
+        for i in range(15):
+            velocity.record("user:user_1", 20.0, now - i * 600)
+        detector.velocity_store = velocity
+
+        burst = await detector.detect(AnomalyDetectionRequest(
+            user_id="user_1", anomaly_types=["frequency"], behavior_data={"transaction_count_24h": 1}
+        ))
+        detector.velocity_store = VelocityStore(capacity=10)
+        detector.velocity_store.record("user:user_1", 20.0, now)
+        quiet = await detector.detect(AnomalyDetectionRequest(
+            user_id="user_1", anomaly_types=["frequency"], behavior_data={"transaction_count_24h": 50}
+        ))
+
+        assert burst.anomalies_detected[0]["details"]["transaction_count_24h"] == 15
+        assert not quiet.anomalies_detected
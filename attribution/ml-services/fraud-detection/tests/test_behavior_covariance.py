@@ -0,0 +1,103 @@
+"""
+Unit tests for streaming multivariate behavior baselines
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- chi2_sf / CovarianceAccumulator
+- BehaviorCovarianceModel
+- AnomalyDetector multivariate_pattern check
+"""
+
+import numpy as np
+import pytest
+
+from data.behavior_covariance import BehaviorCovarianceModel, CovarianceAccumulator, chi2_sf
+from models.anomaly_detector import AnomalyDetector, BEHAVIOR_FEATURES
+from schemas.fraud import AnomalyDetectionRequest
+
+
+def correlated_samples(n, seed=5):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0.0, 1.0, n)
+    return np.column_stack([base, base + rng.normal(0.0, 0.1, n), rng.normal(0.0, 1.0, n)])
+
+
+class TestCovarianceAccumulator:
+    """Test suite for chi2_sf and CovarianceAccumulator"""
+
+    @pytest.mark.parametrize("x,dof", [(3.841, 1), (5.991, 2), (7.815, 3), (9.488, 4), (11.070, 5)])
+    def test_chi2_sf_at_five_percent_critical_values(self, x, dof):
+        assert chi2_sf(x, dof) == pytest.approx(0.05, abs=2e-4)
+
+    def test_matches_batch_mean_and_covariance(self):
+        samples = correlated_samples(1000)
+        accumulator = CovarianceAccumulator(3)
+        for x in samples:
+            accumulator.update(x)
+
+        assert np.allclose(accumulator.mean, samples.mean(axis=0))
+        assert np.allclose(accumulator.covariance(), np.cov(samples, rowvar=False, bias=True))
+
+        accumulator.decay(0.5)
+        assert accumulator.weight == pytest.approx(500)
+        assert np.allclose(accumulator.covariance(), np.cov(samples, rowvar=False, bias=True))
+
+
+class TestBehaviorCovarianceModel:
+    """Test suite for BehaviorCovarianceModel"""
+
+    def test_flags_broken_correlation_that_marginals_miss(self):
+        model = BehaviorCovarianceModel(["a", "b", "c"], min_samples=100, half_life_seconds=0)
+        for x in correlated_samples(2000):
+            model.update(x)
+        assert model.score(np.zeros(3)) is None
+
+        model.refit()
+
+        # Each coordinate is within 1.5 standard deviations, but a and b disagree
+        assert model.score(np.array([1.5, 1.5, 0.0])).p_value > 0.05
+        assert model.score(np.array([1.5, -1.5, 0.0])).p_value < 1e-6
+
+    def test_segments_use_their_own_baseline_once_fitted(self):
+        model = BehaviorCovarianceModel(["a", "b", "c"], min_samples=100, half_life_seconds=0)
+        for x in correlated_samples(500):
+            model.update(x, segment="retail")
+        for x in correlated_samples(50, seed=6) + 10.0:
+            model.update(x, segment="travel")
+        model.refit()
+
+        assert model.score(np.zeros(3), "retail").segment == "retail"
+        # Too few travel samples: scored against the population
+        assert model.score(np.zeros(3), "travel").segment is None
+
+
+class TestMultivariateCheck:
+    """Test suite for the multivariate_pattern anomaly check"""
+
+    @pytest.mark.asyncio
+    async def test_detector_flags_unusual_behavior(self):
+        model = BehaviorCovarianceModel(BEHAVIOR_FEATURES, min_samples=100, half_life_seconds=0)
+        detector = AnomalyDetector(covariance=model)
+        rng = np.random.default_rng(9)
+        for _ in range(300):
+            count = int(rng.integers(1, 6))
+            await detector.detect(AnomalyDetectionRequest(user_id="u", anomaly_types=["multivariate"], behavior_data={
+                "transaction_count_24h": count, "amount_std": 10.0 + rng.normal(0, 2),
+                "amount_mean": 50.0, "time_pattern_score": 0.5 + rng.normal(0, 0.05),
+                "unique_locations": ["a"] * int(rng.integers(1, 3))
+            }))
+        model.refit()
+
+        usual = await detector.detect(AnomalyDetectionRequest(user_id="u", behavior_data={
+            "transaction_count_24h": 3, "amount_std": 10.0, "amount_mean": 50.0,
+            "time_pattern_score": 0.5, "unique_locations": ["a"]
+        }))
+        unusual = await detector.detect(AnomalyDetectionRequest(user_id="u", behavior_data={
+            "transaction_count_24h": 3, "amount_std": 10.0, "amount_mean": 50.0,
+            "time_pattern_score": 0.5, "unique_locations": ["a"] * 9
+        }))
+
+        assert "multivariate_pattern" not in [a["type"] for a in usual.anomalies_detected]
+        flagged = [a for a in unusual.anomalies_detected if a["type"] == "multivariate_pattern"]
+        assert flagged and flagged[0]["severity"] >= 0.6
+        assert model.population.samples == 301
@@ -0,0 +1,110 @@
+"""
+Unit tests for Bloom filter blocklists
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- BloomFilter
+- Blocklists
+- TransactionFraudDetector blocklist features
+"""
+
+import os
+import pytest
+
+from utils.bloom_filter import BloomFilter
+from data.blocklists import Blocklists
+from models.transaction_fraud import TransactionFraudDetector
+
+
+class TestBloomFilter:
+    """Test suite for BloomFilter"""
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        entries = [f"10.0.{i // 256}.{i % 256}" for i in range(20_000)]
+        bloom = BloomFilter.from_entries(entries, false_positive_rate=0.01)
+
+        assert all(entry in bloom for entry in entries)
+        false_positives = sum(f"192.168.{i // 256}.{i % 256}" in bloom for i in range(20_000))
+        assert false_positives / 20_000 < 0.02
+        assert bloom.size_bytes / len(entries) < 2.0
+
+    def test_saved_filter_is_memory_mapped(self, tmp_path):
+        """A saved filter answers the same lookups from a read-only mapping"""
+        path = str(tmp_path / "ips.bloom")
+        BloomFilter.from_entries(["1.2.3.4", "5.6.7.8"]).save(path)
+
+        loaded = BloomFilter.load(path)
+
+        assert "1.2.3.4" in loaded
+        assert "9.9.9.9" not in loaded
+        assert len(loaded) == 2
+        with pytest.raises(TypeError):
+            loaded.add("9.9.9.9")
+
+    def test_rejects_foreign_files(self, tmp_path):
+        path = tmp_path / "not_bloom.bloom"
+        path.write_bytes(b"\x00" * 64)
+        with pytest.raises(ValueError):
+            BloomFilter.load(str(path))
+
+
+class TestBlocklists:
+    """Test suite for Blocklists"""
+
+    def test_text_and_bloom_lists(self, tmp_path, make_detection_request):
+        ips = tmp_path / "ips.bloom"
+        BloomFilter.from_entries(["203.0.113.10"]).save(str(ips))
+        domains = tmp_path / "domains.txt"
+        domains.write_text("# disposable domains\nMailinator.com\n\n")
+
+        blocklists = Blocklists({"ip": str(ips), "email_domain": str(domains)})
+        blocklists.reload(force=True)
+        request = make_detection_request()
+        request.user_data.email_domain = "mailinator.com"
+
+        assert blocklists.check(request) == ["ip", "email_domain"]
+        assert blocklists.contains("email_domain", "user@MAILINATOR.com")
+        assert not blocklists.contains("device", "device_1")
+
+    def test_hot_reload_on_file_change(self, tmp_path):
+        """Changed files are picked up, unchanged ones are not reloaded"""
+        path = tmp_path / "devices.txt"
+        path.write_text("device_1\n")
+        blocklists = Blocklists({"device": str(path)})
+
+        assert blocklists.reload() == ["device"]
+        assert blocklists.reload() == []
+
+        path.write_text("device_2\ndevice_3\n")
+        os.utime(path, ns=(0, 10**9))
+        assert blocklists.reload() == ["device"]
+        assert blocklists.contains("device", "device_3")
+        assert not blocklists.contains("device", "device_1")
+
+    def test_broken_reload_keeps_previous_list(self, tmp_path):
+        path = tmp_path / "ips.bloom"
+        BloomFilter.from_entries(["1.2.3.4"]).save(str(path))
+        blocklists = Blocklists({"ip": str(path)})
+        blocklists.reload()
+
+        broken = tmp_path / "broken.bloom"
+        broken.write_bytes(b"garbage")
+        os.replace(broken, path)
+        assert blocklists.reload() == []
+        assert blocklists.contains("ip", "1.2.3.4")
+
+    @pytest.mark.asyncio
+    async def test_detector_flags_blocklisted_ip(self, tmp_path, make_detection_request):
+        path = tmp_path / "ips.txt"
+        path.write_text("203.0.113.10\n")
+        blocklists = Blocklists({"ip": str(path)})
+        blocklists.reload()
+        detector = TransactionFraudDetector(blocklists=blocklists)
+
+        matrix = detector.build_feature_matrix([make_detection_request()]).copy()
+        result = await detector.detect(make_detection_request())
+        detector._apply_blocklists([make_detection_request()], [{}], matrix)
+
+        assert matrix[0, detector.vectorizer.column('ip_risk_score')] == 1.0
+        assert matrix[0, detector.vectorizer.column('email_domain_risk')] == 0.0
+        assert any(factor["factor"] == "Blocklisted IP address" for factor in result.risk_factors)
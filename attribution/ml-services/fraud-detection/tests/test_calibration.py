@@ -0,0 +1,145 @@
+"""
+Unit tests for threshold calibration
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- OperatingCurve / calibrate
+- Threshold file loading and application
+"""
+
+import json
+import numpy as np
+import pytest
+
+from models.transaction_fraud import TransactionFraudDetector
+from models.anomaly_detector import AnomalyDetector
+from utils.calibration import (
+    FORMAT_VERSION, apply_thresholds, calibrate, load_thresholds, main, model_thresholds, operating_curve
+)
+
+
+def labeled_scores(n=20_000, seed=3):
+    rng = np.random.default_rng(seed)
+    labels = rng.random(n) < 0.05
+    scores = np.clip(np.where(labels, rng.normal(0.7, 0.15, n), rng.normal(0.3, 0.15, n)), 0, 1)
+    return np.round(scores, 3).astype(np.float32), labels
+
+
+def brute_force_cost(scores, labels, cost_fp, cost_fn):
+    best = (cost_fn * labels.sum(), 1.0)
+    for threshold in np.unique(scores):
+        flagged = scores >= threshold
+        cost = cost_fp * np.sum(flagged & ~labels) + cost_fn * np.sum(~flagged & labels)
+        best = min(best, (cost, float(threshold)))
+    return best
+
+
+class TestCalibration:
+    """Test suite for OperatingCurve and calibrate"""
+
+    def test_curve_counts_match_brute_force(self):
+        scores, labels = labeled_scores(2_000)
+        order = np.argsort(scores)[::-1]
+        curve = operating_curve(scores[order], labels[order])
+
+        for threshold, tp, fp in list(zip(curve.thresholds, curve.tps, curve.fps))[::37]:
+            flagged = scores >= threshold
+            assert tp == np.sum(flagged & labels)
+            assert fp == np.sum(flagged & ~labels)
+        assert curve.tps[-1] == labels.sum() and curve.fps[-1] == (~labels).sum()
+
+    def test_cost_optimal_threshold_and_auc(self):
+        scores, labels = labeled_scores(2_000)
+        order = np.argsort(scores)[::-1]
+        curve = operating_curve(scores[order], labels[order])
+
+        threshold, _ = curve.cost_optimal(cost_fp=1.0, cost_fn=10.0)
+
+        expected_cost, expected_threshold = brute_force_cost(scores, labels, 1.0, 10.0)
+        flagged = scores >= threshold
+        assert np.sum(flagged & ~labels) + 10.0 * np.sum(~flagged & labels) == expected_cost
+        assert threshold == pytest.approx(expected_threshold)
+        # Pairwise AUC: P(score_pos > score_neg) + ties / 2
+        positive, negative = scores[labels], scores[~labels]
+        pairwise = (np.mean(positive[:, None] > negative[None, :])
+                    + 0.5 * np.mean(positive[:, None] == negative[None, :]))
+        assert curve.auc() == pytest.approx(pairwise, abs=1e-9)
+
+    def test_boundaries_and_segments(self):
+        scores, labels = labeled_scores()
+        segments = np.arange(len(scores)) % 3
+        # Segment 2 scores are inflated, so it needs higher thresholds
+        scores = np.where(segments == 2, np.minimum(scores + 0.15, 1.0), scores).astype(np.float32)
+
+        result = calibrate(scores, labels, segments, ["books", "electronics", "gift_cards"])
+
+        review, cost_optimal, alert = result["boundaries"]
+        assert review <= cost_optimal <= alert
+        assert np.mean(scores[labels] >= review) >= 0.95
+        assert set(result["segments"]) == {"books", "electronics", "gift_cards"}
+        assert result["segments"]["gift_cards"]["boundaries"][1] > result["segments"]["books"]["boundaries"][1]
+
+    def test_every_boundary_reaches_the_transaction_detector(self):
+        """The alert cut is its high tier and the cost-optimal cut its is_fraud decision"""
+        thresholds = model_thresholds("transaction_detector", [0.2, 0.45, 0.8])
+
+        assert thresholds == {"low": 0.2, "medium": 0.8, "decision": 0.45, "high": 1.0}
+        assert model_thresholds("risk_scorer", [0.2, 0.45, 0.8]) == {
+            "low": 0.2, "medium": 0.45, "high": 0.8, "critical": 1.0
+        }
+
+    def test_requires_both_classes(self):
+        with pytest.raises(ValueError, match="both"):
+            calibrate(np.array([0.1, 0.2]), np.array([False, False]))
+
+
+class TestThresholdFile:
+    """Test suite for the threshold file round trip"""
+
+    def test_cli_output_is_applied_at_startup(self, tmp_path, make_detection_request):
+        scores, labels = labeled_scores()
+        segments = np.arange(len(scores)) % 2
+        np.save(tmp_path / "scores.npy", scores)
+        np.save(tmp_path / "labels.npy", labels)
+        np.save(tmp_path / "segments.npy", segments)
+        (tmp_path / "segment_names.json").write_text(json.dumps(["retail", "travel"]))
+        output = tmp_path / "thresholds.json"
+
+        main(["run", str(tmp_path), "--model", "transaction_detector", "--output", str(output)])
+        main(["run", str(tmp_path), "--model", "anomaly_detector", "--output", str(output)])
+
+        detector, anomaly_detector = TransactionFraudDetector(), AnomalyDetector()
+        document = load_thresholds(str(output))
+        apply_thresholds(document, {"transaction_detector": detector, "anomaly_detector": anomaly_detector})
+
+        entry = document["models"]["transaction_detector"]
+        assert detector.risk_thresholds == entry["thresholds"]
+        assert set(detector.segment_thresholds) == {"retail", "travel"}
+        assert set(anomaly_detector.severity_thresholds) == {"low", "medium", "high", "critical"}
+        medium = detector.segment_thresholds["travel"]["medium"]
+        assert detector._determine_risk_level(medium, "travel") == "high"
+        assert entry["thresholds"]["decision"] == entry["metrics"]["cost_optimal_threshold"]
+
+    @pytest.mark.asyncio
+    async def test_decision_threshold_drives_is_fraud(self, make_detection_request):
+        class FixedScoreDetector(TransactionFraudDetector):
+            def _predict_scores(self, feature_matrix):
+                return np.full(len(feature_matrix), 0.4)
+
+        detector = FixedScoreDetector()
+        detector.segment_thresholds = {"travel": {"low": 0.1, "medium": 0.8, "decision": 0.35, "high": 1.0}}
+
+        electronics = await detector.detect(make_detection_request())
+        travel = await detector.detect(make_detection_request(merchant_category="travel"))
+
+        assert not electronics.is_fraud
+        assert travel.is_fraud and travel.risk_level == "medium"
+
+    def test_rejects_wrong_keys(self, tmp_path):
+        path = tmp_path / "thresholds.json"
+        path.write_text(json.dumps({
+            "version": FORMAT_VERSION, "models": {"risk_scorer": {"thresholds": {"low": 0.2, "high": 0.9}}}
+        }))
+
+        with pytest.raises(ValueError, match="must have keys"):
+            load_thresholds(str(path))
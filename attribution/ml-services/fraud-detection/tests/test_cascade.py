@@ -0,0 +1,94 @@
+"""
+Unit tests for the scoring cascade
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- TransactionFraudDetector.rule_scores
+- TransactionFraudDetector cascade routing and metrics
+"""
+
+import numpy as np
+import pytest
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from models.transaction_fraud import TransactionFraudDetector
+
+
+class ConstantModel:
+    """Model stub that records how many rows it scored"""
+
+    def __init__(self, score):
+        self.score = score
+        self.rows_scored = 0
+
+    def predict_proba(self, features):
+        self.rows_scored += len(features)
+        return np.column_stack([1.0 - np.full(len(features), self.score), np.full(len(features), self.score)])
+
+
+def make_metrics():
+    registry = CollectorRegistry()
+    latency = Histogram('stage_latency_seconds', 'Stage latency', ['stage'], registry=registry)
+    outcomes = Counter('cascade', 'Cascade outcomes', ['outcome'], registry=registry)
+    return registry, latency, outcomes
+
+
+class TestCascade:
+    """Test suite for cascade scoring"""
+
+    def test_rule_scores_match_risk_factors(self):
+        detector = TransactionFraudDetector()
+        scores = detector.rule_scores([
+            {"amount": 50, "velocity_1h": 1},
+            {"amount": 1500, "velocity_1h": 1},
+            {"amount": 1500, "velocity_1h": 9},
+            {"amount": 1500, "velocity_1h": 9, "blocklist_hits": ["ip", "device"]},
+        ])
+
+        assert scores.tolist() == pytest.approx([0.0, 0.4, 0.75, 1.0])
+
+    @pytest.mark.asyncio
+    async def test_default_band_sends_everything_to_the_model(self, make_detection_request):
+        detector = TransactionFraudDetector()
+        detector.model = ConstantModel(0.42)
+
+        results = await detector.detect_batch([make_detection_request(), make_detection_request(amount=5000)])
+
+        assert detector.model.rows_scored == 2
+        assert [result.scoring_stage for result in results] == ["model", "model"]
+        assert results[0].fraud_score == pytest.approx(0.42)
+
+    @pytest.mark.asyncio
+    async def test_only_uncertain_transactions_reach_the_model(self, make_detection_request):
+        """Clear-cut rule scores are decided without model inference"""
+        registry, latency, outcomes = make_metrics()
+        detector = TransactionFraudDetector(
+            cascade_band=(0.3, 0.7), stage_latency_histogram=latency, cascade_counter=outcomes
+        )
+        detector.model = ConstantModel(0.9)
+
+        results = await detector.detect_batch([
+            make_detection_request(transaction_id="fine", amount=20),
+            make_detection_request(transaction_id="uncertain", amount=2000),
+        ])
+
+        assert detector.model.rows_scored == 1
+        assert [result.scoring_stage for result in results] == ["rules", "model"]
+        assert results[0].fraud_score == 0.0
+        assert results[1].fraud_score == pytest.approx(0.9)
+        assert registry.get_sample_value('cascade_total', {'outcome': 'rules_low'}) == 1
+        assert registry.get_sample_value('cascade_total', {'outcome': 'model'}) == 1
+        assert registry.get_sample_value('stage_latency_seconds_count', {'stage': 'rules'}) == 1
+        assert registry.get_sample_value('stage_latency_seconds_count', {'stage': 'model'}) == 1
+
+    @pytest.mark.asyncio
+    async def test_clear_fraud_skips_the_model(self, make_detection_request):
+        detector = TransactionFraudDetector(cascade_band=(0.1, 0.5))
+        detector.model = ConstantModel(0.0)
+
+        transactions = [{"amount": 5000, "velocity_1h": 10}]
+        scores, stages = detector._score_cascade(transactions, detector.vectorizer.allocate(1))
+
+        assert stages == ["rules"]
+        assert scores[0] == pytest.approx(0.75)
+        assert detector.model.rows_scored == 0
@@ -0,0 +1,100 @@
+"""
+Unit tests for the idempotent decision cache
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- DecisionCache
+"""
+
+import asyncio
+import pytest
+
+from data.decision_cache import DecisionCache, IdempotencyConflict
+from data.velocity_store import VelocityStore
+from models.transaction_fraud import TransactionFraudDetector
+
+
+class CountingDetector(TransactionFraudDetector):
+    """Detector that counts scored transactions and yields while scoring"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.scored = 0
+
+    async def detect(self, request):
+        self.scored += 1
+        await asyncio.sleep(0.01)
+        return await super().detect(request)
+
+
+class TestDecisionCache:
+    """Test suite for DecisionCache"""
+
+    @pytest.mark.asyncio
+    async def test_retries_get_the_original_response(self, make_detection_request):
+        detector = CountingDetector(velocity_store=VelocityStore(capacity=16))
+        cache = DecisionCache()
+        request = make_detection_request("txn_1")
+
+        first = await cache.get_or_compute(request, lambda: detector.detect(request))
+        retry = await cache.get_or_compute(request.model_copy(deep=True), lambda: detector.detect(request))
+
+        assert detector.scored == 1
+        assert retry.model_dump() == first.model_dump()
+        timestamp = request.transaction_data.timestamp.timestamp()
+        assert detector.velocity_store.get("user:user_12345", timestamp).count_24h == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_coalesce(self, make_detection_request):
+        detector = CountingDetector()
+        cache = DecisionCache()
+        request = make_detection_request("txn_1")
+
+        results = await asyncio.gather(*[
+            cache.get_or_compute(request, lambda: detector.detect(request)) for _ in range(5)
+        ])
+
+        assert detector.scored == 1
+        assert all(result is results[0] for result in results)
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self, make_detection_request):
+        cache = DecisionCache()
+        request = make_detection_request("txn_1")
+
+        async def fail():
+            raise RuntimeError("model unavailable")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute(request, fail)
+        result = await cache.get_or_compute(request, lambda: TransactionFraudDetector().detect(request))
+
+        assert result.transaction_id == "txn_1"
+        assert len(cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_reused_transaction_id_with_other_payload_conflicts(self, make_detection_request):
+        cache = DecisionCache()
+        detector = TransactionFraudDetector()
+        request = make_detection_request("txn_1", amount=100.0)
+        await cache.get_or_compute(request, lambda: detector.detect(request))
+
+        with pytest.raises(IdempotencyConflict):
+            changed = make_detection_request("txn_1", amount=5000.0)
+            await cache.get_or_compute(changed, lambda: detector.detect(changed))
+
+    @pytest.mark.asyncio
+    async def test_entries_expire_and_are_bounded(self, make_detection_request):
+        detector = CountingDetector()
+        cache = DecisionCache(max_entries=2, ttl_seconds=0.0)
+        request = make_detection_request("txn_1")
+
+        await cache.get_or_compute(request, lambda: detector.detect(request))
+        await cache.get_or_compute(request, lambda: detector.detect(request))
+        assert detector.scored == 2
+
+        cache = DecisionCache(max_entries=2)
+        for i in range(3):
+            other = make_detection_request(f"txn_{i}")
+            await cache.get_or_compute(other, lambda: detector.detect(other))
+        assert len(cache) == 2
@@ -0,0 +1,110 @@
+"""
+Unit tests for the device similarity index
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- device_tokens
+- DeviceSimilarityIndex
+- Device features in TransactionFraudDetector and RiskScorer
+"""
+
+import numpy as np
+import pytest
+
+from data.device_index import DeviceSimilarityIndex, device_tokens
+from models.transaction_fraud import TransactionFraudDetector
+from models.risk_scorer import RiskScorer
+from schemas.fraud import RiskAssessmentRequest
+
+DEVICE = {
+    "device_id": "device_1",
+    "type": "mobile",
+    "os": "Android 14",
+    "model": "SM-G991B",
+    "screen": {"width": 1080, "height": 2400},
+    "timezone": "Europe/Berlin",
+    "language": "de-DE",
+    "fonts": ["Roboto", "Noto Sans", "Droid Serif"],
+    "gpu": "Mali-G78"
+}
+
+
+def variant(device_id, **changes):
+    device = {**DEVICE, "device_id": device_id}
+    device.update(changes)
+    return device
+
+
+class TestDeviceTokens:
+    """Test suite for device_tokens"""
+
+    def test_flattens_nested_attributes_without_identity(self):
+        tokens = device_tokens(DEVICE)
+
+        assert "screen.width=1080" in tokens
+        assert "fonts=Noto Sans" in tokens
+        assert not any(token.startswith("device_id=") for token in tokens)
+
+
+class TestDeviceSimilarityIndex:
+    """Test suite for DeviceSimilarityIndex"""
+
+    def test_signature_estimates_jaccard_similarity(self):
+        index = DeviceSimilarityIndex(capacity=16, num_permutations=256, bands=8)
+        changed = variant("device_2", gpu="Adreno 660")
+
+        estimate = np.mean(index.signature(DEVICE) == index.signature(changed))
+
+        # 11 of 13 distinct tokens shared
+        assert estimate == pytest.approx(11 / 13, abs=0.08)
+        assert index.signature({"type": "mobile"}) is None
+
+    def test_finds_near_duplicates_on_other_accounts(self):
+        index = DeviceSimilarityIndex(capacity=1024)
+        for i in range(200):
+            index.observe(f"other_{i}", f"user_{i}", {
+                "os": f"iOS {i % 5}", "model": f"iPhone{i}", "language": f"lang_{i}", "timezone": f"tz_{i}"
+            }, 1_000)
+
+        assert index.observe("device_1", "alice", DEVICE, 1_000).similar_devices == 0
+        assert index.observe("device_2", "bob", variant("device_2"), 1_010).other_accounts == 1
+        match = index.observe("device_3", "carol", variant("device_3"), 1_020)
+        assert match.similar_devices == 2
+        assert match.other_accounts == 2
+        assert match.max_similarity == 1.0
+
+        # The owner's own devices do not count
+        assert index.observe("device_4", "alice", variant("device_4"), 1_030).other_accounts == 2
+
+    def test_updated_and_evicted_devices_leave_their_buckets(self):
+        index = DeviceSimilarityIndex(capacity=8, idle_ttl_seconds=100)
+        index.observe("device_1", "alice", DEVICE, 1_000)
+        index.observe("device_1", "alice", {"os": "Linux", "model": "ThinkPad", "language": "en-GB"}, 1_001)
+
+        assert index.observe("device_2", "bob", variant("device_2"), 1_002).similar_devices == 0
+
+        index.evict_idle(now=1_500)
+        assert len(index) == 0
+        assert (index._heads == -1).all()
+
+
+class TestDeviceFeatures:
+    """Test suite for device features in the detectors"""
+
+    @pytest.mark.asyncio
+    async def test_shared_device_profile_factor_and_device_risk(self, make_detection_request):
+        index = DeviceSimilarityIndex(capacity=64)
+        detector = TransactionFraudDetector(device_index=index)
+        scorer = RiskScorer(device_index=index)
+
+        for i, user in enumerate(["user_a", "user_b", "user_c"]):
+            result = await detector.detect(make_detection_request(
+                f"txn_{i}", user_id=user, device_info=variant(f"device_{i}")
+            ))
+
+        assessment = await scorer.assess(RiskAssessmentRequest(user_id="user_c"))
+        fresh = await scorer.assess(RiskAssessmentRequest(user_id="user_unknown"))
+
+        assert any(factor["factor"] == "Device shared across accounts" for factor in result.risk_factors)
+        assert assessment.risk_components["device_risk"] == pytest.approx(1 - 0.95 * 0.25)
+        assert fresh.risk_components["device_risk"] == 0.25
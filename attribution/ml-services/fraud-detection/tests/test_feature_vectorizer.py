@@ -0,0 +1,108 @@
+"""
+Unit tests for array-based feature vectorization
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- CategoricalEncoding
+- FeatureVectorizer
+- FeatureHasher
+"""
+
+import numpy as np
+import pytest
+
+from data.feature_vectorizer import FeatureHasher, FeatureVectorizer, PAYMENT_METHOD_ENCODING
+from models.transaction_fraud import TransactionFraudDetector
+
+
+class TestFeatureVectorizer:
+    """Test suite for FeatureVectorizer"""
+
+    def test_payment_method_lookup(self):
+        """Lookup array reproduces the payment method encoding"""
+        assert PAYMENT_METHOD_ENCODING.encode("Credit_Card") == 1.0
+        assert PAYMENT_METHOD_ENCODING.encode("cryptocurrency") == np.float32(0.2)
+        assert PAYMENT_METHOD_ENCODING.encode("barter") == 0.0
+
+    def test_batch_matches_dict_preprocessing(self, make_detection_request):
+        """Batch rows agree with the dict-based preprocess_features"""
+        detector = TransactionFraudDetector()
+        requests = [
+            make_detection_request(transaction_id=f"txn_{i}", amount=100.0 * (i + 1),
+                                   payment_method=method)
+            for i, method in enumerate(["credit_card", "bank_transfer", "unknown"])
+        ]
+
+        matrix = detector.build_feature_matrix(requests)
+
+        assert matrix.dtype == np.float32
+        assert matrix.shape == (3, len(detector.features))
+        for request, row in zip(requests, matrix):
+            transaction = request.transaction_data.model_dump()
+            expected = detector.preprocess_features(transaction, request.user_data.model_dump())
+            assert detector.vectorizer.to_dict(row) == {
+                feature: float(np.float32(value)) for feature, value in expected.items()
+            }
+
+        # The hour comes from the timestamp, also when it is serialized
+        serialized = requests[0].transaction_data.model_dump(mode="json")
+        assert detector.preprocess_features(serialized, {})["transaction_hour"] == 14
+        assert matrix[0, detector.vectorizer.column("transaction_hour")] == 14
+
+    def test_reuses_preallocated_buffer(self, make_detection_request):
+        """Filling into a large enough buffer does not allocate a new matrix"""
+        vectorizer = FeatureVectorizer(TransactionFraudDetector().features)
+        buffer = vectorizer.allocate(8)
+        buffer.fill(7.0)
+        request = make_detection_request()
+
+        matrix = vectorizer.transform([request.transaction_data], [request.user_data], out=buffer)
+
+        assert np.shares_memory(matrix, buffer)
+        assert matrix.shape == (1, vectorizer.width)
+        assert matrix[0, vectorizer.column("ip_risk_score")] == 0.0
+
+
+class TestFeatureHasher:
+    """Test suite for FeatureHasher"""
+
+    def test_hashed_block_is_fixed_width_and_signed(self, make_detection_request):
+        """Any number of distinct values lands in the same width, one signed unit per field"""
+        hasher = FeatureHasher(width=32)
+        vectorizer = FeatureVectorizer(TransactionFraudDetector().features, hasher)
+        requests = [
+            make_detection_request(transaction_id=f"txn_{i}", merchant_id=f"merchant_{i}",
+                                   device_info={"device_id": f"device_{i}", "model": f"model_{i % 7}"})
+            for i in range(200)
+        ]
+
+        matrix = vectorizer.transform([r.transaction_data for r in requests], [r.user_data for r in requests])
+
+        block = matrix[:, vectorizer.hashed_offset:]
+        assert matrix.shape == (200, len(TransactionFraudDetector().features) + 32)
+        assert set(np.unique(block)) <= {-4.0, -3.0, -2.0, -1.0, 0.0, 1.0, 2.0, 3.0, 4.0}
+        assert np.all(np.abs(block).sum(axis=1) <= 4)
+        assert np.any(block < 0) and np.any(block > 0)
+        assert np.array_equal(block[0], vectorizer.transform_one(requests[0].transaction_data,
+                                                                 requests[0].user_data)[vectorizer.hashed_offset:])
+
+    def test_dict_preprocessing_matches_batch_rows(self, make_detection_request):
+        """preprocess_features hashes the same values into the same columns"""
+        detector = TransactionFraudDetector(hasher=FeatureHasher(width=16))
+        request = make_detection_request(device_info={"device_id": "device_1", "model": "Pixel 8"})
+
+        row = detector.build_feature_matrix([request])[0]
+
+        transaction = request.transaction_data.model_dump()
+        expected = detector.preprocess_features(transaction, request.user_data.model_dump())
+        assert detector.vectorizer.to_dict(row) == {
+            feature: float(np.float32(value)) for feature, value in expected.items()
+        }
+
+    def test_model_width_mismatch_is_rejected(self, tmp_path):
+        """An artifact trained without the hashed block cannot be loaded"""
+        detector = TransactionFraudDetector(hasher=FeatureHasher(width=8))
+        np.save(tmp_path / "coef.npy", np.zeros(len(detector.features)))
+
+        with pytest.raises(ValueError, match="expects 12 features"):
+            detector.load_model(str(tmp_path))
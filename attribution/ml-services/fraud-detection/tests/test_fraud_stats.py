@@ -0,0 +1,151 @@
+"""
+Unit tests for rolling fraud statistics
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- parse_period
+- FraudStatsAggregator
+"""
+
+import pytest
+
+from data.fraud_stats import FraudStatsAggregator, NORMAL_PATTERN_FACTOR, parse_period
+from schemas.fraud import FraudDetectionResponse, AnomalyDetectionResponse
+
+NOW = 1_760_000_400.0  # 09:00 UTC
+
+
+def detection(risk_level="low", is_fraud=False, fraud_score=0.2, factors=(), transaction_id="txn_1"):
+    return FraudDetectionResponse(
+        transaction_id=transaction_id,
+        user_id="user_1",
+        fraud_score=fraud_score,
+        risk_level=risk_level,
+        is_fraud=is_fraud,
+        risk_factors=[{"factor": factor, "impact": 0.8} for factor in factors],
+        recommendations=[],
+        processing_time_ms=1.0
+    )
+
+
+def anomalies(*types):
+    return AnomalyDetectionResponse(
+        user_id="user_1",
+        anomalies_detected=[{"type": anomaly_type, "severity": 0.5} for anomaly_type in types],
+        anomaly_score=0.5,
+        severity_level="medium",
+        recommended_actions=[]
+    )
+
+
+class TestParsePeriod:
+    """Test suite for parse_period"""
+
+    def test_units(self):
+        assert parse_period("30m") == 1800
+        assert parse_period("24h") == 86400
+        assert parse_period("7d") == 7 * 86400
+
+    @pytest.mark.parametrize("period", ["", "24", "0h", "1y", "abc"])
+    def test_invalid_periods(self, period):
+        with pytest.raises(ValueError):
+            parse_period(period)
+
+
+class TestFraudStatsAggregator:
+    """Test suite for FraudStatsAggregator"""
+
+    def test_stats_by_period(self):
+        """Periods only include results inside their window"""
+        aggregator = FraudStatsAggregator()
+        aggregator.record_detection(detection(), "electronics", NOW - 2 * 86400)
+        aggregator.record_detection(detection("high", True, 0.9), "electronics", NOW - 3 * 3600)
+        aggregator.record_detection(detection(), "travel", NOW - 60)
+
+        last_hour = aggregator.stats(3600, now=NOW)
+        last_day = aggregator.stats(86400, now=NOW)
+        last_week = aggregator.stats(7 * 86400, now=NOW)
+
+        assert last_hour["total_transactions_analyzed"] == 1
+        assert last_hour["resolution"] == "minute"
+        assert last_day["total_transactions_analyzed"] == 2
+        assert last_day["fraud_detected"] == 1
+        assert last_day["fraud_rate"] == 50.0
+        assert last_day["risk_levels"] == {"high": 1, "low": 1}
+        assert last_day["merchant_categories"]["electronics"] == {"transactions": 1, "fraud_detected": 1}
+        assert last_week["total_transactions_analyzed"] == 3
+        assert last_week["resolution"] == "day"
+
+    def test_patterns_from_anomalies_and_risk_factors(self):
+        aggregator = FraudStatsAggregator()
+        aggregator.record_anomalies(anomalies("spending_pattern", "frequency_pattern"), NOW - 120)
+        aggregator.record_anomalies(anomalies("spending_pattern"), NOW - 60)
+        aggregator.record_detection(detection(factors=["High transaction amount"]), "electronics", NOW)
+
+        patterns = aggregator.patterns(3600, now=NOW)
+
+        assert patterns[0]["pattern_id"] == "anomaly:spending_pattern"
+        assert patterns[0]["count"] == 2
+        assert patterns[0]["severity"] == "medium"
+        factor = next(p for p in patterns if p["pattern_id"].startswith("risk_factor:"))
+        assert factor["severity"] == "high"
+
+    def test_clean_traffic_yields_no_patterns(self):
+        aggregator = FraudStatsAggregator()
+        for _ in range(5):
+            aggregator.record_detection(detection(factors=[NORMAL_PATTERN_FACTOR]), "electronics", NOW)
+
+        assert aggregator.patterns(3600, now=NOW) == []
+
+    def test_accuracy_from_feedback_labels(self):
+        """Labels are matched with the recorded verdict of their transaction"""
+        aggregator = FraudStatsAggregator()
+        verdicts = {"txn_tp": True, "txn_fp": True, "txn_tn1": False, "txn_tn2": False, "txn_tn3": False}
+        for transaction_id, is_fraud in verdicts.items():
+            aggregator.record_detection(detection(is_fraud=is_fraud, transaction_id=transaction_id), "electronics", NOW)
+        assert aggregator.stats(3600, now=NOW)["model_accuracy"] is None
+
+        for transaction_id in verdicts:
+            assert aggregator.record_feedback(transaction_id, transaction_id in ("txn_tp", "txn_tn1"), NOW)
+        assert not aggregator.record_feedback("txn_tp", True, NOW)
+        assert not aggregator.record_feedback("unknown", True, NOW)
+        stats = aggregator.stats(3600, now=NOW)
+
+        assert stats["labelled_transactions"] == 5
+        assert stats["false_positive_rate"] == 33.33  # txn_fp of three legitimate
+        assert stats["model_accuracy"] == 60.0  # txn_tn1 was fraud the model missed
+
+    def test_old_buckets_are_recycled(self):
+        """A ring slot reused for a newer bucket drops the old counts"""
+        aggregator = FraudStatsAggregator()
+        aggregator.record_detection(detection(), "electronics", NOW - 120 * 60)
+        aggregator.record_detection(detection(), "electronics", NOW)
+
+        assert aggregator.stats(3600, now=NOW)["total_transactions_analyzed"] == 1
+        assert aggregator.stats(86400, now=NOW)["total_transactions_analyzed"] == 2
+
+    def test_merge_across_workers(self):
+        """Snapshots from several workers add up bucket by bucket"""
+        worker_a, worker_b = FraudStatsAggregator(), FraudStatsAggregator()
+        worker_a.record_detection(detection(), "electronics", NOW)
+        worker_b.record_anomalies(anomalies("location_pattern"), NOW)
+        worker_b.record_detection(detection("high", True, 0.9), "travel", NOW)
+
+        merged = FraudStatsAggregator.from_dict(worker_a.to_dict())
+        merged.merge(FraudStatsAggregator.from_dict(worker_b.to_dict()))
+        stats = merged.stats(3600, now=NOW)
+
+        assert stats["total_transactions_analyzed"] == 2
+        assert stats["fraud_detected"] == 1
+        assert stats["anomalies"] == {"location_pattern": 1}
+
+    def test_series_overflow_folds_into_other(self):
+        aggregator = FraudStatsAggregator(max_series=32)
+        for i in range(50):
+            aggregator.record_detection(detection(), f"category_{i}", NOW)
+
+        categories = aggregator.stats(3600, now=NOW)["merchant_categories"]
+
+        assert len(aggregator.series) <= 32
+        assert sum(c["transactions"] for c in categories.values()) == 50
+        assert "other" in categories
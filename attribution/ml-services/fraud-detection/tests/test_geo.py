@@ -0,0 +1,131 @@
+"""
+Unit tests for IP geolocation and impossible travel
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- GeoIndex
+- UserLocationStore
+- Impossible travel in TransactionFraudDetector and AnomalyDetector
+"""
+
+import time
+import pytest
+from datetime import datetime
+
+from data.geo import GeoIndex, UserLocationStore
+from models.transaction_fraud import TransactionFraudDetector
+from models.anomaly_detector import AnomalyDetector
+from schemas.fraud import AnomalyDetectionRequest
+
+GEOIP_CSV = """start_ip,end_ip,country_code,city,latitude,longitude
+81.2.69.0,81.2.69.255,GB,London,51.5074,-0.1278
+1.128.0.0,1.159.255.255,AU,Sydney,-33.8688,151.2093
+86.0.0.0,86.0.255.255,GB,Reading,51.4543,-0.9781
+2001:db8::,2001:db8::ffff,DE,Berlin,52.52,13.405
+81.2.70.0,81.2.70.255,GB,London,51.5074,-0.1278
+"""
+
+
+@pytest.fixture
+def geo_index(tmp_path):
+    path = tmp_path / "geoip.csv"
+    path.write_text(GEOIP_CSV)
+    return GeoIndex.from_csv(str(path))
+
+
+class TestGeoIndex:
+    """Test suite for GeoIndex"""
+
+    def test_ipv4_and_ipv6_lookups(self, geo_index):
+        assert geo_index.lookup("81.2.69.160").city == "London"
+        assert geo_index.lookup("1.130.4.5").country_code == "AU"
+        assert geo_index.lookup("2001:db8::42").city == "Berlin"
+        assert geo_index.lookup("::ffff:86.0.1.1").city == "Reading"
+
+    def test_misses(self, geo_index):
+        assert geo_index.lookup("10.0.0.1") is None
+        assert geo_index.lookup("81.2.71.1") is None
+        assert geo_index.lookup("2001:db9::1") is None
+        assert geo_index.lookup("not-an-ip") is None
+
+    def test_identical_locations_are_shared(self, geo_index):
+        assert len(geo_index) == 5
+        assert len(geo_index.cities) == 4
+        assert geo_index.lookup_id("81.2.69.1") == geo_index.lookup_id("81.2.70.1")
+
+
+class TestUserLocationStore:
+    """Test suite for UserLocationStore"""
+
+    def test_flags_london_to_sydney_within_an_hour(self, geo_index):
+        store = UserLocationStore(geo_index, capacity=16)
+        now = time.time()
+
+        assert store.observe("user_1", "81.2.69.160", now - 3600) is None
+        check = store.observe("user_1", "1.130.4.5", now)
+
+        assert check.impossible
+        assert check.distance_km > 16_000
+        assert store.recent_impossible_travel("user_1", now - 60).to_location.city == "Sydney"
+        assert store.recent_impossible_travel("user_1", now + 60) is None
+
+    def test_nearby_or_slow_travel_is_allowed(self, geo_index):
+        store = UserLocationStore(geo_index, capacity=16)
+        now = time.time()
+
+        store.observe("user_1", "81.2.69.160", now - 60)
+        assert not store.observe("user_1", "86.0.1.1", now).impossible
+
+        store.observe("user_2", "81.2.69.160", now - 48 * 3600)
+        assert not store.observe("user_2", "1.130.4.5", now).impossible
+        assert store.recent_impossible_travel("user_2", 0) is None
+
+
+class TestImpossibleTravelDetection:
+    """Test suite for impossible travel in the detectors"""
+
+    @pytest.mark.asyncio
+    async def test_transaction_detector_flags_impossible_travel(self, geo_index, make_detection_request):
+        detector = TransactionFraudDetector(user_locations=UserLocationStore(geo_index, capacity=16))
+
+        first = await detector.detect(make_detection_request(
+            "txn_1", timestamp=datetime(2025, 10, 23, 14, 0, 0), ip_address="81.2.69.160"
+        ))
+        second = await detector.detect(make_detection_request(
+            "txn_2", timestamp=datetime(2025, 10, 23, 14, 30, 0), ip_address="1.130.4.5"
+        ))
+
+        assert not any(factor["factor"] == "Impossible travel" for factor in first.risk_factors)
+        assert any(factor["factor"] == "Impossible travel" for factor in second.risk_factors)
+
+    def test_location_risk_score_feature(self, geo_index, make_detection_request):
+        detector = TransactionFraudDetector(user_locations=UserLocationStore(geo_index, capacity=16))
+        requests = [
+            make_detection_request("txn_1", timestamp=datetime(2025, 10, 23, 14, 0, 0), ip_address="81.2.69.160"),
+            make_detection_request("txn_2", timestamp=datetime(2025, 10, 23, 14, 30, 0), ip_address="1.130.4.5")
+        ]
+        transactions = [{} for _ in requests]
+        matrix = detector.build_feature_matrix(requests).copy()
+
+        detector._apply_geo(requests, transactions, matrix)
+
+        column = detector.vectorizer.column('location_risk_score')
+        assert matrix[0, column] == 0.0
+        assert matrix[1, column] == 1.0
+        assert transactions[1]['impossible_travel']['to'] == "Sydney, AU"
+
+    @pytest.mark.asyncio
+    async def test_anomaly_detector_reports_impossible_travel(self, geo_index):
+        store = UserLocationStore(geo_index, capacity=16)
+        store.observe("user_1", "81.2.69.160", time.time() - 1800)
+        detector = AnomalyDetector(user_locations=store)
+
+        result = await detector.detect(AnomalyDetectionRequest(
+            user_id="user_1",
+            behavior_data={"ip_address": "1.130.4.5"},
+            time_window="1h"
+        ))
+
+        location = [a for a in result.anomalies_detected if a["type"] == "location_pattern"]
+        assert location[0]["description"] == "Impossible travel between consecutive locations"
+        assert location[0]["details"]["to"] == "Sydney, AU"
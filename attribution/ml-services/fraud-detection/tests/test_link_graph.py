@@ -0,0 +1,131 @@
+"""
+Unit tests for the entity link graph
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- LinkGraph
+- TransactionFraudDetector link graph feedback
+- RiskScorer network_risk
+"""
+
+import numpy as np
+import pytest
+
+from data.link_graph import LinkGraph
+from models.risk_scorer import RiskScorer
+from models.transaction_fraud import TransactionFraudDetector
+from schemas.fraud import FraudFeedbackRequest, RiskAssessmentRequest
+
+
+class TestLinkGraph:
+    """Test suite for LinkGraph"""
+
+    def test_shared_device_links_users(self, make_detection_request):
+        """Users sharing a device end up in one component"""
+        graph = LinkGraph(capacity=100)
+        graph.add_transaction(make_detection_request(user_id="a", ip_address="1.1.1.1"))
+        graph.add_transaction(make_detection_request(user_id="b", ip_address="2.2.2.2"))
+        graph.add_transaction(
+            make_detection_request(user_id="c", ip_address="3.3.3.3", device_info={"device_id": "other"})
+        )
+        assert graph.record_label("b", True)
+
+        ring = graph.component("a")
+        assert ring == graph.component("b")
+        assert (ring.users, ring.transactions, ring.fraud_transactions) == (2, 2, 1)
+        assert ring.nodes == 5  # two users, the shared device and two IPs
+        assert graph.component("c").users == 1
+        assert graph.component("unknown") is None
+
+    def test_network_risk_grows_with_fraud_density_and_sharing(self, make_detection_request):
+        graph = LinkGraph(capacity=100)
+        graph.add_transaction(make_detection_request(user_id="solo", device_info={}, ip_address=None))
+        for user_id in ("x", "y", "z"):
+            graph.add_transaction(
+                make_detection_request(user_id=user_id, device_info={"device_id": "farm"}, ip_address=None)
+            )
+        sharing_only = graph.network_risk("x")
+        for user_id in ("x", "y", "z"):
+            graph.record_label(user_id, True)
+
+        assert graph.network_risk("solo") < 0.1
+        assert graph.network_risk("x") > sharing_only
+        assert graph.network_risk("x") > 0.4
+        assert graph.network_risk("unknown") is None
+
+    def test_only_confirmed_fraud_counts(self, make_detection_request):
+        graph = LinkGraph(capacity=100)
+        graph.add_transaction(make_detection_request(user_id="a"))
+
+        assert not graph.record_label("a", False)
+        assert not graph.record_label("unknown", True)
+        assert graph.component("a").fraud_transactions == 0
+
+    def test_hub_entities_stop_merging(self, make_detection_request):
+        """A shared NAT IP does not join unrelated users without bound"""
+        graph = LinkGraph(capacity=1000, max_entity_merges=3)
+        for i in range(10):
+            graph.add_transaction(
+                make_detection_request(user_id=f"u{i}", device_info={"device_id": f"d{i}"},
+                                       ip_address="100.64.0.1")
+            )
+
+        assert graph.component("u0").users == 3
+        assert graph.component("u9").users == 1
+
+    def test_generation_rotation_keeps_previous_components(self, make_detection_request):
+        graph = LinkGraph(capacity=6)
+        graph.add_transaction(make_detection_request(user_id="a", ip_address=None))
+        graph.add_transaction(make_detection_request(user_id="b", ip_address=None))
+        for i in range(3):
+            graph.add_transaction(
+                make_detection_request(user_id=f"n{i}", device_info={"device_id": f"d{i}"}, ip_address=None)
+            )
+
+        assert graph.previous is not None
+        assert graph.record_label("a", True)
+        assert graph.component("a").users == 2
+        assert graph.component("a").fraud_transactions == 1
+        assert graph.component("n2").users == 1
+
+
+class TestDetectorFeedback:
+    """Test suite for link graph updates from TransactionFraudDetector"""
+
+    @pytest.mark.asyncio
+    async def test_fraud_marks_come_from_feedback_not_verdicts(self, make_detection_request):
+        class FlaggingDetector(TransactionFraudDetector):
+            def _predict_scores(self, feature_matrix):
+                return np.ones(len(feature_matrix))
+
+        graph = LinkGraph(capacity=100)
+        detector = FlaggingDetector(link_graph=graph)
+        request = make_detection_request(user_id="a")
+
+        assert (await detector.detect(request)).is_fraud
+        assert graph.component("a").fraud_transactions == 0
+
+        transaction = request.transaction_data
+        detector.record_feedback(FraudFeedbackRequest(
+            transaction_id=transaction.transaction_id, user_id="a", merchant_id=transaction.merchant_id,
+            merchant_category=transaction.merchant_category, timestamp=transaction.timestamp, is_fraud=True
+        ))
+        assert graph.component("a").fraud_transactions == 1
+
+
+class TestRiskScorerNetworkRisk:
+    """Test suite for network_risk in RiskScorer"""
+
+    @pytest.mark.asyncio
+    async def test_network_risk_component_from_graph(self, make_detection_request):
+        graph = LinkGraph(capacity=100)
+        graph.add_transaction(make_detection_request(user_id="a"))
+        graph.add_transaction(make_detection_request(user_id="b"))
+        graph.record_label("a", True)
+        scorer = RiskScorer(link_graph=graph)
+
+        linked = await scorer.assess(RiskAssessmentRequest(user_id="a"))
+        unknown = await scorer.assess(RiskAssessmentRequest(user_id="nobody"))
+
+        assert linked.risk_components["network_risk"] == graph.network_risk("a")
+        assert unknown.risk_components["network_risk"] == 0.15
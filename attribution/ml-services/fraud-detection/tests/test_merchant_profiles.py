@@ -0,0 +1,145 @@
+"""
+Unit tests for Count-Min sketch merchant profiles
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- CountMinSketch / HeavyHitters
+- MerchantProfiles
+- TransactionFraudDetector merchant features and feedback labels
+"""
+
+import json
+import numpy as np
+import pytest
+from datetime import datetime
+
+from utils.count_min import CountMinSketch, HeavyHitters
+from data.merchant_profiles import MerchantProfiles
+from models.rule_engine import DEFAULT_RULES, RuleEngine
+from models.transaction_fraud import TransactionFraudDetector
+from schemas.fraud import FraudFeedbackRequest
+
+
+class FlaggingDetector(TransactionFraudDetector):
+    """Detector whose model flags every transaction"""
+
+    def _predict_scores(self, feature_matrix):
+        return np.ones(len(feature_matrix))
+
+
+def label(transaction, is_fraud=True):
+    return FraudFeedbackRequest(
+        transaction_id=transaction.transaction_id, user_id=transaction.user_id,
+        merchant_id=transaction.merchant_id, merchant_category=transaction.merchant_category,
+        timestamp=transaction.timestamp, is_fraud=is_fraud
+    )
+
+
+class TestCountMinSketch:
+    """Test suite for CountMinSketch and HeavyHitters"""
+
+    def test_estimates_never_undercount(self):
+        rng = np.random.default_rng(7)
+        keys = [f"merchant_{i}" for i in rng.zipf(1.3, 20_000) % 5000]
+        sketch = CountMinSketch(width=2048, depth=4, channels=2)
+
+        sketch.add(keys, np.column_stack([np.ones(len(keys)), np.full(len(keys), 2.0)]))
+
+        unique, exact = np.unique(keys, return_counts=True)
+        estimates = sketch.query(list(unique))
+        assert np.all(estimates[:, 0] >= exact)
+        assert np.all(estimates[:, 1] >= 2 * exact)
+        # Overcount bound e/width of the total, which holds with high probability
+        assert np.mean(estimates[:, 0] - exact <= np.e / 2048 * len(keys)) > 0.95
+
+    def test_heavy_hitters_keep_the_largest_keys(self):
+        hitters = HeavyHitters(k=3)
+        for key, count in [("a", 5), ("b", 1), ("c", 3), ("d", 4), ("b", 2), ("e", 10)]:
+            hitters.offer(key, count)
+
+        assert hitters.top() == [("e", 10), ("a", 5), ("d", 4)]
+
+
+class TestMerchantProfiles:
+    """Test suite for MerchantProfiles"""
+
+    def test_features_reflect_merchant_history(self, make_detection_request):
+        profiles = MerchantProfiles(width=4096, min_transactions=10, prior_weight=0.0)
+        history = [
+            make_detection_request(f"txn_{i}", amount=50.0, merchant_id="shop",
+                                   timestamp=datetime(2025, 10, 23, 14, 0, 0))
+            for i in range(40)
+        ]
+        transactions = [request.transaction_data for request in history]
+        profiles.update(profiles.lookup(transactions), transactions)
+        for i, transaction in enumerate(transactions):
+            profiles.record_labels(transaction.merchant_id, transaction.merchant_category,
+                                   transaction.timestamp, i % 4 == 0)
+
+        new = [
+            make_detection_request("big", amount=500.0, merchant_id="shop",
+                                   timestamp=datetime(2025, 10, 24, 3, 0, 0)).transaction_data,
+            make_detection_request("other", amount=500.0, merchant_id="new_shop").transaction_data
+        ]
+        features = profiles.lookup(new).features
+
+        assert features[0]["merchant_transactions"] == pytest.approx(40)
+        assert features[0]["merchant_fraud_rate"] == pytest.approx(0.25)
+        assert features[0]["merchant_amount_ratio"] == pytest.approx(10.0)
+        assert features[0]["merchant_hour_share"] == 0.0
+        assert features[1]["merchant_amount_ratio"] == 0.0
+        assert features[1]["merchant_hour_share"] == 1.0
+        assert profiles.top(1)[0]["merchant_id"] == "shop"
+
+    def test_decay_halves_counts_after_a_half_life(self, make_detection_request):
+        profiles = MerchantProfiles(width=1024, half_life_seconds=3600, decay_interval_seconds=60)
+        transactions = [make_detection_request(f"txn_{i}").transaction_data for i in range(8)]
+        profiles.update(profiles.lookup(transactions), transactions)
+
+        profiles.maybe_decay(now=profiles._decayed_at + 3600)
+
+        assert profiles.lookup(transactions[:1]).features[0]["merchant_transactions"] == pytest.approx(4)
+
+
+class TestDetectorMerchantFeatures:
+    """Test suite for merchant features in TransactionFraudDetector"""
+
+    @pytest.mark.asyncio
+    async def test_high_risk_merchant_factor_from_labels(self, make_detection_request, tmp_path):
+        rules = json.loads(json.dumps(DEFAULT_RULES))
+        for rule in rules["rule_sets"]["transaction"]:
+            rule["enabled"] = True
+        path = tmp_path / "rules.json"
+        path.write_text(json.dumps(rules))
+        engine = RuleEngine(str(path))
+        engine.reload(force=True)
+
+        profiles = MerchantProfiles(width=4096)
+        detector = TransactionFraudDetector(merchant_profiles=profiles, rules=engine)
+        history = [make_detection_request(f"txn_{i}", merchant_id="bad_shop") for i in range(60)]
+        await detector.detect_batch(history)
+        for request in history:
+            detector.record_feedback(label(request.transaction_data))
+
+        result = await detector.detect(make_detection_request("next", merchant_id="bad_shop"))
+        clean = await detector.detect(make_detection_request("clean", merchant_id="good_shop"))
+
+        assert any(factor["factor"] == "High-risk merchant" for factor in result.risk_factors)
+        assert not any(factor["factor"] == "High-risk merchant" for factor in clean.risk_factors)
+        transactions = [history[0].transaction_data]
+        assert profiles.lookup(transactions).features[0]["merchant_transactions"] == pytest.approx(61)
+
+    @pytest.mark.asyncio
+    async def test_own_decisions_do_not_count_as_fraud(self, make_detection_request):
+        profiles = MerchantProfiles(width=4096, prior_weight=0.0)
+        detector = FlaggingDetector(merchant_profiles=profiles)
+        risky = [make_detection_request(f"txn_{i}", merchant_id="shop") for i in range(60)]
+
+        results = await detector.detect_batch(risky)
+
+        assert all(result.is_fraud for result in results)
+        features = profiles.lookup([risky[0].transaction_data]).features[0]
+        assert features["merchant_transactions"] == pytest.approx(60)
+        assert features["merchant_fraud_rate"] == 0.0
+        # Disabled until labels flow
+        assert "high_risk_merchant" not in [rule.name for rule in RuleEngine().rule_set("transaction").rules]
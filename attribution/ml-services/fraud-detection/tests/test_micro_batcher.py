@@ -0,0 +1,80 @@
+"""
+Unit tests for the micro-batching scheduler
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- MicroBatcher
+- TransactionFraudDetector.detect_batch
+"""
+
+import asyncio
+import pytest
+
+from utils.micro_batcher import MicroBatcher
+from models.transaction_fraud import TransactionFraudDetector
+
+
+class TestMicroBatcher:
+    """Test suite for MicroBatcher"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_a_batch(self):
+        """Concurrent submits are processed by one batch call, results fan back out"""
+        batches = []
+
+        def process(items):
+            batches.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(process, max_batch_size=16, max_delay_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+
+        assert results == [0, 2, 4, 6, 8]
+        assert batches == [[0, 1, 2, 3, 4]]
+
+    @pytest.mark.asyncio
+    async def test_batches_are_capped_at_max_size(self):
+        """A full batch is dispatched without waiting for the delay"""
+        sizes = []
+
+        async def process(items):
+            sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher(process, max_batch_size=3, max_delay_ms=200)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(7))), timeout=5
+        )
+        await batcher.stop()
+
+        assert results == list(range(7))
+        assert sizes[:2] == [3, 3]
+
+    @pytest.mark.asyncio
+    async def test_batch_failure_propagates_to_callers(self):
+        """Every caller in a failed batch receives the exception"""
+        def process(items):
+            raise ValueError("model unavailable")
+
+        batcher = MicroBatcher(process, max_delay_ms=5)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2),
+                                       return_exceptions=True)
+        await batcher.stop()
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+
+class TestBatchedDetection:
+    """Test suite for batched transaction fraud detection"""
+
+    @pytest.mark.asyncio
+    async def test_detect_batch_preserves_order(self, make_detection_request):
+        """Responses line up with the requests of the batch"""
+        detector = TransactionFraudDetector()
+        requests = [make_detection_request(transaction_id=f"txn_{i}") for i in range(4)]
+
+        responses = await detector.detect_batch(requests)
+
+        assert [r.transaction_id for r in responses] == ["txn_0", "txn_1", "txn_2", "txn_3"]
+        assert all(0.0 <= r.fraud_score <= 1.0 for r in responses)
@@ -0,0 +1,89 @@
+"""
+Unit tests for memory-mapped model artifacts
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- load_artifact
+- TransactionFraudDetector.load_model
+"""
+
+import joblib
+import numpy as np
+import pytest
+
+from utils.model_artifacts import NpyLinearModel, load_artifact
+from models.transaction_fraud import TransactionFraudDetector
+
+
+class TestLoadArtifact:
+    """Test suite for load_artifact"""
+
+    def test_npy_is_memory_mapped_read_only(self, tmp_path):
+        """Single .npy arrays are mapped, not copied"""
+        path = tmp_path / "weights.npy"
+        np.save(path, np.arange(1000, dtype=np.float32))
+
+        artifact = load_artifact("weights", str(path))
+
+        assert isinstance(artifact.model, np.memmap)
+        assert not artifact.model.flags.writeable
+        assert artifact.mapped_bytes == 4000
+        assert artifact.load_time_ms >= 0
+
+    def test_npy_directory_with_coef_is_linear_model(self, tmp_path):
+        """coef.npy + intercept.npy are served as a logistic model"""
+        np.save(tmp_path / "coef.npy", np.array([1.0, -1.0]))
+        np.save(tmp_path / "intercept.npy", np.array([0.0]))
+
+        model = load_artifact("linear", str(tmp_path)).model
+        probabilities = model.predict_proba(np.array([[0.0, 0.0], [10.0, 0.0]]))
+
+        assert isinstance(model, NpyLinearModel)
+        assert probabilities.shape == (2, 2)
+        assert probabilities[0, 1] == pytest.approx(0.5)
+        assert probabilities[1, 1] > 0.99
+
+    def test_joblib_arrays_are_memory_mapped(self, tmp_path):
+        """Arrays inside uncompressed joblib dumps are mapped"""
+        path = tmp_path / "model.joblib"
+        joblib.dump({"weights": np.ones(10_000)}, path)
+
+        artifact = load_artifact("joblib", str(path))
+
+        assert isinstance(artifact.model["weights"], np.memmap)
+
+    def test_health_info_reports_memory(self, tmp_path):
+        """info() exposes load time and resident/proportional memory"""
+        path = tmp_path / "weights.npy"
+        np.save(path, np.ones(100_000))
+        artifact = load_artifact("weights", str(path))
+        float(artifact.model.sum())  # fault the pages in
+
+        info = artifact.info()
+
+        assert info["status"] == "loaded"
+        assert set(info) >= {"load_time_ms", "mapped_bytes", "rss_bytes", "pss_bytes"}
+        if info["rss_bytes"] is not None:
+            assert info["rss_bytes"] > 0
+
+    def test_missing_path_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_artifact("missing", str(tmp_path / "missing.joblib"))
+
+
+class TestDetectorModelLoading:
+    """Test suite for detector scoring with a loaded artifact"""
+
+    @pytest.mark.asyncio
+    async def test_loaded_model_scores_detect_batch(self, tmp_path, make_detection_request):
+        """A loaded linear artifact replaces the mock score"""
+        detector = TransactionFraudDetector()
+        coef = np.zeros(len(detector.features))
+        np.save(tmp_path / "coef.npy", coef)
+        np.save(tmp_path / "intercept.npy", np.array([2.0]))
+
+        detector.load_model(str(tmp_path))
+        result = await detector.detect(make_detection_request())
+
+        assert detector.artifact is not None
+        assert result.fraud_score == pytest.approx(1.0 / (1.0 + np.exp(-2.0)), abs=1e-3)
@@ -0,0 +1,140 @@
+"""
+Unit tests for the record and replay load harness
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- RequestRecorder / read_records
+- arrival_offsets
+- replay and ReplayReport
+"""
+
+import sys
+
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from schemas.fraud import FraudDetectionRequest
+from utils.replay import (
+    RequestRecorder,
+    ReplayRecord,
+    arrival_offsets,
+    generate_detect_records,
+    in_process_client,
+    main,
+    parse_slos,
+    read_records,
+    replay
+)
+
+
+@pytest.fixture
+def echo_app():
+    app = FastAPI()
+    started = []
+
+    @app.on_event("startup")
+    async def startup():
+        started.append(True)
+
+    @app.post("/ok")
+    async def ok(body: dict):
+        if not started:
+            raise HTTPException(status_code=503)
+        return body
+
+    @app.post("/fail")
+    async def fail():
+        raise HTTPException(status_code=500)
+
+    return app
+
+
+class TestRecording:
+    """Test suite for recording files"""
+
+    def test_recorded_requests_round_trip(self, tmp_path, make_detection_request):
+        path = str(tmp_path / "traffic.jsonl.gz")
+        recorder = RequestRecorder(path)
+        request = make_detection_request()
+        recorder.record("/api/fraud/detect", request.model_dump(mode="json"))
+        recorder.record("/api/fraud/stats", None, method="GET")
+        recorder.close()
+
+        records = read_records(path)
+
+        assert [record.path for record in records] == ["/api/fraud/detect", "/api/fraud/stats"]
+        assert records[0].offset == 0.0
+        assert records[1].method == "GET"
+        assert FraudDetectionRequest(**records[0].body) == request
+
+    def test_generated_requests_are_valid(self):
+        records = generate_detect_records(50, rate=10.0)
+
+        assert records[-1].offset == pytest.approx(4.9)
+        for record in records:
+            FraudDetectionRequest(**record.body)
+
+
+class TestArrivalOffsets:
+    """Test suite for arrival_offsets"""
+
+    def test_recorded_fixed_and_poisson_schedules(self):
+        records = [ReplayRecord(offset, "POST", "/ok") for offset in (0.0, 1.0, 4.0)]
+
+        assert arrival_offsets(records, speedup=2.0).tolist() == [0.0, 0.5, 2.0]
+        assert arrival_offsets(records, qps=10.0).tolist() == pytest.approx([0.0, 0.1, 0.2])
+
+        many = [ReplayRecord(0.0, "POST", "/ok")] * 5000
+        poisson = arrival_offsets(many, qps=1000.0, poisson=True)
+        assert poisson[0] == 0.0
+        assert poisson[-1] == pytest.approx(5.0, rel=0.1)
+
+    @pytest.mark.parametrize("options", [{"speedup": 0.0}, {"speedup": -2.0}, {"qps": 0.0}, {"qps": -5.0}])
+    def test_non_positive_rates_are_rejected(self, options):
+        records = [ReplayRecord(0.0, "POST", "/ok"), ReplayRecord(1.0, "POST", "/ok")]
+
+        with pytest.raises(ValueError, match="must be positive"):
+            arrival_offsets(records, **options)
+
+    @pytest.mark.parametrize("argv", [["--speedup", "0"], ["--speedup", "-1"], ["--qps", "0"]])
+    def test_cli_rejects_non_positive_rates(self, monkeypatch, argv):
+        monkeypatch.setattr(sys, "argv", ["replay", "run", "recording.jsonl.gz", *argv])
+
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+        assert exit_info.value.code == 2
+
+
+class TestReplay:
+    """Test suite for replay"""
+
+    @pytest.mark.asyncio
+    async def test_open_loop_report(self, echo_app):
+        records = [ReplayRecord(0.0, "POST", "/ok", {"i": i}) for i in range(40)]
+        records += [ReplayRecord(0.0, "POST", "/fail", {}) for _ in range(2)]
+
+        async with in_process_client(echo_app) as client:
+            report = await replay(records, client, qps=2000.0)
+
+        summary = report.summary()["endpoints"]
+        assert summary["/ok"]["requests"] == 40
+        assert summary["/ok"]["errors"] == 0
+        assert summary["/ok"]["p50_ms"] <= summary["/ok"]["p99_ms"] <= summary["/ok"]["max_ms"]
+        assert summary["/fail"]["errors"] == 2
+        assert report.slo_violations({}) == ["/fail: 2 errors"]
+
+    @pytest.mark.asyncio
+    async def test_closed_loop_and_slo_check(self, echo_app):
+        records = [ReplayRecord(0.0, "POST", "/ok", {"i": i}) for i in range(20)]
+
+        async with in_process_client(echo_app) as client:
+            report = await replay(records, client, concurrency=4)
+
+        assert report.mode == "closed-loop x4"
+        assert report.summary()["endpoints"]["/ok"]["requests"] == 20
+        assert report.slo_violations(parse_slos(["p99=60000"])) == []
+        assert len(report.slo_violations(parse_slos(["p50=0"]))) == 1
+
+    def test_rejects_unknown_percentiles(self):
+        with pytest.raises(ValueError):
+            parse_slos(["p42=10"])
@@ -0,0 +1,104 @@
+"""
+Unit tests for the risk assessment cache
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- RiskAssessmentCache
+- RiskScorer caching
+"""
+
+import asyncio
+import pytest
+
+from data.risk_cache import RiskAssessmentCache
+from models.risk_scorer import RiskScorer
+from schemas.fraud import RiskAssessmentRequest
+
+
+class CountingScorer(RiskScorer):
+    """RiskScorer that counts uncached assessments"""
+
+    def __init__(self, cache):
+        super().__init__(cache=cache)
+        self.computed = 0
+
+    async def _assess(self, request):
+        self.computed += 1
+        return await super()._assess(request)
+
+
+class TestRiskAssessmentCache:
+    """Test suite for RiskAssessmentCache"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_assessments_hit_the_cache(self):
+        """Same (user, type, window) is computed once"""
+        scorer = CountingScorer(RiskAssessmentCache())
+        request = RiskAssessmentRequest(user_id="user_1")
+
+        first = await scorer.assess(request)
+        second = await scorer.assess(request)
+
+        assert scorer.computed == 1
+        assert second is first
+
+    @pytest.mark.asyncio
+    async def test_key_includes_type_and_window(self):
+        scorer = CountingScorer(RiskAssessmentCache())
+
+        await scorer.assess(RiskAssessmentRequest(user_id="user_1"))
+        await scorer.assess(RiskAssessmentRequest(user_id="user_1", assessment_type="behavioral"))
+        await scorer.assess(RiskAssessmentRequest(user_id="user_1", historical_window_days=7))
+
+        assert scorer.computed == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidate_drops_only_that_user(self):
+        """New activity for a user invalidates all of their assessments"""
+        cache = RiskAssessmentCache()
+        scorer = CountingScorer(cache)
+        await scorer.assess(RiskAssessmentRequest(user_id="user_1"))
+        await scorer.assess(RiskAssessmentRequest(user_id="user_1", assessment_type="behavioral"))
+        await scorer.assess(RiskAssessmentRequest(user_id="user_2"))
+
+        assert cache.invalidate("user_1") == 2
+        assert len(cache) == 1
+
+        await scorer.assess(RiskAssessmentRequest(user_id="user_1"))
+        await scorer.assess(RiskAssessmentRequest(user_id="user_2"))
+        assert scorer.computed == 4
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_compute_is_not_cached(self):
+        """An assessment racing with new activity is not stored"""
+        cache = RiskAssessmentCache()
+        request = RiskAssessmentRequest(user_id="user_1")
+        release = asyncio.Event()
+
+        async def slow_compute():
+            await release.wait()
+            return await RiskScorer()._assess(request)
+
+        task = asyncio.create_task(cache.get_or_compute(request, slow_compute))
+        await asyncio.sleep(0)
+        cache.invalidate("user_1")
+        release.set()
+        await task
+
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_lru_bounds(self):
+        scorer = CountingScorer(RiskAssessmentCache(max_entries=2, ttl_seconds=0.0))
+        await scorer.assess(RiskAssessmentRequest(user_id="user_1"))
+        await scorer.assess(RiskAssessmentRequest(user_id="user_1"))
+        assert scorer.computed == 2
+
+        cache = RiskAssessmentCache(max_entries=2)
+        scorer = CountingScorer(cache)
+        for user_id in ("a", "b", "c"):
+            await scorer.assess(RiskAssessmentRequest(user_id=user_id))
+
+        assert len(cache) == 2
+        assert cache.get(cache.key(RiskAssessmentRequest(user_id="a"))) is None
+        assert cache.invalidate("a") == 0
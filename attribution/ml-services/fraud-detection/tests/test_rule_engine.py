@@ -0,0 +1,223 @@
+"""
+Unit tests for the fraud rule engine
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- compile_rule_set
+- RuleEngine hot reload
+- Rule files in TransactionFraudDetector and AnomalyDetector
+"""
+
+import asyncio
+import json
+import os
+import numpy as np
+import pytest
+
+from models.rule_engine import RuleEngine, compile_rule_set
+from models.transaction_fraud import TransactionFraudDetector
+from models.anomaly_detector import AnomalyDetector
+from schemas.fraud import AnomalyDetectionRequest
+
+
+def write_rules(path, rule_sets, version="v1"):
+    path.write_text(json.dumps({"version": version, "rule_sets": rule_sets}))
+
+
+class TestCompileRuleSet:
+    """Test suite for compiled rule sets"""
+
+    def test_batch_evaluation(self):
+        rule_set = compile_rule_set([
+            {"name": "big", "impact": 0.4, "when": {"field": "amount", "op": ">", "value": 1000}},
+            {"name": "night_and_new", "impact": 0.3, "when": {"all": [
+                {"field": "hour", "op": "between", "value": [0, 5]},
+                {"not": {"field": "account_age_days", "op": ">=", "value": 30}}
+            ]}},
+            {"name": "vs_history", "impact": 0.2, "when": {
+                "field": "amount", "op": ">", "ref": "historical_avg", "scale": 3
+            }},
+            {"name": "risky_mcc", "impact": 0.1, "when": {"any": [
+                {"field": "mcc", "op": "in", "value": [7995, 6051]},
+                {"field": "blocklist_hits", "op": ">=", "value": 1}
+            ]}}
+        ])
+        rows = [
+            {"amount": 50, "hour": 14, "account_age_days": 400, "historical_avg": 40},
+            {"amount": 1500, "hour": 3, "account_age_days": 2, "historical_avg": 100},
+            {"amount": 200, "hour": 3, "account_age_days": 90, "mcc": 7995},
+            {"amount": 10, "hour": 14, "blocklist_hits": ["ip"]}
+        ]
+
+        matches = rule_set.matches(rule_set.extract(rows))
+
+        assert rule_set.fields == ["amount", "hour", "account_age_days", "historical_avg", "mcc", "blocklist_hits"]
+        assert matches.tolist() == [
+            [False, False, False, False],
+            [True, True, True, False],
+            [False, False, True, True],
+            [False, False, True, True]
+        ]
+        assert rule_set.scores(matches) == pytest.approx([0.0, 0.9, 0.3, 0.3])
+
+    def test_descriptions_use_row_values(self):
+        rule_set = compile_rule_set([{
+            "name": "big", "description": "Amount ${value} in {merchant_category}",
+            "when": {"field": "amount", "op": ">", "value": 1}
+        }])
+
+        assert rule_set.rules[0].describe({"amount": 20, "merchant_category": "travel"}) == "Amount $20 in travel"
+        assert rule_set.rules[0].describe({"amount": 20}) == "Amount ${value} in {merchant_category}"
+
+    @pytest.mark.parametrize("spec", [
+        {"name": "no_when"},
+        {"name": "bad_op", "when": {"field": "amount", "op": "~", "value": 1}},
+        {"name": "no_value", "when": {"field": "amount", "op": ">"}},
+        {"name": "empty_all", "when": {"all": []}},
+        {"name": "bad_impact", "impact": "high", "when": {"field": "amount", "value": 1}}
+    ])
+    def test_invalid_rules_are_rejected(self, spec):
+        with pytest.raises(ValueError):
+            compile_rule_set([spec])
+
+
+class TestRuleEngine:
+    """Test suite for RuleEngine"""
+
+    def test_defaults_without_a_file(self):
+        engine = RuleEngine()
+
+        # high_risk_merchant ships disabled
+        assert len(engine.rule_set("transaction")) == 3
+        assert len(engine.rule_set("unknown")) == 0
+        assert engine.reload() is False
+
+    def test_hot_reload_keeps_previous_rules_on_errors(self, tmp_path):
+        path = tmp_path / "rules.json"
+        write_rules(path, {"transaction": [
+            {"name": "big", "impact": 0.5, "when": {"field": "amount", "op": ">", "value": 100}}
+        ]})
+        engine = RuleEngine(str(path))
+
+        assert engine.reload() is True
+        assert engine.reload() is False
+        assert engine.info()["version"] == "v1"
+
+        path.write_text('{"rule_sets": {"transaction": [{"name": "broken"}]}}')
+        os.utime(path, ns=(0, 10**9))
+        assert engine.reload() is False
+        assert engine.rule_set("transaction").rules[0].name == "big"
+
+        write_rules(path, {"transaction": []}, version="v2")
+        os.utime(path, ns=(0, 2 * 10**9))
+        assert engine.reload() is True
+        assert engine.info()["version"] == "v2"
+        assert len(engine.rule_set("transaction")) == 0
+
+
+    @pytest.mark.parametrize("document", [
+        [],
+        {"rule_sets": {"transaction": "x"}},
+        {"rule_sets": {"transaction": ["x"]}},
+        {"rule_sets": {"transaction": [{"name": ["a"], "when": {"field": "amount", "value": 1}}]}},
+        {"rule_sets": {"anomaly": [{"name": "a", "details": "x", "when": {"field": "amount", "value": 1}}]}},
+        {"rule_sets": {"anomaly": [{"name": "a", "details": {"k": ["x"]},
+                                    "when": {"field": "amount", "value": 1}}]}},
+    ])
+    def test_malformed_files_keep_previous_rules(self, tmp_path, document):
+        """Wrongly typed documents, rule sets, rules and details are rejected, not raised"""
+        path = tmp_path / "rules.json"
+        write_rules(path, {"transaction": [
+            {"name": "big", "impact": 0.5, "when": {"field": "amount", "op": ">", "value": 100}}
+        ]})
+        engine = RuleEngine(str(path))
+        assert engine.reload() is True
+
+        path.write_text(json.dumps(document))
+        os.utime(path, ns=(0, 10**9))
+        assert engine.reload() is False
+        assert engine.rule_set("transaction").rules[0].name == "big"
+
+    @pytest.mark.asyncio
+    async def test_watcher_survives_failing_reloads(self, tmp_path, monkeypatch):
+        path = tmp_path / "rules.json"
+        write_rules(path, {"transaction": []})
+        engine = RuleEngine(str(path), reload_interval_seconds=0.001)
+        calls = []
+
+        def failing_reload(force=False):
+            calls.append(force)
+            raise RuntimeError("unexpected")
+
+        engine.start()
+        monkeypatch.setattr(engine, "reload", failing_reload)
+        await asyncio.sleep(0.02)
+
+        assert len(calls) > 1
+        assert not engine._reload_task.done()
+        await engine.stop()
+
+
+class TestDetectorRules:
+    """Test suite for rule files in the detectors"""
+
+    @pytest.mark.asyncio
+    async def test_transaction_rules_drive_scores_and_factors(self, tmp_path, make_detection_request):
+        path = tmp_path / "rules.json"
+        write_rules(path, {"transaction": [{
+            "name": "electronics_over_100", "factor": "Large electronics purchase", "impact": 0.45,
+            "description": "${value} electronics purchase",
+            "when": {"all": [
+                {"field": "amount", "op": ">", "value": 100},
+                {"field": "velocity_1h", "op": "<=", "value": 5}
+            ]}
+        }]})
+        engine = RuleEngine(str(path))
+        engine.reload()
+        detector = TransactionFraudDetector(rules=engine, cascade_band=(0.2, 0.3))
+
+        result = await detector.detect(make_detection_request(amount=120.0))
+
+        assert result.scoring_stage == "rules"
+        assert result.fraud_score == pytest.approx(0.45)
+        assert result.risk_factors[0]["factor"] == "Large electronics purchase"
+        assert result.risk_factors[0]["description"] == "$120.0 electronics purchase"
+
+    @pytest.mark.asyncio
+    async def test_anomaly_rules_add_and_replace_fallbacks(self, tmp_path):
+        path = tmp_path / "rules.json"
+        write_rules(path, {"anomaly": [
+            {"name": "busy_day", "type": "frequency_pattern", "severity": 0.65,
+             "description": "{transaction_count_24h} transactions today",
+             "details": {"transaction_count_24h": "transaction_count_24h"},
+             "when": {"field": "transaction_count_24h", "op": ">", "value": 8}},
+            {"name": "many_devices", "type": "device_pattern", "severity": 0.55,
+             "description": "Many devices", "when": {"field": "devices_24h", "op": ">=", "value": 4}}
+        ]})
+        engine = RuleEngine(str(path))
+        engine.reload()
+        detector = AnomalyDetector(rules=engine)
+
+        result = await detector.detect(AnomalyDetectionRequest(
+            user_id="user_1",
+            behavior_data={"transaction_count_24h": 10, "devices_24h": 5, "avg_transaction_amount": 900}
+        ))
+
+        anomalies = {anomaly["type"]: anomaly for anomaly in result.anomalies_detected}
+        assert set(anomalies) == {"frequency_pattern", "device_pattern"}
+        assert anomalies["frequency_pattern"]["description"] == "10 transactions today"
+        assert anomalies["frequency_pattern"]["details"] == {"transaction_count_24h": 10}
+        assert result.anomaly_score == pytest.approx(0.65)
+
+    @pytest.mark.asyncio
+    async def test_default_anomaly_rules_match_previous_thresholds(self):
+        detector = AnomalyDetector()
+
+        result = await detector.detect(AnomalyDetectionRequest(
+            user_id="user_1",
+            behavior_data={"avg_transaction_amount": 500, "historical_avg": 50, "transaction_count_24h": 30}
+        ))
+
+        types = sorted(anomaly["type"] for anomaly in result.anomalies_detected)
+        assert types == ["frequency_pattern", "spending_pattern"]
+        assert np.isclose(result.anomaly_score, 0.7)
@@ -0,0 +1,117 @@
+"""
+Unit tests for champion/challenger shadow scoring
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- ShadowScorer
+- parse_challenger_paths
+"""
+
+import asyncio
+import numpy as np
+import pytest
+
+from models.shadow_scorer import ShadowScorer, parse_challenger_paths
+from models.transaction_fraud import TransactionFraudDetector
+
+
+class ConstantModel:
+    def __init__(self, score):
+        self.score = score
+
+    def predict_proba(self, features):
+        positive = np.full(len(features), self.score)
+        return np.column_stack([1.0 - positive, positive])
+
+
+class FailingModel:
+    """Challenger whose inference raises"""
+
+    def predict_proba(self, features):
+        raise RuntimeError("challenger failure")
+
+
+async def wait_for(condition, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError
+        await asyncio.sleep(0.001)
+
+
+class TestShadowScorer:
+    """Test suite for ShadowScorer"""
+
+    @pytest.mark.asyncio
+    async def test_challengers_score_detect_traffic(self, make_detection_request):
+        """Agreement and deltas are recorded per challenger"""
+        shadow = ShadowScorer({"agrees": ConstantModel(0.3), "flags_all": ConstantModel(0.9)})
+        detector = TransactionFraudDetector(shadow_scorer=shadow)
+        shadow.start()
+        try:
+            await detector.detect_batch([make_detection_request(), make_detection_request()])
+            await wait_for(lambda: shadow.stats["flags_all"].transactions == 2)
+        finally:
+            await shadow.stop()
+
+        summary = shadow.summary()["challengers"]
+        assert summary["agrees"]["agreement_rate"] == 1.0
+        assert summary["agrees"]["mean_score_delta"] == pytest.approx(0.05)
+        assert summary["flags_all"]["agreement_rate"] == 0.0
+        assert summary["flags_all"]["challenger_fraud"] == 2
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_instead_of_blocking(self):
+        shadow = ShadowScorer({"challenger": ConstantModel(0.5)}, queue_size=1)
+        shadow.start()
+        # Stop the consumer so the queue stays full
+        shadow._worker.cancel()
+
+        features = np.zeros((3, 4), dtype=np.float32)
+        assert shadow.submit(features, np.zeros(3))
+        assert not shadow.submit(features, np.zeros(3))
+        assert shadow.summary()["dropped_transactions"] == 3
+        await shadow.stop()
+
+    @pytest.mark.asyncio
+    async def test_submitted_batch_is_copied(self):
+        """Reusing the detector's feature buffer does not alter queued batches"""
+        shadow = ShadowScorer({"challenger": ConstantModel(0.5)})
+        shadow.start()
+        shadow._worker.cancel()
+        features = np.ones((1, 2), dtype=np.float32)
+        shadow.submit(features, np.zeros(1))
+        features[:] = 7
+
+        queued, _ = shadow._queue.get_nowait()
+        assert queued.tolist() == [[1.0, 1.0]]
+        await shadow.stop()
+
+    @pytest.mark.asyncio
+    async def test_failing_challenger_is_counted(self):
+        shadow = ShadowScorer({"broken": FailingModel(), "ok": ConstantModel(0.1)})
+        shadow.start()
+        try:
+            shadow.submit(np.zeros((1, 2), dtype=np.float32), np.zeros(1))
+            await wait_for(lambda: shadow.stats["ok"].transactions == 1)
+        finally:
+            await shadow.stop()
+
+        assert shadow.stats["broken"].errors == 1
+
+    def test_disabled_without_challengers(self):
+        shadow = ShadowScorer()
+        assert not shadow.enabled
+        assert not shadow.submit(np.zeros((1, 2)), np.zeros(1))
+
+
+class TestParseChallengerPaths:
+    """Test suite for parse_challenger_paths"""
+
+    def test_parse(self):
+        assert parse_challenger_paths("") == {}
+        assert parse_challenger_paths("gbm=/models/gbm.joblib, lr = /models/lr") == {
+            "gbm": "/models/gbm.joblib", "lr": "/models/lr"
+        }
+        with pytest.raises(ValueError):
+            parse_challenger_paths("no_path")
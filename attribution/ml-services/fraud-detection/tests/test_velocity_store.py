@@ -0,0 +1,143 @@
+"""
+Unit tests for the server-side velocity feature store
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Tests for:
+- KeyIndex
+- VelocityStore
+"""
+
+import asyncio
+import numpy as np
+import pytest
+
+from utils.key_index import KeyIndex, KeyIndexFull
+from data.velocity_store import VelocityStore
+from models.transaction_fraud import TransactionFraudDetector
+
+T0 = 1_760_000_000.0
+
+
+class TestKeyIndex:
+    """Test suite for KeyIndex"""
+
+    def test_dense_ids_and_lookup(self):
+        """Keys get dense ids that are stable across lookups"""
+        index = KeyIndex(capacity=100)
+        ids = [index.get_or_add(f"key_{i}")[0] for i in range(100)]
+
+        assert sorted(ids) == list(range(100))
+        assert index.lookup("key_42") == ids[42]
+        assert index.get_or_add("key_42") == (ids[42], False)
+        assert index.lookup("missing") == -1
+
+    def test_full_index_raises_until_ids_are_released(self):
+        """Released ids are reused once the index is full"""
+        index = KeyIndex(capacity=2)
+        first, _ = index.get_or_add("a")
+        index.get_or_add("b")
+        with pytest.raises(KeyIndexFull):
+            index.get_or_add("c")
+
+        index.remove_id(first)
+        assert index.lookup("a") == -1
+        assert index.get_or_add("c") == (first, True)
+
+    def test_churn_keeps_lookups_working(self):
+        """Heavy insert/remove churn does not exhaust empty slots"""
+        index = KeyIndex(capacity=64)
+        for round_number in range(50):
+            ids = [index.get_or_add(f"{round_number}:{i}")[0] for i in range(64)]
+            for key_id in ids:
+                index.remove_id(key_id)
+
+        assert len(index) == 0
+        assert index.lookup("missing") == -1
+
+    def test_batch_release_and_rebuild_keep_lookups(self):
+        """Vectorized releases and rebuilds, including runs wrapping past the table end"""
+        index = KeyIndex(capacity=2000)
+        ids = {f"key_{i}": index.get_or_add(f"key_{i}")[0] for i in range(2000)}
+
+        index.remove_ids(np.arange(0, 2000, 3))
+        index._rebuild()
+        assert index._tombstones == 0
+
+        for key, key_id in ids.items():
+            assert index.lookup(key) == (-1 if key_id % 3 == 0 else key_id)
+        assert len(index) == 2000 - len(range(0, 2000, 3))
+        assert index.get_or_add("new") == (1998, True)
+
+
+class TestVelocityStore:
+    """Test suite for VelocityStore"""
+
+    def test_sliding_windows(self):
+        """Counts and amounts expire out of the 1h and 24h windows"""
+        store = VelocityStore(capacity=10)
+        store.record("user:1", 10.0, T0)
+        store.record("user:1", 20.0, T0 + 600)
+        snapshot = store.record("user:1", 30.0, T0 + 1200)
+
+        assert snapshot.count_1h == 3
+        assert snapshot.amount_1h == pytest.approx(60.0)
+
+        later = store.get("user:1", T0 + 2 * 3600)
+        assert later.count_1h == 0
+        assert later.count_24h == 3
+
+        assert store.get("user:1", T0 + 26 * 3600).count_24h == 0
+
+    def test_idle_keys_are_evicted(self):
+        """Keys idle past the TTL release their slots"""
+        store = VelocityStore(capacity=10, idle_ttl_seconds=3600)
+        store.record("user:1", 5.0, T0)
+        store.record("user:2", 5.0, T0 + 7200)
+
+        assert store.evict_idle(T0 + 7200) == 1
+        assert len(store) == 1
+        assert store.get("user:1", T0 + 7200).count_24h == 0
+
+    @pytest.mark.asyncio
+    async def test_background_sweep_keeps_recently_touched_keys(self):
+        """Chunked sweeps release idle keys but skip keys touched since they started"""
+        store = VelocityStore(capacity=100, idle_ttl_seconds=3600, sweep_interval=1)
+        store.start(interval_seconds=3600)
+        for i in range(50):
+            store.record(f"user:{i}", 1.0, T0)
+        # Started stores do not sweep on the request path
+        store.record("user:late", 1.0, T0 + 7200)
+        assert len(store) == 51
+
+        sweep = asyncio.create_task(store.sweep(now=T0 + 7200, chunk_size=10))
+        await asyncio.sleep(0)
+        store.record("user:49", 1.0, T0 + 7200)
+
+        assert await sweep == 49
+        assert len(store) == 2
+        assert store.get("user:49", T0 + 7200).count_1h == 1
+        await store.stop()
+
+    def test_full_store_evicts_least_recent(self):
+        """A full store makes room instead of failing"""
+        store = VelocityStore(capacity=3)
+        for i in range(5):
+            store.record(f"user:{i}", 1.0, T0 + i)
+
+        assert len(store) <= 3
+        assert store.get("user:4", T0 + 5).count_1h == 1
+
+
+class TestServerSideVelocity:
+    """Detector uses server-side velocity instead of client fields"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_transactions_raise_velocity(self, make_detection_request):
+        detector = TransactionFraudDetector(velocity_store=VelocityStore(capacity=100))
+        requests = [make_detection_request(transaction_id=f"txn_{i}") for i in range(7)]
+
+        responses = await detector.detect_batch(requests)
+
+        column = detector.vectorizer.column('velocity_1h')
+        assert detector._feature_buffer[6, column] == 7
+        assert any(f["factor"] == "High transaction velocity" for f in responses[-1].risk_factors)
@@ -0,0 +1,271 @@
+"""
+Decision Audit Log
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Append-only log of fraud decisions for compliance. Request handlers only
+put the response on a bounded in-memory queue; a background thread
+serializes records, appends them to segment files and fsyncs them in
+groups (every `commit_interval_ms` or `commit_records` records, whichever
+comes first), so one fsync covers many decisions and a request never
+waits on the disk. If the queue is full the record is dropped and counted
+rather than blocking the request.
+
+Segment layout: an 8-byte magic, then records of
+
+    uint32 payload length | uint32 CRC-32 of payload | payload (JSON)
+
+little-endian. Segments rotate at `segment_bytes` and are named by their
+creation time and writer pid, so several workers can share one directory
+and names sort in time order. A torn or corrupt record ends the readable
+part of its segment (as after a crash mid-write); each writer starts a
+fresh segment, so earlier segments are never appended to again.
+
+    python -m utils.audit_log dump /var/log/fraud-audit --transaction-id txn_1
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FDAUDIT1"
+RECORD_HEADER = struct.Struct("<II")
+# Longer lengths can only come from a corrupt header
+MAX_RECORD_BYTES = 16 << 20
+SEGMENT_SUFFIX = ".audit"
+
+_STOP = object()
+
+
+def _fsync_directory(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AuditLogWriter:
+    """Background group-committed writer of decision records"""
+
+    def __init__(self, directory: str, commit_interval_ms: float = 10.0, commit_records: int = 256,
+                 segment_bytes: int = 64 << 20, queue_size: int = 100_000,
+                 dropped_counter=None, commit_histogram=None):
+        self.directory = directory
+        self.commit_interval = commit_interval_ms / 1000.0
+        self.commit_records = commit_records
+        self.segment_bytes = segment_bytes
+        self.dropped_counter = dropped_counter
+        self.commit_histogram = commit_histogram
+
+        self.written = 0
+        self.committed = 0
+        self.commits = 0
+        self.dropped = 0
+        self.errors = 0
+        self.segment_path: Optional[str] = None
+        self._segment_index = 0
+        self._segment_size = 0
+        self._file = None
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, record: Any) -> bool:
+        """Queue a response (pydantic model or dict) for the log; False if it was dropped"""
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped_counter is not None:
+                self.dropped_counter.inc()
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is fsynced (not for the request path)"""
+        if self._thread is None:
+            return False
+        committed = threading.Event()
+        try:
+            self._queue.put(committed, timeout=timeout)
+        except queue.Full:
+            return False
+        return committed.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Commit queued records and stop the writer thread"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("Audit log queue still full at shutdown, queued records are lost")
+        self._thread.join(timeout)
+        self._thread = None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "segment": self.segment_path,
+            "written": self.written,
+            "committed": self.committed,
+            "commits": self.commits,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+    def _run(self):
+        pending = 0
+        first_pending_at = 0.0
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, self.commit_interval - (time.monotonic() - first_pending_at))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            waiters = []
+            if item is _STOP:
+                self._commit()
+                self._close_segment()
+                return
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                if self._write(item):
+                    if not pending:
+                        first_pending_at = time.monotonic()
+                    pending += 1
+
+            due = pending and (pending >= self.commit_records
+                               or time.monotonic() - first_pending_at >= self.commit_interval)
+            if due or waiters:
+                self._commit()
+                pending = 0
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, record: Any) -> bool:
+        try:
+            body = record.model_dump(mode="json") if hasattr(record, "model_dump") else record
+            payload = json.dumps(body, separators=(",", ":"), default=str).encode("utf-8")
+            if self._file is None or self._segment_size >= self.segment_bytes:
+                self._rotate()
+            self._file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+            self._file.write(payload)
+            self._segment_size += RECORD_HEADER.size + len(payload)
+            self.written += 1
+            return True
+        except Exception:
+            logger.exception("Failed to write an audit record")
+            self.errors += 1
+            return False
+
+    def _commit(self):
+        if self._file is None or self.committed == self.written:
+            return
+        start_time = time.perf_counter()
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception:
+            logger.exception("Failed to fsync the audit log")
+            self.errors += 1
+            return
+        self.committed = self.written
+        self.commits += 1
+        if self.commit_histogram is not None:
+            self.commit_histogram.observe(time.perf_counter() - start_time)
+
+    def _rotate(self):
+        self._commit()
+        self._close_segment()
+        self._segment_index += 1
+        name = f"{int(time.time() * 1000):013d}-{os.getpid()}-{self._segment_index:04d}{SEGMENT_SUFFIX}"
+        self.segment_path = os.path.join(self.directory, name)
+        self._file = open(self.segment_path, "xb")
+        self._file.write(MAGIC)
+        self._segment_size = len(MAGIC)
+        # Make the new file itself durable, not just its contents
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        _fsync_directory(self.directory)
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def segment_paths(directory: str) -> List[str]:
+    """Segment files of a log directory in time order"""
+    return sorted(str(path) for path in Path(directory).glob(f"*{SEGMENT_SUFFIX}"))
+
+
+def read_segment(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of one segment, up to the first torn or corrupt record"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an audit log segment")
+        while True:
+            offset = f.tell()
+            header = f.read(RECORD_HEADER.size)
+            if not header:
+                return
+            if len(header) == RECORD_HEADER.size:
+                length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length) if length <= MAX_RECORD_BYTES else b""
+                if length <= MAX_RECORD_BYTES and len(payload) == length and zlib.crc32(payload) == crc:
+                    yield json.loads(payload)
+                    continue
+            logger.warning(f"Torn or corrupt audit record in {path} at offset {offset}, skipping the rest")
+            return
+
+
+def iter_records(directory: str) -> Iterator[Dict[str, Any]]:
+    """All readable records of a log directory, segment by segment"""
+    for path in segment_paths(directory):
+        yield from read_segment(path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fraud decision audit log")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dump = commands.add_parser("dump", help="Print records as JSON lines")
+    dump.add_argument("directory")
+    dump.add_argument("--transaction-id")
+    dump.add_argument("--user-id")
+
+    args = parser.parse_args(argv)
+    for record in iter_records(args.directory):
+        if args.transaction_id and record.get("transaction_id") != args.transaction_id:
+            continue
+        if args.user_id and record.get("user_id") != args.user_id:
+            continue
+        sys.stdout.write(json.dumps(record, separators=(",", ":")) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
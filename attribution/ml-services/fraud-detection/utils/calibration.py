@@ -0,0 +1,333 @@
+"""
+Threshold Calibration
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Offline job that turns labeled historical scores into the tier thresholds
+the services apply at startup (TransactionFraudDetector.risk_thresholds,
+AnomalyDetector.severity_thresholds, RiskScorer.risk_thresholds).
+
+Scores are sorted once (descending). Cumulative sums of the sorted labels
+at each distinct score give true/false positive counts for every cut
+point, so the full ROC and precision-recall curves, AUC, average
+precision, the cost-weighted optimal cut point and recall/precision
+targets all come from O(n) array passes after the O(n log n) sort.
+Per-segment curves reuse the same order: a stable sort of the small
+integer segment codes (radix sort in NumPy) groups each segment's scores
+while keeping them sorted. Memory is ~25 bytes per score, and inputs are
+memory-mapped `.npy` arrays, so hundreds of millions of scores fit one
+pass on a large machine.
+
+Boundaries, made non-decreasing:
+1. review: the highest cut point that still catches `review_recall` of fraud
+2. cost_optimal: minimum of cost_fp * false positives + cost_fn * misses
+3. alert: the lowest cut point with at least `alert_precision` precision
+Each model maps its threshold keys to boundaries by name. The transaction
+detector's tiers are review/alert and its `decision` key, the is_fraud
+cut point, is the cost-optimal one; the anomaly detector and RiskScorer
+use all three as tiers. The last key of each model (high/critical) stays
+1.0.
+
+Input: a directory of `scores.npy`, `labels.npy` and optional
+`segments.npy` (integer codes) with `segment_names.json`, the same arrays
+in a `.npz`, or a CSV with `score,label[,segment]` columns.
+
+    python -m utils.calibration run labeled/ --model transaction_detector --output thresholds.json
+    python -m utils.calibration run anomaly.npz --model anomaly_detector --output thresholds.json
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import numpy as np
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BOUNDARIES = ("review", "cost_optimal", "alert")
+# Service threshold attribute, {threshold key: calibrated boundary}, and the fixed top key
+MODEL_THRESHOLDS = {
+    "transaction_detector": (
+        "risk_thresholds", {"low": "review", "medium": "alert", "decision": "cost_optimal"}, "high"
+    ),
+    "anomaly_detector": (
+        "severity_thresholds", {"low": "review", "medium": "cost_optimal", "high": "alert"}, "critical"
+    ),
+    "risk_scorer": ("risk_thresholds", {"low": "review", "medium": "cost_optimal", "high": "alert"}, "critical")
+}
+# Request field the transaction detector's segment thresholds are keyed by
+SEGMENT_FIELD = "merchant_category"
+FORMAT_VERSION = 2
+
+
+@dataclass
+class OperatingCurve:
+    """Confusion counts at every distinct score cut point (flag when score >= threshold)"""
+    thresholds: np.ndarray
+    tps: np.ndarray
+    fps: np.ndarray
+    positives: int
+    negatives: int
+
+    @property
+    def tpr(self) -> np.ndarray:
+        return self.tps / self.positives
+
+    @property
+    def fpr(self) -> np.ndarray:
+        return self.fps / self.negatives
+
+    @property
+    def precision(self) -> np.ndarray:
+        return self.tps / (self.tps + self.fps)
+
+    def auc(self) -> float:
+        fpr = np.concatenate([[0.0], self.fpr])
+        tpr = np.concatenate([[0.0], self.tpr])
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0))
+
+    def average_precision(self) -> float:
+        recall = np.concatenate([[0.0], self.tpr])
+        return float(np.sum(np.diff(recall) * self.precision))
+
+    def cost_optimal(self, cost_fp: float, cost_fn: float) -> Tuple[float, float]:
+        """(threshold, expected cost per transaction) minimizing cost_fp * FP + cost_fn * FN"""
+        costs = cost_fp * self.fps + cost_fn * (self.positives - self.tps)
+        best = int(np.argmin(costs))
+        total = self.positives + self.negatives
+        # Flagging nothing costs every miss
+        if costs[best] >= cost_fn * self.positives:
+            return 1.0, cost_fn * self.positives / total
+        return float(self.thresholds[best]), float(costs[best]) / total
+
+    def threshold_for_recall(self, recall: float) -> float:
+        """Highest cut point catching at least `recall` of the positives"""
+        index = int(np.searchsorted(self.tps, np.ceil(recall * self.positives), side="left"))
+        return float(self.thresholds[min(index, len(self.thresholds) - 1)])
+
+    def threshold_for_precision(self, precision: float) -> float:
+        """Lowest cut point with at least `precision`, 1.0 if none reaches it"""
+        reached = np.flatnonzero(self.precision >= precision)
+        return float(self.thresholds[reached[-1]]) if len(reached) else 1.0
+
+    def points(self, max_points: int = 1000) -> Dict[str, List[List[float]]]:
+        """ROC and PR curves downsampled to at most max_points cut points"""
+        step = max(1, int(np.ceil(len(self.thresholds) / max_points)))
+        index = np.unique(np.concatenate([np.arange(0, len(self.thresholds), step), [len(self.thresholds) - 1]]))
+        thresholds = self.thresholds[index].tolist()
+        fpr, tpr, precision = self.fpr[index].tolist(), self.tpr[index].tolist(), self.precision[index].tolist()
+        return {
+            "roc": [[round(f, 6), round(t, 6), round(s, 6)] for f, t, s in zip(fpr, tpr, thresholds)],
+            "pr": [[round(r, 6), round(p, 6), round(s, 6)] for r, p, s in zip(tpr, precision, thresholds)]
+        }
+
+
+def operating_curve(sorted_scores: np.ndarray, sorted_labels: np.ndarray) -> OperatingCurve:
+    """Curve of scores already sorted in descending order"""
+    n = len(sorted_scores)
+    # Last position of each run of equal scores: cutting there includes all ties
+    distinct = np.flatnonzero(np.diff(sorted_scores))
+    distinct = np.append(distinct, n - 1)
+    tps = np.cumsum(sorted_labels, dtype=np.int64)[distinct]
+    fps = distinct + 1 - tps
+    positives = int(tps[-1])
+    return OperatingCurve(sorted_scores[distinct], tps, fps, positives, n - positives)
+
+
+def _summary(curve: OperatingCurve, cost_fp: float, cost_fn: float, review_recall: float,
+             alert_precision: float) -> Dict[str, Any]:
+    cost_threshold, cost = curve.cost_optimal(cost_fp, cost_fn)
+    boundaries = np.maximum.accumulate([
+        curve.threshold_for_recall(review_recall),
+        cost_threshold,
+        curve.threshold_for_precision(alert_precision)
+    ])
+    return {
+        "boundaries": [round(float(b), 6) for b in boundaries],
+        "metrics": {
+            "positives": curve.positives,
+            "negatives": curve.negatives,
+            "auc": round(curve.auc(), 6),
+            "average_precision": round(curve.average_precision(), 6),
+            "cost_optimal_threshold": round(cost_threshold, 6),
+            "expected_cost": round(cost, 6)
+        }
+    }
+
+
+def calibrate(scores: np.ndarray, labels: np.ndarray, segments: Optional[np.ndarray] = None,
+              segment_names: Optional[List[str]] = None, cost_fp: float = 1.0, cost_fn: float = 10.0,
+              review_recall: float = 0.95, alert_precision: float = 0.9,
+              min_segment_positives: int = 50, curve_points: int = 1000) -> Dict[str, Any]:
+    """Global and per-segment tier boundaries, metrics and curves from one sort"""
+    scores = np.asarray(scores, dtype=np.float32)
+    labels = np.asarray(labels).astype(bool, copy=False)
+    if len(scores) != len(labels):
+        raise ValueError("scores and labels differ in length")
+    positives = int(np.count_nonzero(labels))
+    if positives == 0 or positives == len(labels):
+        raise ValueError("Calibration needs both fraud and legitimate labels")
+
+    order = np.argsort(scores)[::-1]
+    sorted_scores = scores[order]
+    sorted_labels = labels[order]
+    curve = operating_curve(sorted_scores, sorted_labels)
+    result = _summary(curve, cost_fp, cost_fn, review_recall, alert_precision)
+    result["curves"] = curve.points(curve_points)
+    result["segments"] = {}
+
+    if segments is not None:
+        sorted_segments = np.asarray(segments)[order]
+        del order
+        if not np.issubdtype(sorted_segments.dtype, np.integer):
+            raise ValueError("segments must be non-negative integer codes")
+        counts = np.bincount(sorted_segments)
+        if len(counts) <= 1 << 16:
+            sorted_segments = sorted_segments.astype(np.uint16)
+        # Stable, so scores stay in descending order within each segment
+        grouped = np.argsort(sorted_segments, kind="stable")
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        for code in np.flatnonzero(counts).tolist():
+            index = grouped[bounds[code]:bounds[code + 1]]
+            segment_labels = sorted_labels[index]
+            segment_positives = int(np.count_nonzero(segment_labels))
+            name = segment_names[code] if segment_names is not None else str(code)
+            if segment_positives < min_segment_positives or segment_positives == len(index):
+                logger.info(f"Segment {name}: {segment_positives} positives, using global thresholds")
+                continue
+            result["segments"][name] = _summary(
+                operating_curve(sorted_scores[index], segment_labels),
+                cost_fp, cost_fn, review_recall, alert_precision
+            )
+    return result
+
+
+def model_thresholds(model: str, boundaries: List[float]) -> Dict[str, float]:
+    """Calibrated boundaries (in BOUNDARIES order) under a model's threshold keys"""
+    _, keys, top = MODEL_THRESHOLDS[model]
+    named = dict(zip(BOUNDARIES, boundaries))
+    thresholds = {key: named[boundary] for key, boundary in keys.items()}
+    thresholds[top] = 1.0
+    return thresholds
+
+
+def load_labeled_scores(path: str) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[List[str]]]:
+    """(scores, labels, segment codes, segment names) from a .npy directory, .npz or CSV"""
+    source = Path(path)
+    if source.is_dir():
+        arrays = {f.stem: np.load(f, mmap_mode="r") for f in source.glob("*.npy")}
+        names_path = source / "segment_names.json"
+        names = json.loads(names_path.read_text()) if names_path.exists() else None
+        return arrays["scores"], arrays["labels"], arrays.get("segments"), names
+    if source.suffix == ".npz":
+        with np.load(source) as archive:
+            names = archive["segment_names"].tolist() if "segment_names" in archive else None
+            segments = archive["segments"] if "segments" in archive else None
+            return archive["scores"], archive["labels"], segments, names
+
+    scores, labels, segment_values = [], [], []
+    with open(source, newline="") as f:
+        for row in csv.DictReader(f):
+            scores.append(float(row["score"]))
+            labels.append(row["label"].strip().lower() in ("1", "true", "fraud"))
+            if "segment" in row:
+                segment_values.append(row["segment"])
+    if not segment_values:
+        return np.array(scores, dtype=np.float32), np.array(labels), None, None
+    names, codes = np.unique(segment_values, return_inverse=True)
+    return np.array(scores, dtype=np.float32), np.array(labels), codes, names.tolist()
+
+
+def load_thresholds(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        document = json.load(f)
+    if document.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported threshold file version in {path}: {document.get('version')}")
+    for name, entry in document.get("models", {}).items():
+        if name not in MODEL_THRESHOLDS:
+            raise ValueError(f"Unknown model '{name}' in {path}")
+        _, keys, top = MODEL_THRESHOLDS[name]
+        for thresholds in [entry["thresholds"], *entry.get("segments", {}).values()]:
+            if set(thresholds) != {*keys, top}:
+                raise ValueError(f"Thresholds for {name} in {path} must have keys {[*keys, top]}")
+    return document
+
+
+def apply_thresholds(document: Dict[str, Any], models: Dict[str, Any]):
+    """Replace the services' threshold constants with calibrated ones"""
+    for name, entry in document.get("models", {}).items():
+        model = models.get(name)
+        if model is None:
+            continue
+        attribute = MODEL_THRESHOLDS[name][0]
+        setattr(model, attribute, dict(entry["thresholds"]))
+        if hasattr(model, "segment_thresholds"):
+            model.segment_thresholds = {segment: dict(t) for segment, t in entry.get("segments", {}).items()}
+        logger.info(f"Applied calibrated thresholds to {name}: {entry['thresholds']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calibrate fraud service thresholds from labeled scores")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Calibrate one model and merge it into the threshold file")
+    run.add_argument("input", help="Directory of .npy arrays, .npz or CSV (score,label[,segment])")
+    run.add_argument("--model", required=True, choices=sorted(MODEL_THRESHOLDS))
+    run.add_argument("--output", required=True, help="Threshold JSON loaded via FRAUD_THRESHOLDS_PATH")
+    run.add_argument("--cost-fp", type=float, default=1.0, help="Cost of flagging a legitimate transaction")
+    run.add_argument("--cost-fn", type=float, default=10.0, help="Cost of missing a fraudulent one")
+    run.add_argument("--review-recall", type=float, default=0.95)
+    run.add_argument("--alert-precision", type=float, default=0.9)
+    run.add_argument("--min-segment-positives", type=int, default=50)
+    run.add_argument("--curves", help="Also write ROC/PR curves to this JSON file")
+    run.add_argument("--curve-points", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    scores, labels, segments, segment_names = load_labeled_scores(args.input)
+    if segments is not None and args.model != "transaction_detector":
+        logger.info("Segment thresholds are only applied by the transaction detector, ignoring segments")
+        segments = None
+    result = calibrate(
+        scores, labels, segments, segment_names,
+        cost_fp=args.cost_fp, cost_fn=args.cost_fn, review_recall=args.review_recall,
+        alert_precision=args.alert_precision, min_segment_positives=args.min_segment_positives,
+        curve_points=args.curve_points
+    )
+
+    document = {"version": FORMAT_VERSION, "models": {}}
+    if os.path.exists(args.output):
+        document = load_thresholds(args.output)
+    entry = {
+        "thresholds": model_thresholds(args.model, result["boundaries"]),
+        "metrics": result["metrics"],
+        "calibrated_at": datetime.utcnow().isoformat(),
+        "source": str(args.input)
+    }
+    if result["segments"]:
+        entry["segment_field"] = SEGMENT_FIELD
+        entry["segments"] = {
+            name: model_thresholds(args.model, segment["boundaries"])
+            for name, segment in result["segments"].items()
+        }
+        entry["segment_metrics"] = {name: segment["metrics"] for name, segment in result["segments"].items()}
+    document["models"][args.model] = entry
+
+    with open(args.output, "w") as f:
+        json.dump(document, f, indent=2)
+    if args.curves:
+        with open(args.curves, "w") as f:
+            json.dump(result["curves"], f)
+
+    sys.stdout.write(json.dumps({"model": args.model, **entry["metrics"], "thresholds": entry["thresholds"]}) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
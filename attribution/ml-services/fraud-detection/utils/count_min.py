@@ -0,0 +1,125 @@
+"""
+Count-Min Sketch
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Fixed-memory frequency estimates for an unbounded key space. Each key
+maps to one counter per row (double hashing of a blake2b digest), and
+every counter holds several channels (e.g. count, amount, fraud count), so
+one hash serves all of a key's statistics. Estimates never undercount;
+they overcount by at most e/width of the channel total with probability
+1 - exp(-depth).
+
+HeavyHitters keeps the top-k keys by estimated count next to a sketch, for
+reporting the largest keys without storing all of them.
+"""
+
+import hashlib
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+MASK64 = (1 << 64) - 1
+
+
+def _hash_pair(key: str) -> Tuple[int, int]:
+    hashed = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest(), "little")
+    return hashed & MASK64, (hashed >> 64) | 1
+
+
+class CountMinSketch:
+    """depth x width x channels float64 counters"""
+
+    def __init__(self, width: int = 65536, depth: int = 4, channels: int = 1):
+        if width < 1 or depth < 1 or channels < 1:
+            raise ValueError("width, depth and channels must be positive")
+        self.width = width
+        self.depth = depth
+        self.channels = channels
+        self.table = np.zeros((depth, width, channels), dtype=np.float64)
+        self._rows = np.arange(depth, dtype=np.int64)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.table.nbytes
+
+    def indices(self, keys: Sequence[str]) -> np.ndarray:
+        """(keys x depth) counter positions"""
+        pairs = np.array([_hash_pair(key) for key in keys], dtype=np.uint64).reshape(len(keys), 2)
+        probes = self._rows.astype(np.uint64)
+        # uint64 arithmetic wraps like the 64-bit double hashing it implements
+        positions = (pairs[:, :1] + probes * pairs[:, 1:]) % np.uint64(self.width)
+        return positions.astype(np.int64)
+
+    def add(self, keys: Sequence[str], values: np.ndarray, indices: Optional[np.ndarray] = None):
+        """Add a (keys x channels) block of increments"""
+        if not len(keys):
+            return
+        if indices is None:
+            indices = self.indices(keys)
+        values = np.asarray(values, dtype=np.float64).reshape(len(keys), self.channels)
+        rows = np.broadcast_to(self._rows, indices.shape)
+        # Repeated keys in one batch must accumulate, hence add.at
+        np.add.at(self.table, (rows.ravel(), indices.ravel()),
+                  np.repeat(values, self.depth, axis=0))
+
+    def query(self, keys: Sequence[str], indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """(keys x channels) estimates: the minimum over rows, per channel"""
+        if not len(keys):
+            return np.zeros((0, self.channels), dtype=np.float64)
+        if indices is None:
+            indices = self.indices(keys)
+        return self.table[self._rows, indices].min(axis=1)
+
+    def decay(self, factor: float):
+        """Scale every counter, e.g. for exponential forgetting"""
+        self.table *= factor
+
+    def merge(self, other: "CountMinSketch"):
+        if (other.width, other.depth, other.channels) != (self.width, self.depth, self.channels):
+            raise ValueError("Cannot merge sketches of different shapes")
+        self.table += other.table
+
+
+class HeavyHitters:
+    """Top-k keys by estimated count (sketch estimates, so no per-key history is kept)"""
+
+    def __init__(self, k: int = 1000):
+        self.k = k
+        self.estimates: Dict[str, float] = {}
+        self._min_key: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.estimates)
+
+    def offer(self, key: str, estimate: float):
+        """Track the key if its estimate is among the top k"""
+        if key in self.estimates:
+            self.estimates[key] = estimate
+            if key == self._min_key:
+                self._min_key = None
+            return
+
+        if len(self.estimates) < self.k:
+            self.estimates[key] = estimate
+            if self._min_key is not None and estimate < self.estimates[self._min_key]:
+                self._min_key = key
+            return
+
+        min_key = self._minimum()
+        if estimate > self.estimates[min_key]:
+            del self.estimates[min_key]
+            self.estimates[key] = estimate
+            self._min_key = None
+
+    def decay(self, factor: float):
+        for key in self.estimates:
+            self.estimates[key] *= factor
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        ranked = sorted(self.estimates.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+    def _minimum(self) -> str:
+        # Recomputed only after the cached minimum was replaced or grew
+        if self._min_key is None:
+            self._min_key = min(self.estimates, key=self.estimates.__getitem__)
+        return self._min_key
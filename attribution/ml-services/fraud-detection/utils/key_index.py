@@ -0,0 +1,300 @@
+"""
+Compact Key Index
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Fixed-capacity open-addressing hash table that interns string keys as dense
+integer ids, so per-key state can live in preallocated NumPy arrays instead
+of Python dicts of objects. Keys are stored as 64-bit hashes only (about 28
+bytes per key including the id tables). KeyedStateStore adds idle-key
+eviction on top for bounded per-key state stores.
+
+Releases and table rebuilds are vectorized, and a started store sweeps
+idle keys in a background task, in chunks that yield to the event loop,
+so eviction does not stall the requests that touch keys.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+import numpy as np
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EMPTY = 0
+TOMBSTONE = 1
+
+
+def hash_key(key: str) -> int:
+    """Signed 64-bit hash of a key, never colliding with the reserved markers"""
+    hashed = int.from_bytes(
+        hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big", signed=True
+    )
+    return hashed if hashed not in (EMPTY, TOMBSTONE) else 2
+
+
+class KeyIndexFull(Exception):
+    """Raised when no free id is left for a new key"""
+
+
+class KeyIndex:
+    """String key -> dense id in [0, capacity) with O(1) expected lookups"""
+
+    def __init__(self, capacity: int, load_factor: float = 0.5):
+        if capacity < 1:
+            raise ValueError("KeyIndex capacity must be positive")
+
+        self.capacity = capacity
+        table_size = 1
+        while table_size * load_factor < capacity:
+            table_size <<= 1
+        self._mask = table_size - 1
+
+        self._hashes = np.zeros(table_size, dtype=np.int64)
+        self._ids = np.full(table_size, -1, dtype=np.int32)
+        self._slot_of_id = np.full(capacity, -1, dtype=np.int64)
+
+        # Stack of released ids; fresh ids are handed out sequentially
+        self._free_ids = np.empty(capacity, dtype=np.int32)
+        self._free_count = 0
+        self._next_id = 0
+        self._size = 0
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def full(self) -> bool:
+        return self._size >= self.capacity
+
+    @property
+    def id_limit(self) -> int:
+        """Upper bound (exclusive) of ids handed out so far"""
+        return self._next_id
+
+    def lookup(self, key: str) -> int:
+        """Id of a key, or -1 if it is not indexed"""
+        hashed = hash_key(key)
+        slot = hashed & self._mask
+        while True:
+            stored = self._hashes[slot]
+            if stored == EMPTY:
+                return -1
+            if stored == hashed:
+                return int(self._ids[slot])
+            slot = (slot + 1) & self._mask
+
+    def get_or_add(self, key: str) -> Tuple[int, bool]:
+        """(id, created) for a key, adding it if needed"""
+        hashed = hash_key(key)
+        slot = hashed & self._mask
+        reusable_slot = -1
+
+        while True:
+            stored = self._hashes[slot]
+            if stored == EMPTY:
+                break
+            if stored == hashed:
+                return int(self._ids[slot]), False
+            if stored == TOMBSTONE and reusable_slot < 0:
+                reusable_slot = slot
+            slot = (slot + 1) & self._mask
+
+        if self.full:
+            raise KeyIndexFull(f"KeyIndex is full ({self.capacity} keys)")
+
+        if reusable_slot >= 0:
+            slot = reusable_slot
+            self._tombstones -= 1
+
+        if self._free_count:
+            self._free_count -= 1
+            key_id = int(self._free_ids[self._free_count])
+        else:
+            key_id = self._next_id
+            self._next_id += 1
+
+        self._hashes[slot] = hashed
+        self._ids[slot] = key_id
+        self._slot_of_id[key_id] = slot
+        self._size += 1
+        self._maybe_rebuild()
+        return key_id, True
+
+    def remove_id(self, key_id: int):
+        """Release an id so it can be reused for another key"""
+        self.remove_ids(np.array([key_id], dtype=np.int64))
+
+    def remove_ids(self, key_ids: np.ndarray):
+        """Release a batch of ids, rebuilding the table at most once"""
+        key_ids = np.unique(np.asarray(key_ids, dtype=np.int64))
+        slots = self._slot_of_id[key_ids]
+        assigned = slots >= 0
+        key_ids, slots = key_ids[assigned], slots[assigned]
+        if not len(key_ids):
+            return
+
+        self._hashes[slots] = TOMBSTONE
+        self._ids[slots] = -1
+        self._slot_of_id[key_ids] = -1
+        self._free_ids[self._free_count:self._free_count + len(key_ids)] = key_ids
+        self._free_count += len(key_ids)
+        self._size -= len(key_ids)
+        self._tombstones += len(key_ids)
+        self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        # Lookups stop at empty slots, so keep tombstones from crowding them out
+        if self._tombstones and self._size + self._tombstones > 0.75 * len(self._hashes):
+            self._rebuild()
+
+    def _rebuild(self):
+        """Reinsert live keys into a table without tombstones"""
+        live = (self._hashes != EMPTY) & (self._hashes != TOMBSTONE)
+        hashes = self._hashes[live]
+        ids = self._ids[live]
+
+        # Linear probing in home-slot order puts the i-th key at
+        # max(home_i, slot_{i-1} + 1), i.e. i + running max of (home_j - j)
+        homes = hashes & self._mask
+        order = np.argsort(homes, kind="stable")
+        hashes, ids, homes = hashes[order], ids[order], homes[order]
+        ranks = np.arange(len(homes), dtype=np.int64)
+        slots = ranks + np.maximum.accumulate(homes - ranks) if len(homes) else homes
+        in_table = slots <= self._mask
+
+        self._hashes.fill(EMPTY)
+        self._ids.fill(-1)
+        self._hashes[slots[in_table]] = hashes[in_table]
+        self._ids[slots[in_table]] = ids[in_table]
+        self._slot_of_id[ids[in_table]] = slots[in_table]
+
+        # The run reaching the end of the table wraps around to its start
+        for hashed, key_id in zip(hashes[~in_table].tolist(), ids[~in_table].tolist()):
+            slot = 0
+            while self._hashes[slot] != EMPTY:
+                slot += 1
+            self._hashes[slot] = hashed
+            self._ids[slot] = key_id
+            self._slot_of_id[key_id] = slot
+        self._tombstones = 0
+
+    def active_ids(self) -> np.ndarray:
+        """Boolean mask over ids currently assigned to a key"""
+        return self._slot_of_id >= 0
+
+
+class KeyedStateStore:
+    """Base class for bounded per-key state stored in arrays indexed by key id"""
+
+    def __init__(self, capacity: int, idle_ttl_seconds: int, sweep_interval: int = 100_000):
+        self.capacity = capacity
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.sweep_interval = sweep_interval
+
+        self.index = KeyIndex(capacity)
+        self.last_seen = np.zeros(capacity, dtype=np.uint32)
+        self._records_since_sweep = 0
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def touch(self, key: str, timestamp: float) -> Tuple[int, bool]:
+        """(id, created) for a key seen at `timestamp`, making room if the store is full"""
+        try:
+            key_id, created = self.index.get_or_add(key)
+        except KeyIndexFull:
+            evicted = self.evict_idle(timestamp)
+            if not evicted:
+                evicted = self._evict_least_recent(max(1, self.capacity // 100))
+            logger.warning(f"{type(self).__name__} full, evicted {evicted} keys")
+            key_id, created = self.index.get_or_add(key)
+
+        self.last_seen[key_id] = max(int(self.last_seen[key_id]), int(timestamp))
+
+        # Started stores sweep in the background instead
+        self._records_since_sweep += 1
+        if self._sweep_task is None and self._records_since_sweep >= self.sweep_interval:
+            self.evict_idle(timestamp)
+
+        return key_id, created
+
+    def start(self, interval_seconds: float = 60.0, chunk_size: int = 10_000):
+        """Sweep idle keys periodically off the request path"""
+        if self._sweep_task is None and interval_seconds > 0:
+            self._sweep_task = asyncio.get_running_loop().create_task(
+                self._sweep_periodically(interval_seconds, chunk_size)
+            )
+
+    async def stop(self):
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+
+    async def sweep(self, now: Optional[float] = None, chunk_size: int = 10_000) -> int:
+        """Release idle keys in chunks, yielding to the event loop between them"""
+        now = time.time() if now is None else now
+        self._records_since_sweep = 0
+        candidates = self._idle_ids(now)
+
+        released = 0
+        for start in range(0, len(candidates), chunk_size):
+            # Keys touched while the sweep was yielding are kept
+            chunk = candidates[start:start + chunk_size]
+            chunk = chunk[self.index.active_ids()[chunk] & (self.last_seen[chunk] < now - self.idle_ttl_seconds)]
+            self._release(chunk)
+            released += len(chunk)
+            await asyncio.sleep(0)
+        return released
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Release keys not seen within the idle TTL"""
+        now = time.time() if now is None else now
+        self._records_since_sweep = 0
+
+        idle = self._idle_ids(now)
+        self._release(idle)
+        return len(idle)
+
+    def _idle_ids(self, now: float) -> np.ndarray:
+        limit = self.index.id_limit
+        active = self.index.active_ids()[:limit]
+        return np.nonzero(active & (self.last_seen[:limit] < now - self.idle_ttl_seconds))[0]
+
+    def _evict_least_recent(self, count: int) -> int:
+        limit = self.index.id_limit
+        active_ids = np.nonzero(self.index.active_ids()[:limit])[0]
+        if not len(active_ids):
+            return 0
+        count = min(count, len(active_ids))
+        oldest = np.argpartition(self.last_seen[active_ids], count - 1)[:count]
+        self._release(active_ids[oldest])
+        return count
+
+    def _release(self, key_ids: np.ndarray):
+        if not len(key_ids):
+            return
+        self.index.remove_ids(key_ids)
+        self.last_seen[key_ids] = 0
+        self._clear_state(key_ids)
+
+    def _clear_state(self, key_ids: np.ndarray):
+        """Reset the per-key arrays of released ids"""
+        raise NotImplementedError
+
+    async def _sweep_periodically(self, interval_seconds: float, chunk_size: int):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                released = await self.sweep(chunk_size=chunk_size)
+                if released:
+                    logger.info(f"{type(self).__name__} swept {released} idle keys")
+            except Exception:
+                logger.exception(f"{type(self).__name__} sweep failed")
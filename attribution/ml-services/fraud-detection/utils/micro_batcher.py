@@ -0,0 +1,129 @@
+"""
+Micro-Batching Scheduler
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Collects concurrent requests for up to a few milliseconds (or until a batch
+is full), runs one batched call for all of them and fans the results back
+to the awaiting callers.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Async micro-batcher around a batch processing function"""
+
+    def __init__(self, process_batch: Callable[[List[Any]], Any],
+                 max_batch_size: int = 64, max_delay_ms: float = 2.0,
+                 batch_size_histogram=None, queue_delay_histogram=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000.0
+        self.batch_size_histogram = batch_size_histogram
+        self.queue_delay_histogram = queue_delay_histogram
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """Start the batching loop on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop, failing any requests still queued"""
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result from the next batch"""
+        if not self.running:
+            self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            await self._dispatch(batch)
+
+    async def _collect_batch(self) -> List[Tuple[Any, asyncio.Future, float]]:
+        first = await self._queue.get()
+        batch = [first]
+        deadline = first[2] + self.max_delay
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        dispatched_at = time.perf_counter()
+        if self.batch_size_histogram is not None:
+            self.batch_size_histogram.observe(len(batch))
+        if self.queue_delay_histogram is not None:
+            for _, _, enqueued_at in batch:
+                self.queue_delay_histogram.observe(dispatched_at - enqueued_at)
+
+        # Callers that went away (e.g. client disconnects) are not scored
+        pending = [(item, future) for item, future, _ in batch if not future.done()]
+        if not pending:
+            return
+
+        try:
+            results = self.process_batch([item for item, _ in pending])
+            if inspect.isawaitable(results):
+                results = await results
+            if len(results) != len(pending):
+                raise RuntimeError(
+                    f"Batch function returned {len(results)} results for {len(pending)} items"
+                )
+        except Exception as e:
+            logger.error(f"Batched inference failed: {str(e)}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,344 @@
+"""
+Record and Replay Load Harness
+UnMoGrowP Attribution Platform - Fraud Detection Service
+
+Records API requests to gzip-compressed JSON lines and replays them against
+the service to measure latency percentiles and throughput per endpoint,
+e.g. before and after a model swap.
+
+Replay runs in-process (httpx ASGITransport with the app's startup and
+shutdown handlers) or over HTTP, either open-loop (requests are sent on an
+arrival schedule whether or not earlier ones finished, and latency is
+measured from the scheduled send time so a stalled server is not hidden by
+coordinated omission) or closed-loop with a fixed number of workers.
+
+    python -m utils.replay generate detect.jsonl.gz --count 20000
+    python -m utils.replay run detect.jsonl.gz --qps 500 --slo p99=50
+    python -m utils.replay run detect.jsonl.gz --url http://localhost:8087 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+import numpy as np
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+PERCENTILES = {"p50": 50.0, "p95": 95.0, "p99": 99.0, "p999": 99.9}
+
+
+@dataclass
+class ReplayRecord:
+    """One recorded request; offset is seconds since the first request"""
+    offset: float
+    method: str
+    path: str
+    body: Optional[Dict[str, Any]] = None
+
+
+class RequestRecorder:
+    """Appends requests to a gzip JSON-lines file ('{pid}' in the path is expanded per worker)"""
+
+    def __init__(self, path: str):
+        self.path = path.format(pid=os.getpid())
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._file = gzip.open(self.path, "at", encoding="utf-8")
+
+    def record(self, path: str, body: Optional[Dict[str, Any]], method: str = "POST"):
+        line = json.dumps(
+            {"ts": round(time.time(), 6), "method": method, "path": path, "body": body},
+            separators=(",", ":")
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def write_records(path: str, records: Iterable[ReplayRecord]):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(
+                {"ts": record.offset, "method": record.method, "path": record.path, "body": record.body},
+                separators=(",", ":")
+            ) + "\n")
+
+
+def read_records(path: str) -> List[ReplayRecord]:
+    """Load a recording ordered by time, with offsets relative to the first request"""
+    rows = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rows.append(json.loads(line))
+    rows.sort(key=lambda row: row["ts"])
+    start = rows[0]["ts"] if rows else 0.0
+    return [
+        ReplayRecord(row["ts"] - start, row.get("method", "POST"), row["path"], row.get("body"))
+        for row in rows
+    ]
+
+
+def generate_detect_records(count: int, rate: float = 100.0, users: int = 1000,
+                            seed: int = 0) -> List[ReplayRecord]:
+    """Synthetic /api/fraud/detect traffic at a uniform rate, for baselines without a recording"""
+    rng = random.Random(seed)
+    start = datetime(2025, 10, 23, 0, 0, 0)
+    categories = ["electronics", "fashion", "grocery", "travel", "gaming"]
+    records = []
+    for i in range(count):
+        user = rng.randrange(users)
+        amount = round(rng.lognormvariate(4.0, 1.2), 2)
+        records.append(ReplayRecord(i / rate, "POST", "/api/fraud/detect", {
+            "transaction_data": {
+                "transaction_id": f"replay_{i}",
+                "user_id": f"user_{user}",
+                "amount": amount,
+                "payment_method": rng.choice(["credit_card", "debit_card", "wallet"]),
+                "merchant_id": f"merchant_{rng.randrange(200)}",
+                "merchant_category": rng.choice(categories),
+                "timestamp": (start + timedelta(seconds=i / rate)).isoformat(),
+                "device_info": {"device_id": f"device_{user}", "type": "mobile"},
+                "ip_address": f"198.51.100.{user % 256}"
+            },
+            "user_data": {
+                "user_id": f"user_{user}",
+                "account_age_days": user % 900,
+                "email_domain": "example.com"
+            }
+        }))
+    return records
+
+
+@dataclass
+class EndpointStats:
+    """Latencies and errors of one endpoint"""
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, duration_seconds: float) -> Dict[str, Any]:
+        latencies = np.asarray(self.latencies_ms, dtype=np.float64)
+        summary = {
+            "requests": len(latencies) + self.errors,
+            "errors": self.errors,
+            "throughput_rps": round(len(latencies) / duration_seconds, 2) if duration_seconds > 0 else 0.0
+        }
+        for name, q in PERCENTILES.items():
+            summary[f"{name}_ms"] = round(float(np.percentile(latencies, q)), 3) if len(latencies) else None
+        summary["max_ms"] = round(float(latencies.max()), 3) if len(latencies) else None
+        return summary
+
+
+@dataclass
+class ReplayReport:
+    """Per-endpoint latency percentiles and throughput of one replay"""
+    mode: str
+    duration_seconds: float = 0.0
+    endpoints: Dict[str, EndpointStats] = field(default_factory=dict)
+
+    def observe(self, path: str, latency_ms: float, ok: bool):
+        stats = self.endpoints.setdefault(path, EndpointStats())
+        if ok:
+            stats.latencies_ms.append(latency_ms)
+        else:
+            stats.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "endpoints": {
+                path: stats.summary(self.duration_seconds)
+                for path, stats in sorted(self.endpoints.items())
+            }
+        }
+
+    def slo_violations(self, slos: Dict[str, float]) -> List[str]:
+        """Endpoints whose percentile latency exceeds an SLO ({"p99": 50.0} in ms) or that had errors"""
+        violations = []
+        for path, summary in self.summary()["endpoints"].items():
+            if summary["errors"]:
+                violations.append(f"{path}: {summary['errors']} errors")
+            for name, limit_ms in slos.items():
+                value = summary.get(f"{name}_ms")
+                if value is not None and value > limit_ms:
+                    violations.append(f"{path}: {name} {value}ms > {limit_ms}ms")
+        return violations
+
+
+def arrival_offsets(records: List[ReplayRecord], qps: Optional[float] = None,
+                    poisson: bool = False, speedup: float = 1.0, seed: int = 0) -> np.ndarray:
+    """Send times: recorded offsets (scaled by speedup), a fixed QPS, or Poisson arrivals at that rate"""
+    if speedup <= 0:
+        raise ValueError(f"speedup must be positive, got {speedup}")
+    if qps is not None and qps <= 0:
+        raise ValueError(f"qps must be positive, got {qps}")
+    if qps is None:
+        return np.array([record.offset for record in records], dtype=np.float64) / speedup
+    if poisson:
+        gaps = np.random.default_rng(seed).exponential(1.0 / qps, len(records))
+        return np.concatenate(([0.0], np.cumsum(gaps[:-1]))) if len(records) else gaps
+    return np.arange(len(records), dtype=np.float64) / qps
+
+
+async def replay(records: List[ReplayRecord], client, qps: Optional[float] = None,
+                 poisson: bool = False, speedup: float = 1.0,
+                 concurrency: Optional[int] = None, seed: int = 0) -> ReplayReport:
+    """Replay records through an httpx.AsyncClient, open-loop unless concurrency is given"""
+    if concurrency:
+        return await _replay_closed_loop(records, client, concurrency)
+
+    report = ReplayReport(mode="open-loop")
+    offsets = arrival_offsets(records, qps, poisson, speedup, seed)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    in_flight = set()
+
+    for record, offset in zip(records, offsets.tolist()):
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = loop.create_task(_send(client, record, start + offset, report))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    report.duration_seconds = loop.time() - start
+    return report
+
+
+async def _replay_closed_loop(records: List[ReplayRecord], client, concurrency: int) -> ReplayReport:
+    report = ReplayReport(mode=f"closed-loop x{concurrency}")
+    loop = asyncio.get_running_loop()
+    pending = iter(records)
+
+    async def worker():
+        for record in pending:
+            await _send(client, record, loop.time(), report)
+
+    start = loop.time()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    report.duration_seconds = loop.time() - start
+    return report
+
+
+async def _send(client, record: ReplayRecord, scheduled_at: float, report: ReplayReport):
+    try:
+        response = await client.request(record.method, record.path, json=record.body)
+        ok = response.status_code < 400
+    except Exception:
+        ok = False
+    latency_ms = (asyncio.get_running_loop().time() - scheduled_at) * 1000.0
+    report.observe(record.path, latency_ms, ok)
+
+
+@asynccontextmanager
+async def in_process_client(app):
+    """httpx client bound to an ASGI app, with the app's startup/shutdown handlers run"""
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            yield client
+
+
+@asynccontextmanager
+async def http_client(url: str, concurrency: int = 100):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        yield client
+
+
+def parse_slos(values: Optional[List[str]]) -> Dict[str, float]:
+    """['p99=50', 'p999=120'] -> {'p99': 50.0, 'p999': 120.0}"""
+    slos = {}
+    for value in values or []:
+        name, separator, limit = value.partition("=")
+        if not separator or name not in PERCENTILES:
+            raise ValueError(f"Invalid SLO '{value}', expected one of {list(PERCENTILES)}=<ms>")
+        slos[name] = float(limit)
+    return slos
+
+
+async def _run(args) -> int:
+    records = read_records(args.recording)
+    if args.limit:
+        records = records[:args.limit]
+    slos = parse_slos(args.slo)
+
+    if args.url:
+        client_context = http_client(args.url, args.concurrency or 100)
+    else:
+        from main import app
+        client_context = in_process_client(app)
+
+    async with client_context as client:
+        if args.warmup:
+            await replay(records[:args.warmup], client, concurrency=args.concurrency or 1)
+        report = await replay(records, client, qps=args.qps, poisson=args.poisson,
+                              speedup=args.speedup, concurrency=args.concurrency, seed=args.seed)
+
+    print(json.dumps(report.summary(), indent=2))
+    violations = report.slo_violations(slos)
+    for violation in violations:
+        print(f"SLO violation: {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+def _positive_float(value: str) -> float:
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number, got {value}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay fraud detection traffic")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="Write a synthetic detect recording")
+    generate.add_argument("output", help="Output .jsonl.gz file")
+    generate.add_argument("--count", type=int, default=10_000)
+    generate.add_argument("--rate", type=_positive_float, default=100.0, help="Requests per second in the recording")
+    generate.add_argument("--users", type=int, default=1000)
+    generate.add_argument("--seed", type=int, default=0)
+
+    run = subparsers.add_parser("run", help="Replay a recording and report latency percentiles")
+    run.add_argument("recording", help="Recorded .jsonl.gz file")
+    run.add_argument("--url", help="Service base URL; replays in-process against main:app when omitted")
+    run.add_argument("--qps", type=_positive_float, help="Fixed arrival rate instead of the recorded timing")
+    run.add_argument("--poisson", action="store_true", help="Poisson arrivals at --qps")
+    run.add_argument("--speedup", type=_positive_float, default=1.0, help="Time compression of the recorded timing")
+    run.add_argument("--concurrency", type=int, help="Closed-loop workers instead of an arrival schedule")
+    run.add_argument("--warmup", type=int, default=0, help="Requests sent before measuring")
+    run.add_argument("--limit", type=int, help="Replay only the first N requests")
+    run.add_argument("--slo", action="append", help="Latency SLO such as p99=50 (ms); exit 1 if violated")
+    run.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        records = generate_detect_records(args.count, args.rate, args.users, args.seed)
+        write_records(args.output, records)
+        print(f"{args.output}: {len(records)} requests over {records[-1].offset if records else 0:.1f}s")
+        return
+    sys.exit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()